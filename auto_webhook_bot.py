@@ -17,8 +17,9 @@ from typing import Dict, Any, Optional
 # Add current directory to path
 sys.path.append('/root/gensyn-bot')
 
-from webhook_server import WebhookServer
+from webhook_server import WebhookServer, STATUS_PROBE_DEADLINE
 from webhook_client import WebhookClient
+from heartbeat_delta import HeartbeatEncoder
 
 class AutoDiscoveryBot:
     def __init__(self):
@@ -37,6 +38,8 @@ class AutoDiscoveryBot:
         self.running = False
         self.registration_attempts = 0
         self.max_registration_attempts = 10
+        # Heartbeats between full snapshots only carry what changed
+        self.heartbeats = HeartbeatEncoder()
         
         # Setup logging
         logging.basicConfig(
@@ -131,7 +134,7 @@ class AutoDiscoveryBot:
             return False
     
     def send_heartbeat(self):
-        """Send heartbeat to maintain registration"""
+        """Send heartbeat to maintain registration; only changed fields between full snapshots"""
         try:
             heartbeat_data = {
                 'message_type': 'heartbeat',
@@ -139,13 +142,13 @@ class AutoDiscoveryBot:
                 'vps_name': self.config['vps_name'],
                 'auth_token': self.config['auth_token'],
                 'timestamp': datetime.utcnow().isoformat() + "Z",
-                'data': {
+                'data': self.heartbeats.encode({
                     'uptime': self.get_uptime(),
                     'system_info': self.get_system_metrics(),
                     'status': 'online',
                     'capabilities': self.get_current_capabilities(),
                     'last_activity': datetime.utcnow().isoformat() + "Z"
-                }
+                })
             }
             
             response = requests.post(
@@ -156,11 +159,19 @@ class AutoDiscoveryBot:
             
             if response.status_code == 200:
                 self.logger.debug("Heartbeat sent successfully")
+                try:
+                    # n8n asks for a full snapshot when a delta did not follow the state it holds
+                    if response.json().get('resync'):
+                        self.heartbeats.request_full()
+                except ValueError:
+                    pass
             else:
                 self.logger.warning(f"Heartbeat failed with status {response.status_code}")
+                self.heartbeats.request_full()
                 
         except Exception as e:
             self.logger.error(f"Heartbeat failed: {str(e)}")
+            self.heartbeats.request_full()
     
     def get_public_ip(self) -> str:
         """Get current public IP"""
@@ -388,26 +399,41 @@ class AutoDiscoveryServer(WebhookServer):
         def system_status(params: Dict[str, Any]) -> str:
             """Get comprehensive system status"""
             try:
-                import psutil
+                import gensyn_core
+                from status_snapshot import collect_sections
+                
+                # Probes run concurrently; any that miss the deadline report "unknown"
+                probes = {
+                    'system_metrics': lambda sections: {
+                        **gensyn_core.get_system_metrics(cpu_interval=1),
+                        'load_average': os.getloadavg()[0] if hasattr(os, 'getloadavg') else 0
+                    },
+                    'gensyn_running': lambda sections: self.check_gensyn_running(),
+                    'vpn_active': lambda sections: self.check_vpn_active(),
+                    'public_ip': lambda sections: self.get_public_ip(),
+                    'vpn_ip': lambda sections: self.get_vpn_ip(),
+                }
+                results = collect_sections(probes, deadline=STATUS_PROBE_DEADLINE)
+                # Timed-out sections carry value=None; keep False from the service checks
+                defaults = {'system_metrics': {}}
+                probed = {}
+                for name, section in results.items():
+                    value = section.get('value')
+                    probed[name] = defaults.get(name, 'unknown') if value is None else value
                 
                 status = {
                     'vps_name': self.auto_config['vps_name'],
                     'vps_id': self.auto_config['vps_id'],
                     'uptime': self.get_uptime(),
-                    'system_metrics': {
-                        'cpu_percent': psutil.cpu_percent(interval=1),
-                        'memory_percent': psutil.virtual_memory().percent,
-                        'disk_percent': psutil.disk_usage('/').percent,
-                        'load_average': os.getloadavg()[0] if hasattr(os, 'getloadavg') else 0
-                    },
+                    'system_metrics': probed['system_metrics'],
                     'services': {
-                        'gensyn_running': self.check_gensyn_running(),
-                        'vpn_active': self.check_vpn_active(),
+                        'gensyn_running': probed['gensyn_running'],
+                        'vpn_active': probed['vpn_active'],
                         'webhook_server': True
                     },
                     'network': {
-                        'public_ip': self.get_public_ip(),
-                        'vpn_ip': self.get_vpn_ip()
+                        'public_ip': probed['public_ip'],
+                        'vpn_ip': probed['vpn_ip']
                     }
                 }
                 
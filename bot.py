@@ -4,7 +4,6 @@ monitor_thread = None
 def reward_win_monitor(chat_id):
     import time
     import json
-    from urllib.parse import quote_plus
     last_reward = None
     last_win = None
     peer_name = None
@@ -27,12 +26,8 @@ def reward_win_monitor(chat_id):
             # Resolve peer_id from name if not available
             if not peer_id and peer_name:
                 try:
-                    name_url = f"https://dashboard.gensyn.ai/api/v1/peer?name={quote_plus(peer_name)}"
-                    r_name = requests.get(name_url, timeout=10)
-                    if r_name.status_code == 200:
-                        record = r_name.json()
-                        raw_peer_id = record.get("peerId") or ""
-                        peer_id = raw_peer_id.split("|")[-1] if "|" in raw_peer_id else raw_peer_id or None
+                    record = get_peer_cache().get_by_name(peer_name)
+                    peer_id = split_peer_id(record.get("peerId"))
                 except Exception:
                     pass
 
@@ -43,10 +38,8 @@ def reward_win_monitor(chat_id):
 
             # Fetch metrics by peer id to ensure reward/score are populated
             try:
-                id_url = f"https://dashboard.gensyn.ai/api/v1/peer?id={quote_plus(peer_id)}"
-                r = requests.get(id_url, timeout=10)
-                if r.status_code == 200:
-                    data = r.json()
+                data = get_peer_cache().get_by_id(peer_id, allow_stale=False)
+                if data:
                     reward = data.get("reward", 0)
                     score = data.get("score", 0)
                     # Alert if reward or win increased
@@ -63,8 +56,9 @@ def reward_win_monitor(chat_id):
                         msg.append(f"🎁 reward {reward}+{reward_diff}")
                     if win_diff:
                         msg.append(f"🏆 win {score}+{win_diff}")
-                    if msg:
-                        bot.send_message(chat_id, " ".join(msg))
+                    # The live dashboard already shows reward and wins
+                    if msg and not dashboard.is_live(chat_id):
+                        outbox.send(chat_id, " ".join(msg), coalesce=True)
             except Exception as e:
                 logging.error(f"Monitor fetch error: {str(e)}")
             time.sleep(600)  # 10 min
@@ -76,102 +70,34 @@ import time
 import threading
 import subprocess
 import logging
-import requests
-import shutil
-import json
-import re
 import html
 from datetime import datetime, timedelta
 from telebot import TeleBot
+import http_client
+import gensyn_core as core
+from gensyn_core import (
+    BOT_CONFIG, SWARM_PEM_PATH, USER_DATA_PATH, USER_APIKEY_PATH,
+    GENSYN_LOG_PATH, WANDB_LOG_DIR, BACKUP_FILES,
+    get_cached_peer_info, start_vpn, stop_vpn, backup_user_data_sync,
+    check_gensyn_screen_running, format_gensyn_status
+)
+from peer_cache import get_peer_cache, split_peer_id
+from chain_client import get_chain_client
+from log_follower import get_log_follower
+from round_history import get_round_history, format_round_history
+from telegram_dispatch import Dispatcher, format_metrics
+from telegram_outbox import TelegramOutbox
+from live_message import LiveMessage, LiveDashboard
+from fs_watch import EventLoop, IN_MODIFY, IN_CLOSE_WRITE, IN_CREATE, IN_MOVED_TO, IN_ISDIR
 from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
 
-BOT_CONFIG = "/root/bot_config.env"
-WG_CONFIG_PATH = "/etc/wireguard/wg0.conf"
-SWARM_PEM_PATH = "/root/rl-swarm/swarm.pem"
-USER_DATA_PATH = "/root/rl-swarm/modal-login/temp-data/userData.json"
-USER_APIKEY_PATH = "/root/rl-swarm/modal-login/temp-data/userApiKey.json"
-BACKUP_USERDATA_DIR = "/root/gensyn-bot/backup-userdata"
-SYNC_BACKUP_DIR = "/root/gensyn-bot/sync-backup"
-GENSYN_LOG_PATH = "/root/rl-swarm/logs/swarm_launcher.log"
-WANDB_LOG_DIR = "/root/rl-swarm/logs/wandb"
-
-# Cache file for discovered peer info
-PEER_CACHE_FILE = "/root/gensyn-bot/peer_info.json"
-
-def parse_peer_info_from_swarm_log(log_path=GENSYN_LOG_PATH):
-    """
-    Parse peer name and peer id from swarm_launcher.log lines, e.g.:
-    [ts][...][INFO] - Hello ... [<peer name>] ... [<peer id>]
-    Returns dict {"peer_name": str, "peer_id": str} or None
-    """
-    try:
-        if not os.path.exists(log_path):
-            return None
-        # Read last 1000 lines to search for the most recent Hello line
-        with open(log_path, "r") as f:
-            lines = f.readlines()[-1000:]
-        for line in reversed(lines):
-            if "Hello" not in line:
-                continue
-            try:
-                after = line.split("Hello", 1)[1]
-            except Exception:
-                continue
-            # Capture the first two bracketed groups after "Hello"
-            brackets = []
-            for m in re.finditer(r"\[([^\]]+)\]", after):
-                brackets.append(m.group(1))
-                if len(brackets) == 2:
-                    break
-            if len(brackets) >= 2:
-                peer_name = brackets[0].strip()
-                peer_id = brackets[1].strip()
-                if peer_name and peer_id:
-                    return {"peer_name": peer_name, "peer_id": peer_id}
-        return None
-    except Exception:
-        return None
-
-def write_cached_peer_info(info, cache_path=PEER_CACHE_FILE):
-    try:
-        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
-        payload = {
-            **info,
-            "updated_at": datetime.utcnow().isoformat() + "Z"
-        }
-        with open(cache_path, "w") as f:
-            json.dump(payload, f, indent=2)
-        return True
-    except Exception:
-        return False
-
-def get_cached_peer_info(cache_path=PEER_CACHE_FILE):
-    """
-    Return cached peer info if present; otherwise parse the log and cache it.
-    """
-    try:
-        if os.path.exists(cache_path):
-            with open(cache_path) as f:
-                data = json.load(f)
-                if isinstance(data, dict) and (data.get("peer_name") or data.get("peer_id")):
-                    return data
-        info = parse_peer_info_from_swarm_log()
-        if info:
-            write_cached_peer_info(info, cache_path)
-            return {**info}
-        return None
-    except Exception:
-        return None
-
 logging.basicConfig(
     filename='/root/bot_error.log',
     level=logging.ERROR,
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-with open(BOT_CONFIG) as f:
-    lines = f.read().strip().split("\n")
-    config = dict(line.split("=", 1) for line in lines if "=" in line)
+config = core.load_bot_config(BOT_CONFIG)
 
 BOT_TOKEN = config["BOT_TOKEN"]
 USER_ID = int(config["USER_ID"])
@@ -184,8 +110,39 @@ tmate_running = False
 last_action_time = {}
 COOLDOWN_SECONDS = 2
 
-os.makedirs(BACKUP_USERDATA_DIR, exist_ok=True)
-os.makedirs(SYNC_BACKUP_DIR, exist_ok=True)
+# Buttons that act on the same thing share one concurrency limit
+ACTION_GROUPS = {
+    "start_gensyn": "lifecycle",
+    "start_gensyn_with_backup": "lifecycle",
+    "start_gensyn_no_backup": "lifecycle",
+    "start_fresh": "lifecycle",
+    "kill_gensyn": "lifecycle",
+    "set_autostart": "lifecycle",
+    "upload_pem": "lifecycle",
+    "vpn_on": "vpn",
+    "vpn_off": "vpn",
+    "start_monitor": "monitor",
+    "stop_monitor": "monitor",
+    "gensyn_soft_update": "update",
+    "gensyn_hard_update": "update",
+    "bot_update": "update",
+}
+# Jobs per action queued or running at once; anything unlisted gets the dispatcher default
+ACTION_LIMITS = {
+    "lifecycle": 1,
+    "vpn": 1,
+    "monitor": 1,
+    "update": 1,
+    "install_gensyn": 1,
+    "toggle_tmate": 1,
+    "get_backup": 1,
+    "wandb_send_log": 1,
+}
+dispatcher = Dispatcher(action_limits=ACTION_LIMITS)
+# Background notifications go through the rate-limited outbox; alerts are merged into digests
+outbox = TelegramOutbox(bot.send_message)
+# Pinned status message per chat, edited in place when the status snapshot changes
+dashboard = LiveDashboard(bot, lambda snapshot: core.render_gensyn_status(snapshot, with_ages=False))
 
 def get_menu():
     markup = InlineKeyboardMarkup()
@@ -224,307 +181,46 @@ def get_menu():
     )
     return markup
 
-def start_vpn():
-    try:
-        subprocess.run(['wg-quick', 'up', 'wg0'], check=True)
-        return True, "✅ VPN enabled"
-    except subprocess.CalledProcessError as e:
-        if "already exists" in str(e):
-            return True, "⚠️ VPN already enabled"
-        return False, f"❌ VPN failed to start: {str(e)}"
-
-def stop_vpn():
-    try:
-        subprocess.run(['wg-quick', 'down', 'wg0'], check=True)
-        return True, "❌ VPN disabled"
-    except subprocess.CalledProcessError as e:
-        if "is not a WireGuard interface" in str(e):
-            return True, "⚠️ VPN already disabled"
-        return False, f"❌ VPN failed to stop: {str(e)}"
-
-def backup_user_data_sync():
-    try:
-        for src, name in [(USER_DATA_PATH, "userData.json"), (USER_APIKEY_PATH, "userApiKey.json")]:
-            dst = os.path.join(SYNC_BACKUP_DIR, name)
-            if os.path.exists(src):
-                shutil.copy(src, dst)
-        return True
-    except Exception as e:
-        logging.error(f"Sync backup error: {str(e)}")
-        return False
-
-def periodic_sync_backup():
-    while True:
-        try:
-            backup_user_data_sync()
-            time.sleep(60)
-        except Exception as e:
-            logging.error(f"Periodic sync backup thread error: {str(e)}")
-            time.sleep(10)
-
-threading.Thread(target=periodic_sync_backup, daemon=True).start()
-
-def backup_user_data():
-    try:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        for path, name in [(USER_DATA_PATH, "userData.json"), (USER_APIKEY_PATH, "userApiKey.json")]:
-            if os.path.exists(path):
-                backup_file = f"{name.split('.')[0]}_{timestamp}.json"
-                shutil.copy(path, os.path.join(BACKUP_USERDATA_DIR, backup_file))
-                latest_file = f"{name.split('.')[0]}_latest.json"
-                shutil.copy(path, os.path.join(BACKUP_USERDATA_DIR, latest_file))
-        return True
-    except Exception as e:
-        logging.error(f"Backup error: {str(e)}")
-        return False
-
 def run_command(cmd, chat_id=None, desc=None):
-    try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        if result.returncode != 0:
-            if chat_id:
-                bot.send_message(chat_id, f"❌ {desc or 'Command failed'}: {html.escape(result.stderr[-1000:])}", parse_mode="HTML")
-            return False, result.stdout + "\n" + result.stderr
-        return True, result.stdout
-    except Exception as e:
-        if chat_id:
-            bot.send_message(chat_id, f"❌ {desc or 'Command error'}: {str(e)}")
-        return False, str(e)
+    ok, out = core.run_command(cmd)
+    if not ok and chat_id:
+        bot.send_message(chat_id, f"❌ {desc or 'Command failed'}: {html.escape(out[-1000:])}", parse_mode="HTML")
+    return ok, out
 
 def install_gensyn(chat_id):
-    try:
-        last_msg_id = None
-        def send_step(text):
-            nonlocal last_msg_id
-            try:
-                if last_msg_id:
-                    try:
-                        bot.delete_message(chat_id, last_msg_id)
-                    except Exception:
-                        pass
-                msg = bot.send_message(chat_id, text)
-                last_msg_id = msg.message_id
-            except Exception:
-                last_msg_id = None
-
-        send_step("🍳 Installing Gensyn prerequisites... This may take a while.")
-        steps = [
-            ("sudo apt update", "APT update"),
-            ("sudo apt install -y python3 python3-venv python3-pip curl wget screen git lsof gnupg", "Base packages"),
-            ("curl -fsSL https://deb.nodesource.com/setup_20.x | sudo -E bash -", "NodeSource setup"),
-            ("sudo apt update", "APT update (node)"),
-            ("sudo apt install -y nodejs", "Install Node.js"),
-            ("sudo apt install -y tmate", "Install tmate"),
-            ("curl -sS https://dl.yarnpkg.com/debian/pubkey.gpg | gpg --dearmor | sudo tee /usr/share/keyrings/yarn-archive-keyring.gpg > /dev/null", "Yarn key"),
-            ("echo \"deb [signed-by=/usr/share/keyrings/yarn-archive-keyring.gpg] https://dl.yarnpkg.com/debian stable main\" | sudo tee /etc/apt/sources.list.d/yarn.list > /dev/null", "Yarn repo"),
-            ("sudo apt update", "APT update (yarn)"),
-            ("sudo apt install -y yarn", "Install yarn"),
-        ]
-        for cmd, desc in steps:
-            send_step(f"⏳ {desc}...")
-            ok, out = run_command(cmd, None, desc)
-            if not ok:
-                send_step(f"❌ {desc} failed: {html.escape(out[-1000:])}")
-                return
-
-        # Clone rl-swarm only if missing
-        if os.path.exists("/root/rl-swarm"):
-            send_step("ℹ️ /root/rl-swarm already exists. Skipping clone.")
-        else:
-            send_step("⏳ Cloning rl-swarm...")
-            ok, out = run_command("cd /root && git clone https://github.com/shairkhan2/rl-swarm.git rl-swarm", None, "Clone rl-swarm")
-            if not ok:
-                send_step(f"❌ Clone rl-swarm failed: {html.escape(out[-1000:])}")
-                return
-
-        # Cloudflared
-        send_step("⏳ Installing cloudflared...")
-        ok, out = run_command("wget -q https://github.com/cloudflare/cloudflared/releases/latest/download/cloudflared-linux-amd64.deb", None, "Download cloudflared")
-        if not ok:
-            send_step(f"❌ Download cloudflared failed: {html.escape(out[-1000:])}")
-            return
-        ok, out = run_command("sudo dpkg -i cloudflared-linux-amd64.deb || sudo apt -f install -y", None, "Install cloudflared")
-        if not ok:
-            send_step(f"❌ Install cloudflared failed: {html.escape(out[-1000:])}")
-            return
-        try:
-            os.remove("cloudflared-linux-amd64.deb")
-        except Exception:
-            pass
-
-        send_step("✅ Install complete.")
-    except Exception as e:
-        try:
-            send_step(f"❌ Install failed: {html.escape(str(e))}")
-        except Exception:
-            bot.send_message(chat_id, f"❌ Install failed: {str(e)}")
+    # Steps go through the outbox; command output streams into one message edited in place
+    progress = LiveMessage(bot, chat_id)
+    core.install_gensyn(lambda text: outbox.send(chat_id, text), progress=progress.update)
+    progress.flush()
 
 def setup_autostart(chat_id):
-    try:
-        os.makedirs(BACKUP_USERDATA_DIR, exist_ok=True)
-        if os.path.exists(USER_DATA_PATH):
-            shutil.copy(USER_DATA_PATH, os.path.join(BACKUP_USERDATA_DIR, "userData.json"))
-        if os.path.exists(USER_APIKEY_PATH):
-            shutil.copy(USER_APIKEY_PATH, os.path.join(BACKUP_USERDATA_DIR, "userApiKey.json"))
-        service_content = f"""[Unit]
-Description=Gensyn Swarm Service
-After=network.target
-
-[Service]
-Type=forking
-User=root
-WorkingDirectory=/root/rl-swarm
-ExecStartPre=/usr/bin/wg-quick up wg0
-ExecStartPre=/bin/bash -c 'mkdir -p /root/rl-swarm/modal-login/temp-data && cp {BACKUP_USERDATA_DIR}/userData.json {USER_DATA_PATH} || true'
-ExecStartPre=/bin/bash -c 'cp {BACKUP_USERDATA_DIR}/userApiKey.json {USER_APIKEY_PATH} || true'
-ExecStart=/bin/bash -c 'screen -dmS gensyn bash -c "python3 -m venv .venv && source .venv/bin/activate && ./run_rl_swarm.sh"'
-ExecStopPost=/usr/bin/wg-quick down wg0
-Restart=always
-RestartSec=30
-
-[Install]
-WantedBy=multi-user.target
-"""
-        with open("/etc/systemd/system/gensyn.service", "w") as f:
-            f.write(service_content)
-        subprocess.run(["systemctl", "daemon-reload"], check=True)
-        subprocess.run(["systemctl", "enable", "gensyn.service"], check=True)
-        subprocess.run(["systemctl", "start", "gensyn.service"], check=True)
-        bot.send_message(chat_id, "✅ Auto-start configured! Gensyn and VPN will now start on boot.")
-    except Exception as e:
-        bot.send_message(chat_id, f"❌ Error setting up auto-start: {str(e)}")
+    ok, message = core.setup_autostart()
+    bot.send_message(chat_id, message)
 
 def gensyn_soft_update(chat_id):
-    backup_paths = [
-        USER_DATA_PATH,
-        USER_APIKEY_PATH
-    ]
-    backup_dir = "/root/gensyn-bot/soft-update-backup"
-    os.makedirs(backup_dir, exist_ok=True)
-    try:
-        for path in backup_paths:
-            if os.path.exists(path):
-                shutil.copy(path, backup_dir)
-        bot.send_message(chat_id, "Backup done. Killing Gensyn...")
-        # Only kill gensyn screen if present
-        if check_gensyn_screen_running():
-            subprocess.run("screen -S gensyn -X quit", shell=True, check=True)
-            bot.send_message(chat_id, "Gensyn killed.")
-        else:
-            bot.send_message(chat_id, "No gensyn screen found. Proceeding with update...")
-        bot.send_message(chat_id, "Updating (git switch/reset/clean/pull)...")
-        update_cmd = (
-            "cd /root/rl-swarm && "
-            "git switch main && "
-            "git reset --hard && "
-            "git clean -fd && "
-            "git pull origin main"
-        )
-        result = subprocess.run(update_cmd, shell=True, capture_output=True, text=True)
-        if result.returncode == 0:
-            msg = "Update done. Restarting node..."
-        else:
-            msg = "Update failed. Restoring backup..."
-        for filename in ["userData.json", "userApiKey.json"]:
-            src = os.path.join(backup_dir, filename)
-            dst = f"/root/rl-swarm/modal-login/temp-data/{filename}"
-            if os.path.exists(src):
-                shutil.copy(src, dst)
-        subprocess.run("cd /root/rl-swarm && screen -dmS gensyn bash -c 'python3 -m venv .venv && source .venv/bin/activate && ./run_rl_swarm.sh'", shell=True)
-        bot.send_message(chat_id, f"{msg}\nGensyn started.")
-    except Exception as e:
-        bot.send_message(chat_id, f"Soft update failed: {str(e)}")
+    # Steps go through the outbox; git output streams into one message edited in place
+    progress = LiveMessage(bot, chat_id)
+    core.gensyn_soft_update(lambda text: outbox.send(chat_id, text), progress=progress.update)
+    progress.flush()
 
 def gensyn_hard_update(chat_id):
-    backup_paths = [
-        SWARM_PEM_PATH,
-        USER_DATA_PATH,
-        USER_APIKEY_PATH
-    ]
-    backup_dir = "/root/gensyn-bot/hard-update-backup"
-    os.makedirs(backup_dir, exist_ok=True)
-    try:
-        for path in backup_paths:
-            if os.path.exists(path):
-                shutil.copy(path, backup_dir)
-        bot.send_message(chat_id, "Backup done. Killing Gensyn...")
-        # Only kill gensyn screen if present
-        if check_gensyn_screen_running():
-            subprocess.run("screen -S gensyn -X quit", shell=True, check=True)
-            bot.send_message(chat_id, "Gensyn killed.")
-        else:
-            bot.send_message(chat_id, "No gensyn screen found. Proceeding with update...")
-        bot.send_message(chat_id, "Cloning repo...")
-        subprocess.run("rm -rf /root/rl-swarm", shell=True)
-        result = subprocess.run("git clone https://github.com/shairkhan2/rl-swarm.git /root/rl-swarm", shell=True, capture_output=True, text=True)
-        if result.returncode == 0:
-            msg = "Hard update done. Restoring backup..."
-        else:
-            msg = "Hard update failed. Restoring backup to last state."
-        for filename in ["swarm.pem", "userData.json", "userApiKey.json"]:
-            src = os.path.join(backup_dir, filename)
-            dst = f"/root/rl-swarm/{filename}" if filename == "swarm.pem" else f"/root/rl-swarm/modal-login/temp-data/{filename}"
-            if os.path.exists(src):
-                shutil.copy(src, dst)
-        subprocess.run("cd /root/rl-swarm && screen -dmS gensyn bash -c 'python3 -m venv .venv && source .venv/bin/activate && ./run_rl_swarm.sh'", shell=True)
-        bot.send_message(chat_id, f"{msg}\nGensyn started.")
-    except Exception as e:
-        bot.send_message(chat_id, f"Hard update failed: {str(e)}")
+    progress = LiveMessage(bot, chat_id)
+    core.gensyn_hard_update(lambda text: outbox.send(chat_id, text), progress=progress.update)
+    progress.flush()
 
 def send_backup_files(chat_id):
-    files = [
-        SWARM_PEM_PATH,
-        USER_DATA_PATH,
-        USER_APIKEY_PATH
-    ]
-    for fpath in files:
+    for fpath in BACKUP_FILES:
         if os.path.exists(fpath):
             with open(fpath, "rb") as f:
                 bot.send_document(chat_id, f)
         else:
             bot.send_message(chat_id, f"{os.path.basename(fpath)} not found.")
 
-def check_gensyn_screen_running():
-    """
-    Check if the 'gensyn' screen session is running
-    Returns True if running, False otherwise
-    """
-    try:
-        result = subprocess.run("screen -ls", shell=True, capture_output=True, text=True)
-        return "gensyn" in result.stdout
-    except Exception as e:
-        logging.error(f"Error checking screen: {str(e)}")
-        return False
-
 def start_gensyn_session(chat_id, use_sync_backup=True, fresh_start=False):
-    # Check if gensyn screen is already running
-    if check_gensyn_screen_running():
-        bot.send_message(chat_id, "⚠️ Gensyn already running!")
-        return
-    
-    # If fresh_start is True, skip swarm.pem check and just start the node
-    if fresh_start:
+    if fresh_start and not check_gensyn_screen_running():
         bot.send_message(chat_id, "🚀 Starting fresh node. swarm.pem will be generated automatically...")
-        backup_found = False
-        if use_sync_backup:
-            for file in ["userData.json", "userApiKey.json"]:
-                backup_path = os.path.join(SYNC_BACKUP_DIR, file)
-                target_path = USER_DATA_PATH if file == "userData.json" else USER_APIKEY_PATH
-                if os.path.exists(backup_path):
-                    shutil.copy(backup_path, target_path)
-                    backup_found = True
-        commands = [
-            "cd /root/rl-swarm",
-            "screen -dmS gensyn bash -c 'python3 -m venv .venv && source .venv/bin/activate && ./run_rl_swarm.sh'"
-        ]
-        try:
-            subprocess.run("; ".join(commands), shell=True, check=True)
-            bot.send_message(chat_id, "✅ Fresh node started in screen session 'gensyn'. swarm.pem will be generated.")
-        except subprocess.CalledProcessError as e:
-            bot.send_message(chat_id, f"❌ Error starting fresh node: {str(e)}")
-        return
-    # Check if swarm.pem exists (for non-fresh start)
-    elif not os.path.exists(SWARM_PEM_PATH):
+    outcome, message = core.start_gensyn_session(use_sync_backup, fresh_start)
+    if outcome == core.START_MISSING_PEM:
         markup = InlineKeyboardMarkup()
         markup.add(
             InlineKeyboardButton("Upload old swarm.pem", callback_data="upload_pem"),
@@ -532,261 +228,11 @@ def start_gensyn_session(chat_id, use_sync_backup=True, fresh_start=False):
         )
         bot.send_message(
             chat_id,
-            "❗ swarm.pem not found! If you have a backup of your old Gensyn node, please upload it.\nOtherwise, start fresh (new node, new keys).",
+            f"{message} If you have a backup of your old Gensyn node, please upload it.\nOtherwise, start fresh (new node, new keys).",
             reply_markup=markup
         )
         return
-    try:
-        backup_found = False
-        if use_sync_backup:
-            for file in ["userData.json", "userApiKey.json"]:
-                backup_path = os.path.join(SYNC_BACKUP_DIR, file)
-                target_path = USER_DATA_PATH if file == "userData.json" else USER_APIKEY_PATH
-                if os.path.exists(backup_path):
-                    shutil.copy(backup_path, target_path)
-                    backup_found = True
-        commands = [
-            "cd /root/rl-swarm",
-            "screen -dmS gensyn bash -c 'python3 -m venv .venv && source .venv/bin/activate && ./run_rl_swarm.sh'"
-        ]
-        subprocess.run("; ".join(commands), shell=True, check=True)
-        if backup_found and use_sync_backup:
-            bot.send_message(chat_id, "✅ Login backup restored. Gensyn started in screen session 'gensyn'")
-        else:
-            bot.send_message(chat_id, "✅ Gensyn started in screen session 'gensyn'")
-    except subprocess.CalledProcessError as e:
-        bot.send_message(chat_id, f"❌ Error starting Gensyn: {str(e)}")
-
-def get_gensyn_log_status(log_path=GENSYN_LOG_PATH):
-    """
-    Parses the last 50 lines of the Gensyn log to find the latest activity.
-    Returns a dictionary with timestamp, joining, and starting round info, or None.
-    """
-    try:
-        if not os.path.exists(log_path):
-            return None
-
-        with open(log_path, "r") as f:
-            lines = f.readlines()[-50:]
-
-        latest_ts = None
-        joining_round = None
-        starting_round = None
-
-        for line in reversed(lines):
-            if "] - " in line:
-                try:
-                    ts_str = line.split("]")[0][1:]
-                    ts = datetime.strptime(ts_str.split(",")[0], "%Y-%m-%d %H:%M:%S")
-                    msg = line.split("] - ", 1)[-1].strip()
-
-                    if not latest_ts:
-                        latest_ts = ts
-                    if "Joining round" in msg and not joining_round:
-                        joining_round = msg
-                    if "Starting round" in msg and not starting_round:
-                        starting_round = msg
-                    
-                    if latest_ts and joining_round and starting_round:
-                        break
-                except (ValueError, IndexError):
-                    continue
-        
-        return {
-            "timestamp": latest_ts,
-            "joining": joining_round,
-            "starting": starting_round,
-        }
-    except Exception as e:
-        logging.error(f"Error reading Gensyn log: {str(e)}")
-        return None
-
-def check_gensyn_api():
-    """
-    Checks if the Gensyn API is online by making a request to localhost:3000
-    Returns True if online, False otherwise
-    """
-    try:
-        response = requests.get("http://localhost:3000", timeout=5)
-        if response.status_code == 200:
-            # Check for various indicators that the Gensyn service is running
-            response_text = response.text.lower()
-            gensyn_indicators = [
-                "sign in to gensyn",
-                "gensyn",
-                "__next_error__",
-                "<!doctype html>",
-                "<html"
-            ]
-            
-            # If any of these indicators are found, the service is running
-            for indicator in gensyn_indicators:
-                if indicator in response_text:
-                    return True
-        return False
-    except Exception as e:
-        logging.error(f"Error checking Gensyn API: {str(e)}")
-        return False
-
-def format_gensyn_status():
-    """
-    Formats the complete Gensyn status message, including peer info and EQA address
-    """
-    import glob
-    import json
-    from urllib.parse import quote_plus
-    from web3 import Web3
-    from datetime import date
-
-    EOA_CACHE_FILE = "/root/gensyn-bot/eoa_cache.json"
-    ALCHEMY_RPC = "https://gensyn-testnet.g.alchemy.com/v2/TD5tr7mo4VfXlSaolFlSr3tL70br2M9J"
-    CONTRACT_ADDRESS = "0xFaD7C5e93f28257429569B854151A1B8DCD404c2"
-    ABI = [
-        {
-            "name": "getEoa",
-            "type": "function",
-            "stateMutability": "view",
-            "inputs": [{"name": "peerIds", "type": "string[]"}],
-            "outputs": [{"name": "", "type": "address[]"}]
-        }
-    ]
-
-    def fetch_eoa_mapping(w3, contract, peer_ids):
-        today = str(date.today())
-        if os.path.exists(EOA_CACHE_FILE):
-            try:
-                with open(EOA_CACHE_FILE) as f:
-                    data = json.load(f)
-                    if data.get("date") == today:
-                        return data.get("mapping", {})
-            except Exception:
-                pass
-        try:
-            addresses = contract.functions.getEoa(peer_ids).call()
-            mapping = {pid: eoa for pid, eoa in zip(peer_ids, addresses)}
-            with open(EOA_CACHE_FILE, "w") as f:
-                json.dump({"date": today, "mapping": mapping}, f, indent=4)
-            return mapping
-        except Exception as e:
-            return {pid: f"Error: {str(e)}" for pid in peer_ids}
-
-    # Check API status by making a request to localhost:3000
-    try:
-        response = requests.get("http://localhost:3000", timeout=3)
-        if "Sign in to Gensyn" in response.text:
-            api_status = "localhost:3000: ✅ Running"
-        else:
-            api_status = "localhost:3000: ❌ Stopped"
-    except Exception:
-        api_status = "localhost:3000: ❌ Stopped"
-
-    # Check log status and collect structured fields
-    log_data = get_gensyn_log_status()
-    log_status_lines = []
-    last_activity_min = None
-    joining_round_num = None
-    starting_round_str = None
-    if log_data and any(log_data.values()):
-        if log_data.get("timestamp"):
-            ts = log_data["timestamp"]
-            last_activity_min = int((datetime.utcnow() - ts).total_seconds() / 60)
-            log_status_lines.append(f"🕰️ Last Activity: {last_activity_min} mins ago")
-        if log_data.get("joining"):
-            joining_text = log_data["joining"]
-            m = re.search(r"(\d+)", joining_text)
-            joining_round_num = m.group(1) if m else joining_text
-            log_status_lines.append(f"🤝 Joining: 🐝 Round {joining_round_num}")
-        if log_data.get("starting"):
-            starting_text = log_data["starting"]
-            m = re.search(r"(\d+/\d+)", starting_text)
-            starting_round_str = m.group(1) if m else starting_text
-            log_status_lines.append(f"▶️ Starting: Round {starting_round_str}")
-    log_status = "\n".join(log_status_lines) if log_status_lines else "Round: No data found"
-
-    # Peer Discovery via cached JSON (from swarm_launcher.log)
-    peer_name = None
-    peer_id = None
-    try:
-        info = get_cached_peer_info()
-        if info:
-            peer_name = info.get("peer_name") or None
-            peer_id = info.get("peer_id") or None
-    except Exception:
-        peer_name = None
-        peer_id = None
-
-    peer_info_lines = []
-    # Prefer saved peer_id. If missing, resolve from peer_name, then fetch metrics by id.
-    resolved_peer_id = peer_id
-    resolved_peer_name = peer_name
-
-    # Resolve peer id from name if we don't have an id
-    if not resolved_peer_id and resolved_peer_name:
-        try:
-            name_url = f"https://dashboard.gensyn.ai/api/v1/peer?name={quote_plus(resolved_peer_name)}"
-            r = requests.get(name_url, timeout=10)
-            if r.status_code == 200:
-                name_data = r.json()
-                raw_peer_id = name_data.get("peerId") or ""
-                # Split composite id in format "wallet|ipfsPeerId"
-                resolved_peer_id = raw_peer_id.split("|")[-1] if "|" in raw_peer_id else raw_peer_id or None
-                resolved_peer_name = name_data.get("peerName") or resolved_peer_name
-            else:
-                peer_info_lines.append(f"Peer name lookup failed: {r.status_code}")
-        except Exception as e:
-            peer_info_lines.append(f"Peer name lookup error: {str(e)}")
-
-    reward = "?"
-    score = "?"
-    online = False
-
-    # Fetch metrics by id if available
-    if resolved_peer_id:
-        try:
-            id_url = f"https://dashboard.gensyn.ai/api/v1/peer?id={quote_plus(resolved_peer_id)}"
-            s = requests.get(id_url, timeout=10)
-            if s.status_code == 200:
-                stats = s.json()
-                reward = stats.get("reward", "?")
-                score = stats.get("score", "?")
-                online = stats.get("online", False)
-            else:
-                peer_info_lines.append(f"Peer id lookup failed: {s.status_code}")
-        except Exception as e:
-            peer_info_lines.append(f"Peer id lookup error: {str(e)}")
-    else:
-        if not resolved_peer_name:
-            peer_info_lines.append("No peer id or name found.")
-
-    # Get EQA address from smart contract using the resolved peer id
-    w3 = Web3(Web3.HTTPProvider(ALCHEMY_RPC))
-    contract = w3.eth.contract(address=Web3.to_checksum_address(CONTRACT_ADDRESS), abi=ABI)
-    eqa = "?"
-    if resolved_peer_id:
-        try:
-            eoa_mapping = fetch_eoa_mapping(w3, contract, [resolved_peer_id])
-            eqa = eoa_mapping.get(resolved_peer_id, "?")
-        except Exception as e:
-            eqa = f"Error: {str(e)}"
-
-    # Pretty emoji-format status block
-    status_label = "✅ Running" if "✅" in api_status else "❌ Stopped"
-    last_txt = f"{last_activity_min}m" if last_activity_min is not None else "—"
-    join_txt = joining_round_num or "—"
-    start_txt = starting_round_str or "—"
-    pretty_lines = [
-        f"🌐 Status → {status_label} ({last_txt})",
-        f"🐝 Round → {join_txt} | {start_txt}",
-        f"🎁 Reward → {reward}    🏆 Win → {score}",
-        f"🧩 Peer → {resolved_peer_name or '—'}",
-        f"🆔 ID → {resolved_peer_id or '—'}",
-        f"🏦 EQA → {eqa}",
-    ]
-    text = "\n".join(pretty_lines)
-    # Wrap in HTML <pre> for tap-to-copy in Telegram
-    return f"<pre>{html.escape(text)}</pre>"
-
-    return f"{api_status}\n\n{log_status}\n" + "\n".join(peer_info_lines)
+    bot.send_message(chat_id, message)
 
 @bot.message_handler(commands=['start'])
 def start_handler(message):
@@ -798,6 +244,54 @@ def who_handler(message):
     if message.from_user.id == USER_ID:
         bot.send_message(message.chat.id, f"👤 This is your VPN Bot")
 
+@bot.message_handler(commands=['rounds'])
+def rounds_handler(message):
+    if message.from_user.id != USER_ID:
+        return
+    try:
+        parts = message.text.split()
+        hours = float(parts[1]) if len(parts) > 1 else 24
+    except ValueError:
+        bot.send_message(message.chat.id, "⚠️ Usage: /rounds [hours]")
+        return
+    if not dispatcher.submit("rounds", send_round_history, message, hours):
+        bot.send_message(message.chat.id, "⏳ Round history is already on its way.")
+
+def send_round_history(message, hours):
+    try:
+        summary = get_round_history().summary(hours)
+        bot.send_message(message.chat.id, f"<pre>{html.escape(format_round_history(summary))}</pre>", parse_mode="HTML")
+    except Exception as e:
+        logging.error(f"Error in rounds_handler: {str(e)}")
+        bot.send_message(message.chat.id, "❌ Error getting round history. Check logs.")
+
+@bot.message_handler(commands=['queue'])
+def queue_handler(message):
+    if message.from_user.id != USER_ID:
+        return
+    text = f"{format_metrics(dispatcher.metrics())}\n📤 Outbox: {outbox.pending()} pending, {outbox.stats}"
+    bot.send_message(message.chat.id, f"<pre>{html.escape(text)}</pre>", parse_mode="HTML")
+
+@bot.message_handler(commands=['dashboard'])
+def dashboard_handler(message):
+    if message.from_user.id != USER_ID:
+        return
+    parts = message.text.split()
+    turn_on = parts[1].lower() != "off" if len(parts) > 1 else not dashboard.is_live(message.chat.id)
+    if not turn_on:
+        dashboard.disable(message.chat.id)
+        bot.send_message(message.chat.id, "📌 Live dashboard off.")
+    elif not dispatcher.submit("gensyn_status", enable_dashboard, message.chat.id):
+        bot.send_message(message.chat.id, "⏳ Status is already on its way.")
+
+def enable_dashboard(chat_id):
+    snapshot = core.get_status_snapshot()
+    missing = snapshot.missing()
+    if missing:
+        snapshot.refresh(missing)
+    snapshot.start()
+    dashboard.enable(chat_id, snapshot.snapshot())
+
 @bot.message_handler(func=lambda message: message.from_user.id == USER_ID)
 def handle_credentials(message):
     global login_in_progress
@@ -820,6 +314,10 @@ def handle_credentials(message):
 def gensyn_status_handler(message):
     if message.from_user.id != USER_ID:
         return
+    if not dispatcher.submit("gensyn_status", send_gensyn_status, message):
+        bot.send_message(message.chat.id, "⏳ Status is already on its way.")
+
+def send_gensyn_status(message):
     try:
         status_message = format_gensyn_status()
         bot.send_message(message.chat.id, status_message, parse_mode="HTML")
@@ -827,12 +325,39 @@ def gensyn_status_handler(message):
         logging.error(f"Error in gensyn_status_handler: {str(e)}")
         bot.send_message(message.chat.id, "❌ Error getting status. Check logs.")
 
+def answer_callback(call, text):
+    try:
+        bot.answer_callback_query(call.id, text)
+    except Exception as e:
+        logging.error(f"Error answering callback: {str(e)}")
+
 @bot.callback_query_handler(func=lambda call: True)
 def callback_query(call):
+    """
+    Acknowledge the button at once and run the action on the dispatcher, so
+    polling threads are never held by slow work
+    """
+    global last_action_time
+    user_id = call.from_user.id
+    now = time.time()
+    
+    if user_id != USER_ID:
+        return
+        
+    if user_id in last_action_time and (now - last_action_time[user_id]) < COOLDOWN_SECONDS:
+        return
+    last_action_time[user_id] = now
+
+    action = ACTION_GROUPS.get(call.data, call.data)
+    if dispatcher.submit(action, handle_callback, call):
+        answer_callback(call, "⏳ Working…")
+    else:
+        answer_callback(call, "⏳ Already in progress, please wait.")
+
+def handle_callback(call):
     global waiting_for_pem
     global login_in_progress
     global tmate_running
-    global last_action_time
     global monitor_active
     global monitor_thread
     # Ensure globals are initialized
@@ -844,20 +369,11 @@ def callback_query(call):
         monitor_thread
     except NameError:
         monitor_thread = None
-    user_id = call.from_user.id
-    now = time.time()
-    
-    if user_id != USER_ID:
-        return
-        
-    if user_id in last_action_time and (now - last_action_time[user_id]) < COOLDOWN_SECONDS:
-        return
-    last_action_time[user_id] = now
 
     try:
         if call.data == 'check_ip':
             try:
-                ip = requests.get('https://api.ipify.org', timeout=10).text.strip()
+                ip = http_client.get('https://api.ipify.org', timeout=10, retries=0).text.strip()
                 bot.send_message(call.message.chat.id, f"🌐 Current Public IP: {ip}")
             except Exception as e:
                 bot.send_message(call.message.chat.id, f"❌ Error checking IP: {str(e)}")
@@ -931,11 +447,7 @@ def callback_query(call):
                 bot.send_message(call.message.chat.id, f"❌ Failed to stop monitor: {str(e)}")
                 
         elif call.data == 'start_gensyn':
-            backup_exists = (
-                os.path.exists(os.path.join(SYNC_BACKUP_DIR, "userData.json")) and
-                os.path.exists(os.path.join(SYNC_BACKUP_DIR, "userApiKey.json"))
-            )
-            if backup_exists:
+            if core.sync_backup_exists():
                 markup = InlineKeyboardMarkup()
                 markup.add(
                     InlineKeyboardButton("Run with Login Backup", callback_data="start_gensyn_with_backup"),
@@ -962,17 +474,15 @@ def callback_query(call):
             setup_autostart(call.message.chat.id)
             
         elif call.data == 'kill_gensyn':
-            try:
-                subprocess.run("screen -S gensyn -X quit", shell=True, check=True)
-                bot.send_message(call.message.chat.id, "🛑 gensyn screen killed (and all child processes).")
-            except subprocess.CalledProcessError as e:
-                bot.send_message(call.message.chat.id, f"❌ Failed to kill gensyn screen: {str(e)}")
+            ok, message = core.kill_gensyn_session()
+            bot.send_message(call.message.chat.id, message)
         
         elif call.data == 'install_gensyn':
+            # Runs on the dispatcher worker, so the install_gensyn limit holds until it finishes
             try:
-                threading.Thread(target=install_gensyn, args=(call.message.chat.id,), daemon=True).start()
+                install_gensyn(call.message.chat.id)
             except Exception as e:
-                bot.send_message(call.message.chat.id, f"❌ Failed to start install: {str(e)}")
+                bot.send_message(call.message.chat.id, f"❌ Install failed: {str(e)}")
                 
         elif call.data == 'toggle_tmate':
             if not tmate_running:
@@ -1020,10 +530,10 @@ def callback_query(call):
             bot.send_message(call.message.chat.id, "Choose update type:", reply_markup=markup)
             
         elif call.data == "gensyn_soft_update":
-            threading.Thread(target=gensyn_soft_update, args=(call.message.chat.id,), daemon=True).start()
+            gensyn_soft_update(call.message.chat.id)
             
         elif call.data == "gensyn_hard_update":
-            threading.Thread(target=gensyn_hard_update, args=(call.message.chat.id,), daemon=True).start()
+            gensyn_hard_update(call.message.chat.id)
             
         elif call.data == "bot_update":
             try:
@@ -1071,6 +581,11 @@ def handle_document(message):
     global waiting_for_pem
     if message.from_user.id != USER_ID or not waiting_for_pem:
         return
+    if not dispatcher.submit("lifecycle", save_uploaded_pem, message):
+        bot.send_message(message.chat.id, "⏳ Another start or stop is in progress, send the file again shortly.")
+
+def save_uploaded_pem(message):
+    global waiting_for_pem
     try:
         file_info = bot.get_file(message.document.file_id)
         file_data = bot.download_file(file_info.file_path)
@@ -1089,96 +604,228 @@ def check_login_timeout(chat_id):
     time.sleep(300)
     if login_in_progress:
         login_in_progress = False
-        bot.send_message(chat_id, "⏰ Login timed out. Please try again.")
+        outbox.send(chat_id, "⏰ Login timed out. Please try again.")
+
+LOG_STALE_AFTER = timedelta(minutes=240)
+API_CHECK_INTERVAL = 60
+IP_CHECK_INTERVAL = 60
+# Short delays that coalesce bursts of filesystem events
+LOG_POLL_DELAY = 0.5
+WANDB_NOTIFY_DELAY = 1.0
 
 def monitor():
-    previous_ip = ''
-    previous_alive = None
+    """
+    Event-driven monitor: inotify watches on the Gensyn log, the WANDB
+    directory and the userData files, plus timers for the checks that
+    have to poll (localhost:3000 and the public IP).
+    """
+    state = {
+        "previous_ip": '',
+        "previous_alive": None,
+        "previous_localhost_alive": None,
+        "last_stale_sent_ts": None,
+    }
     wandb_file_cache = set()
     wandb_folder_cache = set()
-    last_stale_sent_ts = None
-    previous_localhost_alive = None
+    wandb_pending = {"folders": [], "files": []}
+
+    loop = EventLoop(poll_interval=60)
+    log_follower = get_log_follower()
+    initial_log = log_follower.get_status() or {}
+    log_state = {"latest_ts": initial_log.get("timestamp")}
+
+    # 1. API status (one probe of localhost:3000 serves both checks)
+    def check_api():
+        probe = core.probe_gensyn_api()
+        alive = probe["alive"]
+        localhost_alive = probe["signed_out"]
+
+        # The live dashboard already shows the API state
+        quiet = dashboard.is_live(USER_ID)
+        if not quiet and state["previous_localhost_alive"] is not None and localhost_alive != state["previous_localhost_alive"]:
+            status = '✅ Online' if localhost_alive else '❌ Offline'
+            outbox.send(USER_ID, f"⚠️ localhost:3000 status changed: {status}", coalesce=True)
+        state["previous_localhost_alive"] = localhost_alive
+
+        if not quiet and state["previous_alive"] is not None and alive != state["previous_alive"]:
+            status = '✅ Online' if alive else '❌ Offline'
+            outbox.send(USER_ID, f"⚠️ API status changed: {status}", coalesce=True)
+        state["previous_alive"] = alive
+
+    # 2. IP change
+    def check_ip():
+        try:
+            ip = http_client.get('https://api.ipify.org', timeout=10, retries=0).text.strip()
+        except Exception:
+            ip = "Unknown"
 
+        if ip and ip != state["previous_ip"]:
+            outbox.send(USER_ID, f"⚠️ IP changed: {ip}", coalesce=True)
+            state["previous_ip"] = ip
 
-    while True:
-        try:
-            # 1. API status (using check_gensyn_api)
-            alive = check_gensyn_api()
+    # 3. Log freshness: a deadline at latest entry + 4h instead of a polling check
+    def check_log_stale():
+        latest_ts = log_state["latest_ts"]
+        if not latest_ts:
+            return
+        remaining = (latest_ts + LOG_STALE_AFTER - datetime.utcnow()).total_seconds()
+        if remaining > 0:
+            state["last_stale_sent_ts"] = None
+            loop.call_later("log_stale", remaining, check_log_stale)
+        elif state["last_stale_sent_ts"] != latest_ts:
+            outbox.send(
+                USER_ID,
+                f"❗ No new Gensyn log entry since {latest_ts.strftime('%Y-%m-%d %H:%M:%S')} UTC (>4h ago)!",
+                coalesce=True
+            )
+            state["last_stale_sent_ts"] = latest_ts
 
-            # 1a. Localhost:3000 status (direct monitoring)
-            try:
-                response = requests.get("http://localhost:3000", timeout=3)
-                localhost_alive = "Sign in to Gensyn" in response.text
-            except Exception:
-                localhost_alive = False
+    def on_log_event(event):
+        if not log_state["latest_ts"] or event["timestamp"] > log_state["latest_ts"]:
+            log_state["latest_ts"] = event["timestamp"]
+            check_log_stale()
 
-            if previous_localhost_alive is not None and localhost_alive != previous_localhost_alive:
-                status = '✅ Online' if localhost_alive else '❌ Offline'
-                bot.send_message(USER_ID, f"⚠️ localhost:3000 status changed: {status}")
-            previous_localhost_alive = localhost_alive
+    log_follower.subscribe(on_log_event)
 
-            # 2. IP change
-            try:
-                ip = requests.get('https://api.ipify.org', timeout=10).text.strip()
-            except:
-                ip = "Unknown"
-
-            if ip and ip != previous_ip:
-                bot.send_message(USER_ID, f"⚠️ IP changed: {ip}")
-                previous_ip = ip
-
-            if previous_alive is not None and alive != previous_alive:
-                status = '✅ Online' if alive else '❌ Offline'
-                bot.send_message(USER_ID, f"⚠️ API status changed: {status}")
-            previous_alive = alive
-
-            # 3. Log freshness
-            log_data = get_gensyn_log_status()
-            if log_data and log_data.get("timestamp"):
-                latest_ts = log_data["timestamp"]
-                if (datetime.utcnow() - latest_ts > timedelta(minutes=240)):
-                    if not last_stale_sent_ts or last_stale_sent_ts != latest_ts:
-                        bot.send_message(
-                            USER_ID,
-                            f"❗ No new Gensyn log entry since {latest_ts.strftime('%Y-%m-%d %H:%M:%S')} UTC (>4h ago)!"
-                        )
-                        last_stale_sent_ts = latest_ts
-                else:
-                    last_stale_sent_ts = None
-
-            # 4. WANDB monitoring - simplified
-            new_folders = []
-            new_files = []
-            if os.path.exists(WANDB_LOG_DIR):
-                for root, dirs, files in os.walk(WANDB_LOG_DIR):
-                    for d in dirs:
-                        folder_path = os.path.join(root, d)
-                        if folder_path not in wandb_folder_cache:
-                            wandb_folder_cache.add(folder_path)
-                            new_folders.append(folder_path)
-                    for name in files:
-                        path = os.path.join(root, name)
-                        if path not in wandb_file_cache:
-                            wandb_file_cache.add(path)
-                            new_files.append(path)
-
-                if new_folders or new_files:
-                    markup = InlineKeyboardMarkup()
-                    markup.add(
-                        InlineKeyboardButton("Yes", callback_data="wandb_send_log"),
-                        InlineKeyboardButton("No", callback_data="wandb_skip_log")
-                    )
-                    bot.send_message(USER_ID, "🪄 WANDB detected. Want log file?", reply_markup=markup)
+    # 4. WANDB monitoring
+    def notify_wandb():
+        if wandb_pending["folders"] or wandb_pending["files"]:
+            wandb_pending["folders"].clear()
+            wandb_pending["files"].clear()
+            markup = InlineKeyboardMarkup()
+            markup.add(
+                InlineKeyboardButton("Yes", callback_data="wandb_send_log"),
+                InlineKeyboardButton("No", callback_data="wandb_skip_log")
+            )
+            outbox.send(USER_ID, "🪄 WANDB detected. Want log file?", reply_markup=markup.to_json())
+
+    def record_wandb(path, is_dir):
+        cache, pending = (wandb_folder_cache, "folders") if is_dir else (wandb_file_cache, "files")
+        if path in cache:
+            return
+        cache.add(path)
+        wandb_pending[pending].append(path)
+        loop.call_later("wandb_notify", WANDB_NOTIFY_DELAY, notify_wandb, replace=False)
+        if is_dir:
+            loop.watch(path, IN_CREATE | IN_MOVED_TO, on_wandb)
+
+    def scan_wandb(top):
+        if not os.path.exists(top):
+            return
+        for root, dirs, files in os.walk(top):
+            for d in dirs:
+                record_wandb(os.path.join(root, d), True)
+            for name in files:
+                record_wandb(os.path.join(root, name), False)
+
+    def on_wandb(path, name, mask):
+        if name is None:
+            scan_wandb(path)
+            return
+        full_path = os.path.join(path, name)
+        is_dir = bool(mask & IN_ISDIR)
+        record_wandb(full_path, is_dir)
+        if is_dir:
+            # Files may have been created before the new watch was added
+            scan_wandb(full_path)
+
+    # Gensyn log: coalesce write bursts into one incremental follower poll
+    log_dir, log_name = os.path.split(GENSYN_LOG_PATH)
+
+    def on_log_dir(path, name, mask):
+        if name is None or name == log_name:
+            loop.call_later("log_poll", LOG_POLL_DELAY, log_follower.poll, replace=False)
+        if name and os.path.join(path, name) == WANDB_LOG_DIR:
+            # WANDB directory just appeared; start watching it right away
+            loop.rescan()
+
+    # userData files: back up on change instead of copying every minute
+    user_data_dir = os.path.dirname(USER_DATA_PATH)
+    user_data_names = {os.path.basename(USER_DATA_PATH), os.path.basename(USER_APIKEY_PATH)}
+
+    def on_user_data(path, name, mask):
+        if name is None or name in user_data_names:
+            backup_user_data_sync()
+
+    loop.watch(log_dir, IN_MODIFY | IN_CREATE | IN_MOVED_TO, on_log_dir)
+    loop.watch(WANDB_LOG_DIR, IN_CREATE | IN_MOVED_TO, on_wandb)
+    loop.watch(user_data_dir, IN_CLOSE_WRITE | IN_MOVED_TO, on_user_data)
+    scan_wandb(WANDB_LOG_DIR)
+    backup_user_data_sync()
+    check_log_stale()
 
-            time.sleep(60)
+    loop.add_timer("api", API_CHECK_INTERVAL, check_api)
+    loop.add_timer("ip", IP_CHECK_INTERVAL, check_ip)
 
+    while True:
+        try:
+            loop.run()
         except Exception as e:
             logging.error("Monitor error: %s", str(e))
             time.sleep(10)
 
-threading.Thread(target=monitor, daemon=True).start()
+TELEGRAM_WEBHOOK_SECRET_FILE = "/root/gensyn-bot/telegram_webhook_secret"
+
+def telegram_webhook_secret(path=TELEGRAM_WEBHOOK_SECRET_FILE):
+    """Secret for the Telegram webhook URL, generated once and kept across restarts"""
+    import secrets
+
+    try:
+        with open(path) as f:
+            secret = f.read().strip()
+        if secret:
+            return secret
+    except FileNotFoundError:
+        pass
+    secret = secrets.token_urlsafe(32)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(secret)
+    return secret
+
+def run_telegram_webhook():
+    """
+    Receive updates through the webhook bot's own server instead of long
+    polling, so one process and one port serve Telegram and n8n commands;
+    webhook_bot.py must not be started separately in this mode.
+    TELEGRAM_WEBHOOK_URL is the public HTTPS URL (e.g. a cloudflared
+    tunnel) that reaches the webhook server port.
+    """
+    from webhook_bot import WebhookBot
+
+    webhook_bot = WebhookBot()
+    secret = telegram_webhook_secret()
+    webhook_bot.webhook_server.enable_telegram_webhook(bot, secret)
+    url = f"{config['TELEGRAM_WEBHOOK_URL'].rstrip('/')}/telegram/{secret}"
+    # The secret is stable, so the webhook only needs setting when the URL changed
+    if bot.get_webhook_info().url != url:
+        bot.set_webhook(url=url, secret_token=secret)
+    webhook_bot.run()
+
+def main():
+    core.ensure_directories()
+    dispatcher.start()
+    outbox.start()
+    dashboard.restore()
+    core.get_status_snapshot().subscribe(dashboard.on_snapshot)
+    core.get_status_snapshot().start()
+    threading.Thread(target=monitor, daemon=True).start()
+    # Index swarm_launcher.log rounds in the background so /rounds only reads the index
+    get_round_history()
+    # Build the chain client now so the first status tap does not pay for it
+    threading.Thread(target=get_chain_client().warm_up, daemon=True).start()
+
+    try:
+        if config.get("TELEGRAM_MODE") == "webhook":
+            run_telegram_webhook()
+        else:
+            # A webhook left over from webhook mode would make getUpdates fail
+            bot.remove_webhook()
+            bot.infinity_polling()
+    except Exception as e:
+        logging.error("Bot crashed: %s", str(e))
+
 
-try:
-    bot.infinity_polling()
-except Exception as e:
-    logging.error("Bot crashed: %s", str(e))
+if __name__ == "__main__":
+    main()
@@ -93,9 +93,15 @@ def setup_telegram_bot():
     token = input("Bot Token: ")
     user_id = input("Your Telegram User ID: ")
 
+    webhook_url = input("Public HTTPS URL for Telegram webhook mode (leave blank for polling): ").strip()
+
     with open(BOT_CONFIG, "w") as f:
         f.write(f"BOT_TOKEN={token}\n")
         f.write(f"USER_ID={user_id}\n")
+        if webhook_url:
+            f.write("TELEGRAM_MODE=webhook\n")
+            f.write(f"TELEGRAM_WEBHOOK_URL={webhook_url}\n")
+            print("ℹ️  In webhook mode bot.py also runs the webhook bot; don't start it separately.")
 
     if not os.path.exists(BOT_PATH):
         os.system("cp ./default_bot.py /root/gensyn-bot/bot.py")
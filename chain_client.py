@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Shared chain client for Gensyn Bot
+Creates the Web3 provider and contracts once per process on first use, over
+the pooled HTTP session, instead of rebuilding them on every status render
+"""
+
+import time
+import json
+import logging
+import argparse
+import threading
+from typing import Dict, Any, Optional, List, Tuple
+
+import http_client
+
+ALCHEMY_RPC = "https://gensyn-testnet.g.alchemy.com/v2/TD5tr7mo4VfXlSaolFlSr3tL70br2M9J"
+RPC_TIMEOUT = 10
+
+GET_EOA_ABI = [
+    {
+        "name": "getEoa",
+        "type": "function",
+        "stateMutability": "view",
+        "inputs": [{"name": "peerIds", "type": "string[]"}],
+        "outputs": [{"name": "", "type": "address[]"}]
+    }
+]
+
+logger = logging.getLogger(__name__)
+
+
+class ChainClient:
+    """
+    One Web3 instance per RPC endpoint, built lazily and kept warm. The
+    provider sends JSON-RPC over the shared http_client session, so the TLS
+    connection to the endpoint is reused across status renders, reward
+    reports and threads. Contracts are built once per address.
+    warmup records what the first use cost, in milliseconds.
+    """
+
+    def __init__(self, rpc_url: str = ALCHEMY_RPC, timeout: float = RPC_TIMEOUT, session=None):
+        self.rpc_url = rpc_url
+        self.timeout = timeout
+        self._session = session
+        self._lock = threading.Lock()
+        self._w3 = None
+        self._contracts: Dict[Tuple[str, str], Any] = {}
+        self.warmup: Dict[str, float] = {}
+
+    @property
+    def w3(self):
+        with self._lock:
+            if self._w3 is None:
+                start = time.perf_counter()
+                from web3 import Web3
+                imported = time.perf_counter()
+                session = self._session or http_client.get_http_client().session
+                provider_kwargs = {"request_kwargs": {"timeout": self.timeout}, "session": session}
+                try:
+                    # Newer web3 can remember eth_chainId instead of asking around every call
+                    provider = Web3.HTTPProvider(self.rpc_url, cache_allowed_requests=True, **provider_kwargs)
+                except TypeError:
+                    provider = Web3.HTTPProvider(self.rpc_url, **provider_kwargs)
+                self._w3 = Web3(provider)
+                built = time.perf_counter()
+                self.warmup["import_ms"] = (imported - start) * 1000
+                self.warmup["build_ms"] = (built - imported) * 1000
+            return self._w3
+
+    def contract(self, address: str, abi: Optional[List[Dict[str, Any]]] = None):
+        """Return the contract at address, building it on first use"""
+        abi = GET_EOA_ABI if abi is None else abi
+        key = (address.lower(), json.dumps(abi, sort_keys=True))
+        w3 = self.w3
+        with self._lock:
+            contract = self._contracts.get(key)
+            if contract is None:
+                contract = w3.eth.contract(address=w3.to_checksum_address(address), abi=abi)
+                self._contracts[key] = contract
+            return contract
+
+    def warm_up(self) -> Dict[str, float]:
+        """Import web3, build the provider and open the RPC connection; returns the timings"""
+        w3 = self.w3
+        if "first_call_ms" not in self.warmup:
+            start = time.perf_counter()
+            w3.eth.chain_id
+            self.warmup["first_call_ms"] = (time.perf_counter() - start) * 1000
+            self.warmup["total_ms"] = sum(self.warmup.values())
+            logger.info(
+                f"Chain client warm-up for {self.rpc_url.split('/v2/')[0]}: "
+                + ", ".join(f"{k}={v:.1f}" for k, v in self.warmup.items())
+            )
+        return dict(self.warmup)
+
+
+_clients: Dict[str, ChainClient] = {}
+_clients_lock = threading.Lock()
+_rpc_override: Optional[str] = None
+
+
+def use_rpc_url(rpc_url: Optional[str]):
+    """
+    Point every chain client at another endpoint, e.g. a local stand-in
+    JSON-RPC server; None restores the configured endpoints.
+    """
+    global _rpc_override
+    with _clients_lock:
+        _rpc_override = rpc_url
+        _clients.clear()
+
+
+def get_chain_client(rpc_url: str = ALCHEMY_RPC) -> ChainClient:
+    """Return the process-wide chain client for an RPC endpoint"""
+    with _clients_lock:
+        rpc_url = _rpc_override or rpc_url
+        client = _clients.get(rpc_url)
+        if client is None:
+            client = ChainClient(rpc_url)
+            _clients[rpc_url] = client
+        return client
+
+
+def get_contract(address: str, abi: Optional[List[Dict[str, Any]]] = None, rpc_url: str = ALCHEMY_RPC):
+    """Return the shared contract object for address"""
+    return get_chain_client(rpc_url).contract(address, abi)
+
+
+def main():
+    """Main function for checking the configured RPC"""
+    parser = argparse.ArgumentParser(description="Shared chain client")
+    parser.add_argument("--warm-up", action="store_true", help="Warm up against the configured RPC and print the timings")
+    args = parser.parse_args()
+
+    if args.warm_up:
+        print(json.dumps(get_chain_client().warm_up(), indent=2))
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Command executor pools for the Gensyn Bot webhook server
+Sync command handlers run on separate bounded pools by command class, so
+fast reads like check_ip never queue behind a slow log read or a node restart,
+and a saturated pool rejects work instead of queueing without limit.
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional
+
+# Pool sizes by command class: worker threads and commands allowed to wait for one
+COMMAND_POOLS = {
+    "fast": {"workers": 4, "queue": 16},
+    "slow": {"workers": 2, "queue": 4},
+    # Commands that change node or VPN state run one at a time, in order
+    "exclusive": {"workers": 1, "queue": 2},
+}
+# Commands not listed here run on the slow pool
+COMMAND_CLASSES = {
+    "check_ip": "fast",
+    "gensyn_status": "fast",
+    "round_history": "fast",
+    "get_backup_files": "fast",
+    "toggle_monitoring": "fast",
+    "toggle_reward_monitoring": "fast",
+    "get_logs": "slow",
+    "system_status": "slow",
+    "vpn_on": "exclusive",
+    "vpn_off": "exclusive",
+    "start_gensyn": "exclusive",
+    "kill_gensyn": "exclusive",
+    "set_autostart": "exclusive",
+    "restart_services": "exclusive",
+}
+DEFAULT_COMMAND_CLASS = "slow"
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturated(Exception):
+    """Raised when a pool already has as many commands running and waiting as it allows"""
+
+    def __init__(self, pool: str, retry_after: int = 1):
+        super().__init__(f"The {pool} command pool is busy, retry later")
+        self.pool = pool
+        self.retry_after = retry_after
+
+
+class CommandPool:
+    """
+    A fixed number of worker threads; up to queue_limit more commands may
+    wait for a worker. run() raises PoolSaturated at once when the pool is
+    full, and records how long commands waited and ran.
+    """
+
+    def __init__(self, name: str, workers: int, queue_limit: int):
+        self.name = name
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"command-{name}")
+        self._lock = threading.Lock()
+        self.stats = {
+            "queued": 0, "running": 0, "completed": 0, "errors": 0, "rejected": 0,
+            "wait_ms_avg": 0.0, "wait_ms_max": 0.0, "run_ms_avg": 0.0, "run_ms_max": 0.0,
+        }
+
+    async def run(self, handler: Callable, *args) -> Any:
+        with self._lock:
+            if self.stats["queued"] + self.stats["running"] >= self.workers + self.queue_limit:
+                self.stats["rejected"] += 1
+                raise PoolSaturated(self.name)
+            self.stats["queued"] += 1
+        queued_at = time.perf_counter()
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._executor, self._call, handler, args, queued_at)
+
+    def _call(self, handler: Callable, args: tuple, queued_at: float) -> Any:
+        started = time.perf_counter()
+        with self._lock:
+            self.stats["queued"] -= 1
+            self.stats["running"] += 1
+        failed = True
+        try:
+            result = handler(*args)
+            failed = False
+            return result
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self.stats["running"] -= 1
+                self.stats["errors" if failed else "completed"] += 1
+                self._record((started - queued_at) * 1000, (finished - started) * 1000)
+
+    def _record(self, wait_ms: float, run_ms: float):
+        count = self.stats["completed"] + self.stats["errors"]
+        self.stats["wait_ms_avg"] += (wait_ms - self.stats["wait_ms_avg"]) / count
+        self.stats["run_ms_avg"] += (run_ms - self.stats["run_ms_avg"]) / count
+        self.stats["wait_ms_max"] = max(self.stats["wait_ms_max"], wait_ms)
+        self.stats["run_ms_max"] = max(self.stats["run_ms_max"], run_ms)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"workers": self.workers, "queue_limit": self.queue_limit, **self.stats}
+
+
+class CommandPools:
+    """
+    One CommandPool per command class. pools and classes override the
+    defaults above, e.g. from the command_pools and command_classes keys
+    of the webhook config.
+    """
+
+    def __init__(self, pools: Optional[Dict[str, Dict[str, int]]] = None,
+                 classes: Optional[Dict[str, str]] = None):
+        settings = {name: dict(pool) for name, pool in COMMAND_POOLS.items()}
+        for name, pool in (pools or {}).items():
+            settings.setdefault(name, {"workers": 1, "queue": 0}).update(pool)
+        self.pools = {
+            name: CommandPool(name, int(pool["workers"]), int(pool["queue"]))
+            for name, pool in settings.items()
+        }
+        self.classes = {**COMMAND_CLASSES, **(classes or {})}
+
+    def pool_for(self, command: str) -> CommandPool:
+        name = self.classes.get(command, DEFAULT_COMMAND_CLASS)
+        return self.pools.get(name) or self.pools[DEFAULT_COMMAND_CLASS]
+
+    def set_class(self, command: str, command_class: str):
+        if command_class not in self.pools:
+            raise ValueError(f"Unknown command pool: {command_class}")
+        self.classes[command] = command_class
+
+    async def run(self, command: str, handler: Callable, *args) -> Any:
+        return await self.pool_for(command).run(handler, *args)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {name: pool.metrics() for name, pool in self.pools.items()}
+
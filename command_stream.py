@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Streaming command runner for Gensyn Bot
+Runs long shell commands (apt, git clone, downloads) reading their output
+as it is produced: recent lines are kept in a bounded ring buffer, the full
+output is spooled to a log file, and throttled progress is published while
+the command runs instead of nothing until it exits.
+"""
+
+import os
+import re
+import time
+import signal
+import threading
+import logging
+import subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence, Tuple
+
+COMMAND_LOG_DIR = "/root/gensyn-bot/command-logs"
+# Lines of output kept in memory per command; the rest is only in the log file
+TAIL_LINES = 200
+# Seconds between progress callbacks while a command is producing output
+PROGRESS_INTERVAL = 3.0
+# Lines passed to each progress callback
+PROGRESS_LINES = 5
+# Log files kept in COMMAND_LOG_DIR; older ones are removed
+KEEP_LOGS = 50
+
+logger = logging.getLogger(__name__)
+
+# Progress callbacks receive the most recent output lines
+Progress = Callable[[List[str]], None]
+# A chain is a list of (cmd, desc) steps that must run in order
+Chain = Sequence[Tuple[str, str]]
+
+
+def _log_path(name: str, log_dir: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", name).strip("-").lower() or "command"
+    return os.path.join(log_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}.log")
+
+
+def _prune_logs(log_dir: str, keep: int = KEEP_LOGS):
+    try:
+        logs = sorted(name for name in os.listdir(log_dir) if name.endswith(".log"))
+        for name in logs[:-keep]:
+            os.remove(os.path.join(log_dir, name))
+    except Exception as e:
+        logger.error(f"Error pruning command logs: {str(e)}")
+
+
+def _kill_on_cancel(process: subprocess.Popen, cancel: threading.Event, cancelled: list):
+    while process.poll() is None:
+        if cancel.wait(0.5):
+            cancelled.append(True)
+            try:
+                # The command runs in its own session, so this also stops its children
+                os.killpg(process.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+            return
+
+
+def stream_command(cmd: str, progress: Optional[Progress] = None, log_name: Optional[str] = None,
+                   log_dir: str = COMMAND_LOG_DIR, interval: float = PROGRESS_INTERVAL,
+                   tail_lines: int = TAIL_LINES, cancel: Optional[threading.Event] = None) -> Tuple[bool, str, Optional[str]]:
+    """
+    Run a shell command with stdout and stderr merged, reading its output
+    line by line. Returns (ok, tail, log_path): tail is the last
+    tail_lines lines, log_path the file holding the full output when
+    log_name was given. progress, if given, is called with the latest
+    PROGRESS_LINES lines at most every interval seconds. Setting cancel
+    terminates the command and everything it started.
+    """
+    if cancel is not None and cancel.is_set():
+        return False, "Cancelled", None
+    tail = deque(maxlen=tail_lines)
+    log_path = None
+    log_file = None
+    try:
+        if log_name:
+            os.makedirs(log_dir, exist_ok=True)
+            _prune_logs(log_dir, KEEP_LOGS - 1)
+            log_path = _log_path(log_name, log_dir)
+            log_file = open(log_path, "w", buffering=1)
+            log_file.write(f"$ {cmd}\n")
+
+        process = subprocess.Popen(
+            cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            stdin=subprocess.DEVNULL, text=True, errors="replace", bufsize=1, start_new_session=True,
+        )
+        cancelled = []
+        if cancel is not None:
+            threading.Thread(target=_kill_on_cancel, args=(process, cancel, cancelled), daemon=True).start()
+        next_progress = time.monotonic() + interval
+        # Text mode turns the carriage returns of progress bars into line breaks
+        for line in process.stdout:
+            line = line.rstrip("\n")
+            tail.append(line)
+            if log_file:
+                log_file.write(line + "\n")
+            if progress and line.strip() and time.monotonic() >= next_progress:
+                next_progress = time.monotonic() + interval
+                try:
+                    progress([entry for entry in list(tail)[-PROGRESS_LINES:] if entry.strip()])
+                except Exception as e:
+                    logger.error(f"Command progress callback error: {str(e)}")
+        returncode = process.wait()
+        if cancelled:
+            tail.append("Cancelled")
+        if log_file:
+            log_file.write(f"[{'cancelled' if cancelled else f'exit {returncode}'}]\n")
+        return returncode == 0 and not cancelled, "\n".join(tail), log_path
+    except Exception as e:
+        return False, "\n".join([*tail, str(e)]), log_path
+    finally:
+        if log_file:
+            log_file.close()
+
+
+def run_chains(chains: Sequence[Chain], run: Callable[[str, str], Tuple[bool, str]]) -> Tuple[bool, str, str]:
+    """
+    Run independent chains of steps in parallel, the steps of each chain in
+    order, with run(cmd, desc) -> (ok, output). Every chain runs to its end
+    or first failure; returns (ok, failed desc, failed output) with the
+    first failure in chain order.
+    """
+    def run_chain(chain):
+        for cmd, desc in chain:
+            ok, out = run(cmd, desc)
+            if not ok:
+                return False, desc, out
+        return True, "", ""
+
+    if len(chains) == 1:
+        return run_chain(chains[0])
+    with ThreadPoolExecutor(max_workers=len(chains), thread_name_prefix="command-chain") as executor:
+        results = list(executor.map(run_chain, chains))
+    for result in results:
+        if not result[0]:
+            return result
+    return True, "", ""
+
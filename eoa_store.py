@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Persistent EOA store for Gensyn Bot
+Remembers the EOA address of every peer id per contract, so getEoa is only
+called for peers that are new or whose entry has expired
+"""
+
+import os
+import json
+import time
+import fcntl
+import logging
+import argparse
+import threading
+from typing import Dict, Any, List
+
+EOA_STORE_FILE = "/root/gensyn-bot/eoa_store.json"
+
+# EOA addresses almost never change once registered
+EOA_TTL = 7 * 24 * 3600
+# Unregistered peers resolve to the zero address; ask again sooner
+UNREGISTERED_TTL = 3600
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+logger = logging.getLogger(__name__)
+
+
+class EoaStore:
+    """
+    JSON file of {contract: {peer_id: {"eoa", "fetched_at"}}} shared by every
+    module and process. lookup() answers known ids from the store and
+    batches only missing or expired ids into a single getEoa call. Writes
+    go through a temp file and os.replace under a file lock, so readers
+    never see a partial file and concurrent writers do not lose entries.
+    """
+
+    def __init__(self, path: str = EOA_STORE_FILE, ttl: float = EOA_TTL,
+                 unregistered_ttl: float = UNREGISTERED_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.unregistered_ttl = unregistered_ttl
+        self._lock = threading.Lock()
+        self._data: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._mtime = None
+        self.stats = {"hits": 0, "fetched": 0, "rpc_calls": 0, "rpc_errors": 0}
+
+    # Persistence
+    def _reload(self):
+        """Re-read the file if another process changed it"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            self._data, self._mtime = {}, None
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            self._data = data.get("contracts", {})
+            self._mtime = mtime
+        except Exception as e:
+            logger.error(f"Error loading EOA store: {str(e)}")
+
+    def _save(self, contract_address: str, entries: Dict[str, Dict[str, Any]]):
+        """Merge new entries into the file atomically"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(f"{self.path}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._mtime = None
+            self._reload()
+            self._data.setdefault(contract_address, {}).update(entries)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"contracts": self._data}, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self._mtime = os.stat(self.path).st_mtime_ns
+
+    def _expired(self, entry: Dict[str, Any], now: float) -> bool:
+        ttl = self.unregistered_ttl if entry.get("eoa") == ZERO_ADDRESS else self.ttl
+        return now - entry.get("fetched_at", 0) >= ttl
+
+    def entries(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Return a copy of everything stored, keyed by contract then peer id"""
+        with self._lock:
+            self._reload()
+            return json.loads(json.dumps(self._data))
+
+    # Lookups
+    def lookup(self, contract, peer_ids: List[str]) -> Dict[str, str]:
+        """
+        Return {peer_id: eoa} for the given ids using a web3 contract exposing
+        getEoa. Ids the chain could not resolve map to "Error: ..." unless an
+        older entry exists, in which case the older entry is returned.
+        """
+        peer_ids = [pid for pid in dict.fromkeys(peer_ids) if pid]
+        contract_address = str(contract.address)
+        now = time.time()
+        with self._lock:
+            self._reload()
+            known = dict(self._data.get(contract_address, {}))
+
+        missing = [pid for pid in peer_ids if pid not in known or self._expired(known[pid], now)]
+        mapping = {pid: known[pid]["eoa"] for pid in peer_ids if pid in known}
+        self.stats["hits"] += len(peer_ids) - len(missing)
+        if not missing:
+            return mapping
+
+        try:
+            self.stats["rpc_calls"] += 1
+            addresses = contract.functions.getEoa(missing).call()
+        except Exception as e:
+            self.stats["rpc_errors"] += 1
+            logger.error(f"Error fetching EOA mapping: {str(e)}")
+            for pid in missing:
+                mapping.setdefault(pid, f"Error: {str(e)}")
+            return mapping
+
+        entries = {pid: {"eoa": eoa, "fetched_at": now} for pid, eoa in zip(missing, addresses)}
+        self.stats["fetched"] += len(entries)
+        mapping.update({pid: entry["eoa"] for pid, entry in entries.items()})
+        with self._lock:
+            try:
+                self._save(contract_address, entries)
+            except Exception as e:
+                logger.error(f"Error saving EOA store: {str(e)}")
+        return mapping
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_eoa_store() -> EoaStore:
+    """Return the process-wide EOA store"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = EoaStore()
+        return _store
+
+
+def fetch_eoa_mapping(contract, peer_ids: List[str]) -> Dict[str, str]:
+    """Resolve peer ids to EOA addresses through the shared store"""
+    return get_eoa_store().lookup(contract, peer_ids)
+
+
+def main():
+    """Main function for inspecting the store"""
+    parser = argparse.ArgumentParser(description="Persistent EOA store")
+    parser.add_argument("--show", action="store_true", help="Print the stored EOA entries")
+    args = parser.parse_args()
+
+    if args.show:
+        print(json.dumps(get_eoa_store().entries(), indent=2))
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
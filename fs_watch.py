@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Filesystem watch event loop for Gensyn Bot
+Wakes on inotify events and on timers instead of sleep-polling, falling back
+to periodic polling where inotify is unavailable
+"""
+
+import os
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+from typing import Dict, Any, Optional, Callable, List, Tuple
+
+# inotify event masks (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+logger = logging.getLogger(__name__)
+
+# callback(watched_path, name, mask); name is None when the loop is polling
+# instead of watching, meaning "something may have changed, rescan"
+WatchCallback = Callable[[str, Optional[str], int], None]
+
+
+class InotifyWatcher:
+    """Thin ctypes wrapper around the Linux inotify API"""
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify not available")
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def fileno(self) -> int:
+        return self.fd
+
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def remove_watch(self, wd: int):
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self, timeout: Optional[float]) -> List[Tuple[int, int, Optional[str]]]:
+        """Wait up to timeout seconds and return (wd, mask, name) tuples"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        events = []
+        while True:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not buf:
+                break
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(buf):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(buf, offset)
+                offset += _EVENT_HEADER.size
+                name = buf[offset:offset + length].rstrip(b"\0").decode("utf-8", "replace") or None
+                offset += length
+                events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+class EventLoop:
+    """
+    Single-threaded loop that runs watch callbacks on inotify events and
+    timer callbacks when they fall due, sleeping in between. Paths that do
+    not exist yet are retried every poll_interval seconds. Without inotify,
+    every watch callback is called with name=None every poll_interval.
+    """
+
+    def __init__(self, poll_interval: float = 60.0):
+        self.poll_interval = poll_interval
+        try:
+            self.watcher = InotifyWatcher()
+        except (OSError, AttributeError) as e:
+            logger.warning(f"inotify unavailable, falling back to polling: {str(e)}")
+            self.watcher = None
+        self._watches: Dict[int, Tuple[str, int, WatchCallback]] = {}
+        self._wanted: Dict[str, Tuple[int, WatchCallback]] = {}
+        self._timers: Dict[str, List[Any]] = {}
+        self._deadlines: Dict[str, Tuple[float, Callable[[], None]]] = {}
+        self._next_rescan = time.monotonic() + poll_interval
+        self.running = False
+
+    @property
+    def event_driven(self) -> bool:
+        return self.watcher is not None
+
+    # Watches
+    def watch(self, path: str, mask: int, callback: WatchCallback) -> bool:
+        """Watch a file or directory; returns False if it has to be retried later"""
+        self._wanted[path] = (mask, callback)
+        return self._try_add(path)
+
+    def _try_add(self, path: str) -> bool:
+        if self.watcher is None:
+            return os.path.exists(path)
+        mask, callback = self._wanted[path]
+        try:
+            wd = self.watcher.add_watch(path, mask)
+        except OSError:
+            return False
+        self._watches[wd] = (path, mask, callback)
+        return True
+
+    def rescan(self):
+        """Add watches for paths that appeared, or poll everything without inotify"""
+        if self.watcher is None:
+            for path, (_mask, callback) in list(self._wanted.items()):
+                self._call(callback, path, None, 0)
+            return
+        watched = {path for path, _mask, _cb in self._watches.values()}
+        for path in list(self._wanted):
+            if path not in watched and self._try_add(path):
+                _mask, callback = self._wanted[path]
+                # Catch up on whatever happened before the watch existed
+                self._call(callback, path, None, 0)
+
+    # Timers
+    def add_timer(self, name: str, interval: float, callback: Callable[[], None], run_now: bool = True):
+        """Run callback every interval seconds"""
+        first = time.monotonic() if run_now else time.monotonic() + interval
+        self._timers[name] = [interval, first, callback]
+
+    def call_later(self, name: str, delay: float, callback: Callable[[], None], replace: bool = True):
+        """Run callback once after delay seconds; with replace=False an already pending call is kept"""
+        if not replace and name in self._deadlines:
+            return
+        self._deadlines[name] = (time.monotonic() + max(delay, 0), callback)
+
+    def cancel(self, name: str):
+        self._deadlines.pop(name, None)
+
+    def _next_timeout(self) -> float:
+        due = [self._next_rescan]
+        due.extend(timer[1] for timer in self._timers.values())
+        due.extend(deadline for deadline, _cb in self._deadlines.values())
+        return max(0.0, min(due) - time.monotonic())
+
+    def _run_due(self):
+        now = time.monotonic()
+        for timer in list(self._timers.values()):
+            if timer[1] <= now:
+                timer[1] = now + timer[0]
+                self._call(timer[2])
+        for name, (deadline, callback) in list(self._deadlines.items()):
+            if deadline <= now and self._deadlines.get(name, (None,))[0] == deadline:
+                del self._deadlines[name]
+                self._call(callback)
+        if self._next_rescan <= now:
+            self._next_rescan = now + self.poll_interval
+            self.rescan()
+
+    @staticmethod
+    def _call(callback, *args):
+        try:
+            callback(*args)
+        except Exception as e:
+            logger.error(f"Event loop callback error: {str(e)}")
+
+    def run_once(self):
+        """Run due timers, then block until the next event or deadline"""
+        self._run_due()
+        timeout = self._next_timeout()
+        if self.watcher is None:
+            time.sleep(timeout)
+            return
+        for wd, mask, name in self.watcher.read_events(timeout):
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped; let every watch rescan
+                for path, _mask, callback in list(self._watches.values()):
+                    self._call(callback, path, None, mask)
+                continue
+            entry = self._watches.get(wd)
+            if not entry:
+                continue
+            path, _mask, callback = entry
+            if mask & IN_IGNORED:
+                # Watched path was removed; it will be re-added when it reappears
+                del self._watches[wd]
+                continue
+            self._call(callback, path, name, mask)
+
+    def run(self, should_continue: Callable[[], bool] = lambda: True):
+        self.running = True
+        try:
+            while self.running and should_continue():
+                self.run_once()
+        finally:
+            self.running = False
+
+    def stop(self):
+        self.running = False
+
+    def close(self):
+        if self.watcher is not None:
+            self.watcher.close()
@@ -0,0 +1,689 @@
+#!/usr/bin/env python3
+"""
+Core library for Gensyn Bot
+Log parsing, status, backup and node-lifecycle functions shared by the
+Telegram bot and the webhook processes. Importing this module does no work:
+no config is read, no threads are started, and web3 is only imported when
+a status render first needs it.
+"""
+
+import os
+import re
+import html
+import json
+import shutil
+import time
+import logging
+import threading
+import subprocess
+from datetime import datetime
+from typing import Dict, Callable, Optional, Tuple
+
+import http_client
+from peer_cache import get_peer_cache, split_peer_id
+from log_follower import get_log_follower
+from status_snapshot import StatusSnapshot, format_age
+from system_sampler import SystemSampler
+from command_stream import stream_command, run_chains
+
+BOT_CONFIG = "/root/bot_config.env"
+WG_CONFIG_PATH = "/etc/wireguard/wg0.conf"
+SWARM_PEM_PATH = "/root/rl-swarm/swarm.pem"
+USER_DATA_PATH = "/root/rl-swarm/modal-login/temp-data/userData.json"
+USER_APIKEY_PATH = "/root/rl-swarm/modal-login/temp-data/userApiKey.json"
+BACKUP_USERDATA_DIR = "/root/gensyn-bot/backup-userdata"
+SYNC_BACKUP_DIR = "/root/gensyn-bot/sync-backup"
+GENSYN_LOG_PATH = "/root/rl-swarm/logs/swarm_launcher.log"
+WANDB_LOG_DIR = "/root/rl-swarm/logs/wandb"
+
+# Cache file for discovered peer info
+PEER_CACHE_FILE = "/root/gensyn-bot/peer_info.json"
+
+# Contract queried for the EQA address shown in the status message
+STATUS_CONTRACT_ADDRESS = "0xFaD7C5e93f28257429569B854151A1B8DCD404c2"
+
+# Seconds between background refreshes of each status section
+STATUS_INTERVALS = {
+    "api": 15,
+    "log": 5,
+    "peer": 300,
+    "stats": 60,
+    "eoa": 3600,
+}
+
+BACKUP_FILES = [SWARM_PEM_PATH, USER_DATA_PATH, USER_APIKEY_PATH]
+
+GENSYN_SCREEN_CMD = "screen -dmS gensyn bash -c 'python3 -m venv .venv && source .venv/bin/activate && ./run_rl_swarm.sh'"
+
+# Held while the node is started, stopped or updated, so lifecycle changes
+# from Telegram, webhook commands and jobs never interleave
+LIFECYCLE_LOCK = threading.RLock()
+
+# start_gensyn_session outcomes
+START_STARTED = "started"
+START_ALREADY_RUNNING = "already_running"
+START_MISSING_PEM = "missing_pem"
+START_ERROR = "error"
+
+GENSYN_API_URL = "http://localhost:3000"
+# Any of these in the localhost:3000 page means the Gensyn service is up
+GENSYN_API_INDICATORS = ["sign in to gensyn", "gensyn", "__next_error__", "<!doctype html>", "<html"]
+
+CLOUDFLARED_DEB = "cloudflared-linux-amd64.deb"
+
+# Install stages run in order; the chains of steps within a stage are
+# independent and run in parallel. apt steps hold the dpkg lock, so only
+# downloads and repository setup share a stage.
+INSTALL_STAGES = [
+    [[("sudo apt update", "APT update")]],
+    [[("sudo apt install -y python3 python3-venv python3-pip curl wget screen git lsof gnupg", "Base packages")]],
+    [
+        [("curl -fsSL https://deb.nodesource.com/setup_20.x | sudo -E bash -", "NodeSource setup")],
+        [
+            ("curl -sS https://dl.yarnpkg.com/debian/pubkey.gpg | gpg --dearmor | sudo tee /usr/share/keyrings/yarn-archive-keyring.gpg > /dev/null", "Yarn key"),
+            ("echo \"deb [signed-by=/usr/share/keyrings/yarn-archive-keyring.gpg] https://dl.yarnpkg.com/debian stable main\" | sudo tee /etc/apt/sources.list.d/yarn.list > /dev/null", "Yarn repo"),
+        ],
+        [(f"wget -q -O {CLOUDFLARED_DEB} https://github.com/cloudflare/cloudflared/releases/latest/download/{CLOUDFLARED_DEB}", "Download cloudflared")],
+    ],
+    [[("sudo apt update", "APT update (node, yarn)")]],
+    [[("sudo apt install -y nodejs", "Install Node.js")]],
+    [[("sudo apt install -y tmate", "Install tmate")]],
+    [[("sudo apt install -y yarn", "Install yarn")]],
+]
+
+# Progress callbacks receive one human-readable line per step
+Notify = Callable[[str], None]
+
+
+def _ignore(text: str):
+    pass
+
+
+def load_bot_config(path: str = BOT_CONFIG) -> Dict[str, str]:
+    """Read KEY=VALUE pairs from the bot config file"""
+    with open(path) as f:
+        lines = f.read().strip().split("\n")
+    return dict(line.split("=", 1) for line in lines if "=" in line)
+
+
+def ensure_directories():
+    """Create the backup directories"""
+    os.makedirs(BACKUP_USERDATA_DIR, exist_ok=True)
+    os.makedirs(SYNC_BACKUP_DIR, exist_ok=True)
+
+
+# Peer info
+def parse_peer_info_from_swarm_log(log_path=GENSYN_LOG_PATH):
+    """
+    Parse peer name and peer id from swarm_launcher.log lines, e.g.:
+    [ts][...][INFO] - Hello ... [<peer name>] ... [<peer id>]
+    Returns dict {"peer_name": str, "peer_id": str} or None
+    """
+    try:
+        return get_log_follower(log_path).get_peer_info()
+    except Exception:
+        return None
+
+def write_cached_peer_info(info, cache_path=PEER_CACHE_FILE):
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        payload = {
+            **info,
+            "updated_at": datetime.utcnow().isoformat() + "Z"
+        }
+        with open(cache_path, "w") as f:
+            json.dump(payload, f, indent=2)
+        return True
+    except Exception:
+        return False
+
+def get_cached_peer_info(cache_path=PEER_CACHE_FILE):
+    """
+    Return cached peer info if present; otherwise parse the log and cache it.
+    """
+    try:
+        if os.path.exists(cache_path):
+            with open(cache_path) as f:
+                data = json.load(f)
+                if isinstance(data, dict) and (data.get("peer_name") or data.get("peer_id")):
+                    return data
+        info = parse_peer_info_from_swarm_log()
+        if info:
+            write_cached_peer_info(info, cache_path)
+            return {**info}
+        return None
+    except Exception:
+        return None
+
+
+# VPN
+def start_vpn():
+    try:
+        subprocess.run(['wg-quick', 'up', 'wg0'], check=True)
+        return True, "✅ VPN enabled"
+    except subprocess.CalledProcessError as e:
+        if "already exists" in str(e):
+            return True, "⚠️ VPN already enabled"
+        return False, f"❌ VPN failed to start: {str(e)}"
+
+def stop_vpn():
+    try:
+        subprocess.run(['wg-quick', 'down', 'wg0'], check=True)
+        return True, "❌ VPN disabled"
+    except subprocess.CalledProcessError as e:
+        if "is not a WireGuard interface" in str(e):
+            return True, "⚠️ VPN already disabled"
+        return False, f"❌ VPN failed to stop: {str(e)}"
+
+
+# Backups
+def backup_user_data_sync():
+    try:
+        os.makedirs(SYNC_BACKUP_DIR, exist_ok=True)
+        for src, name in [(USER_DATA_PATH, "userData.json"), (USER_APIKEY_PATH, "userApiKey.json")]:
+            dst = os.path.join(SYNC_BACKUP_DIR, name)
+            if os.path.exists(src):
+                shutil.copy(src, dst)
+        return True
+    except Exception as e:
+        logging.error(f"Sync backup error: {str(e)}")
+        return False
+
+def backup_user_data():
+    try:
+        os.makedirs(BACKUP_USERDATA_DIR, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        for path, name in [(USER_DATA_PATH, "userData.json"), (USER_APIKEY_PATH, "userApiKey.json")]:
+            if os.path.exists(path):
+                backup_file = f"{name.split('.')[0]}_{timestamp}.json"
+                shutil.copy(path, os.path.join(BACKUP_USERDATA_DIR, backup_file))
+                latest_file = f"{name.split('.')[0]}_latest.json"
+                shutil.copy(path, os.path.join(BACKUP_USERDATA_DIR, latest_file))
+        return True
+    except Exception as e:
+        logging.error(f"Backup error: {str(e)}")
+        return False
+
+def restore_sync_backup():
+    """Copy the synced login files back into rl-swarm; returns True if any were found"""
+    backup_found = False
+    for file in ["userData.json", "userApiKey.json"]:
+        backup_path = os.path.join(SYNC_BACKUP_DIR, file)
+        target_path = USER_DATA_PATH if file == "userData.json" else USER_APIKEY_PATH
+        if os.path.exists(backup_path):
+            shutil.copy(backup_path, target_path)
+            backup_found = True
+    return backup_found
+
+def sync_backup_exists():
+    return (
+        os.path.exists(os.path.join(SYNC_BACKUP_DIR, "userData.json")) and
+        os.path.exists(os.path.join(SYNC_BACKUP_DIR, "userApiKey.json"))
+    )
+
+
+# Commands
+def run_command(cmd, desc=None, progress: Optional[Notify] = None, cancel: Optional[threading.Event] = None):
+    """
+    Run a shell command; returns (ok, output) with the last lines of
+    output. With desc the full output is also spooled to a log file, and
+    progress, if given, receives the step and its latest output lines
+    while the command runs. Setting cancel stops the command.
+    """
+    on_output = None
+    if progress:
+        on_output = lambda lines: progress(f"⏳ {desc or cmd}...\n" + "\n".join(lines))
+    ok, out, log_path = stream_command(cmd, on_output, log_name=desc, cancel=cancel)
+    if not ok and log_path:
+        logging.error(f"{desc} failed, full output in {log_path}")
+    return ok, out
+
+
+# Node lifecycle
+def check_gensyn_screen_running():
+    """
+    Check if the 'gensyn' screen session is running
+    Returns True if running, False otherwise
+    """
+    try:
+        result = subprocess.run("screen -ls", shell=True, capture_output=True, text=True)
+        return "gensyn" in result.stdout
+    except Exception as e:
+        logging.error(f"Error checking screen: {str(e)}")
+        return False
+
+def kill_gensyn_session():
+    """Quit the gensyn screen and everything running in it; returns (ok, message)"""
+    try:
+        with LIFECYCLE_LOCK:
+            subprocess.run("screen -S gensyn -X quit", shell=True, check=True)
+        return True, "🛑 gensyn screen killed (and all child processes)."
+    except subprocess.CalledProcessError as e:
+        return False, f"❌ Failed to kill gensyn screen: {str(e)}"
+
+def start_gensyn_session(use_sync_backup=True, fresh_start=False) -> Tuple[str, str]:
+    """
+    Start rl-swarm in the 'gensyn' screen session.
+    Returns (outcome, message) where outcome is one of the START_* values;
+    START_MISSING_PEM means swarm.pem has to be uploaded or a fresh node started.
+    """
+    with LIFECYCLE_LOCK:
+        return _start_gensyn_session(use_sync_backup, fresh_start)
+
+def _start_gensyn_session(use_sync_backup, fresh_start):
+    if check_gensyn_screen_running():
+        return START_ALREADY_RUNNING, "⚠️ Gensyn already running!"
+
+    # A fresh start skips the swarm.pem check; rl-swarm generates a new one
+    if not fresh_start and not os.path.exists(SWARM_PEM_PATH):
+        return START_MISSING_PEM, "❗ swarm.pem not found!"
+
+    try:
+        backup_found = restore_sync_backup() if use_sync_backup else False
+        subprocess.run(f"cd /root/rl-swarm; {GENSYN_SCREEN_CMD}", shell=True, check=True)
+    except (subprocess.CalledProcessError, OSError) as e:
+        if fresh_start:
+            return START_ERROR, f"❌ Error starting fresh node: {str(e)}"
+        return START_ERROR, f"❌ Error starting Gensyn: {str(e)}"
+
+    if fresh_start:
+        return START_STARTED, "✅ Fresh node started in screen session 'gensyn'. swarm.pem will be generated."
+    if backup_found:
+        return START_STARTED, "✅ Login backup restored. Gensyn started in screen session 'gensyn'"
+    return START_STARTED, "✅ Gensyn started in screen session 'gensyn'"
+
+def setup_autostart():
+    """Install and start the gensyn systemd service; returns (ok, message)"""
+    try:
+        os.makedirs(BACKUP_USERDATA_DIR, exist_ok=True)
+        if os.path.exists(USER_DATA_PATH):
+            shutil.copy(USER_DATA_PATH, os.path.join(BACKUP_USERDATA_DIR, "userData.json"))
+        if os.path.exists(USER_APIKEY_PATH):
+            shutil.copy(USER_APIKEY_PATH, os.path.join(BACKUP_USERDATA_DIR, "userApiKey.json"))
+        service_content = f"""[Unit]
+Description=Gensyn Swarm Service
+After=network.target
+
+[Service]
+Type=forking
+User=root
+WorkingDirectory=/root/rl-swarm
+ExecStartPre=/usr/bin/wg-quick up wg0
+ExecStartPre=/bin/bash -c 'mkdir -p /root/rl-swarm/modal-login/temp-data && cp {BACKUP_USERDATA_DIR}/userData.json {USER_DATA_PATH} || true'
+ExecStartPre=/bin/bash -c 'cp {BACKUP_USERDATA_DIR}/userApiKey.json {USER_APIKEY_PATH} || true'
+ExecStart=/bin/bash -c 'screen -dmS gensyn bash -c "python3 -m venv .venv && source .venv/bin/activate && ./run_rl_swarm.sh"'
+ExecStopPost=/usr/bin/wg-quick down wg0
+Restart=always
+RestartSec=30
+
+[Install]
+WantedBy=multi-user.target
+"""
+        with open("/etc/systemd/system/gensyn.service", "w") as f:
+            f.write(service_content)
+        subprocess.run(["systemctl", "daemon-reload"], check=True)
+        subprocess.run(["systemctl", "enable", "gensyn.service"], check=True)
+        subprocess.run(["systemctl", "start", "gensyn.service"], check=True)
+        return True, "✅ Auto-start configured! Gensyn and VPN will now start on boot."
+    except Exception as e:
+        return False, f"❌ Error setting up auto-start: {str(e)}"
+
+def install_gensyn(notify: Notify = _ignore, progress: Optional[Notify] = None,
+                   cancel: Optional[threading.Event] = None):
+    """
+    Install the Gensyn prerequisites, rl-swarm and cloudflared; returns True
+    on success. notify gets one plain-text line per step, progress the
+    running step's latest output. Setting cancel stops the running step and
+    skips the rest.
+    """
+    def run_step(cmd, desc):
+        notify(f"⏳ {desc}...")
+        return run_command(cmd, desc, progress, cancel)
+
+    try:
+        notify("🍳 Installing Gensyn prerequisites... This may take a while.")
+        for stage in INSTALL_STAGES:
+            ok, desc, out = run_chains(stage, run_step)
+            if not ok:
+                notify(f"❌ {desc} failed: {out[-1000:]}")
+                return False
+
+        # Clone rl-swarm only if missing
+        if os.path.exists("/root/rl-swarm"):
+            notify("ℹ️ /root/rl-swarm already exists. Skipping clone.")
+        else:
+            notify("⏳ Cloning rl-swarm...")
+            ok, out = run_command("cd /root && git clone --progress https://github.com/shairkhan2/rl-swarm.git rl-swarm", "Clone rl-swarm", progress, cancel)
+            if not ok:
+                notify(f"❌ Clone rl-swarm failed: {out[-1000:]}")
+                return False
+
+        # Cloudflared
+        # Downloaded in parallel with the repository setup above
+        notify("⏳ Installing cloudflared...")
+        ok, out = run_command(f"sudo dpkg -i {CLOUDFLARED_DEB} || sudo apt -f install -y", "Install cloudflared", progress, cancel)
+        if not ok:
+            notify(f"❌ Install cloudflared failed: {out[-1000:]}")
+            return False
+        try:
+            os.remove(CLOUDFLARED_DEB)
+        except Exception:
+            pass
+
+        notify("✅ Install complete.")
+        return True
+    except Exception as e:
+        notify(f"❌ Install failed: {str(e)}")
+        return False
+
+def _stop_for_update(notify: Notify):
+    notify("Backup done. Killing Gensyn...")
+    # Only kill gensyn screen if present
+    if check_gensyn_screen_running():
+        subprocess.run("screen -S gensyn -X quit", shell=True, check=True)
+        notify("Gensyn killed.")
+    else:
+        notify("No gensyn screen found. Proceeding with update...")
+
+def gensyn_soft_update(notify: Notify = _ignore, progress: Optional[Notify] = None,
+                       cancel: Optional[threading.Event] = None):
+    """
+    Back up login files, pull rl-swarm main and restart the node. A
+    cancelled pull counts as a failed update: the backup is restored and
+    the node restarted.
+    """
+    with LIFECYCLE_LOCK:
+        return _gensyn_soft_update(notify, progress, cancel)
+
+def _gensyn_soft_update(notify, progress, cancel):
+    backup_paths = [
+        USER_DATA_PATH,
+        USER_APIKEY_PATH
+    ]
+    backup_dir = "/root/gensyn-bot/soft-update-backup"
+    os.makedirs(backup_dir, exist_ok=True)
+    try:
+        for path in backup_paths:
+            if os.path.exists(path):
+                shutil.copy(path, backup_dir)
+        _stop_for_update(notify)
+        notify("Updating (git switch/reset/clean/pull)...")
+        update_cmd = (
+            "cd /root/rl-swarm && "
+            "git switch main && "
+            "git reset --hard && "
+            "git clean -fd && "
+            "git pull origin main"
+        )
+        ok, out = run_command(update_cmd, "Soft update", progress, cancel)
+        if ok:
+            msg = "Update done. Restarting node..."
+        else:
+            msg = "Update failed. Restoring backup..."
+        for filename in ["userData.json", "userApiKey.json"]:
+            src = os.path.join(backup_dir, filename)
+            dst = f"/root/rl-swarm/modal-login/temp-data/{filename}"
+            if os.path.exists(src):
+                shutil.copy(src, dst)
+        subprocess.run(f"cd /root/rl-swarm && {GENSYN_SCREEN_CMD}", shell=True)
+        notify(f"{msg}\nGensyn started.")
+        return ok
+    except Exception as e:
+        notify(f"Soft update failed: {str(e)}")
+        return False
+
+def gensyn_hard_update(notify: Notify = _ignore, progress: Optional[Notify] = None,
+                       cancel: Optional[threading.Event] = None):
+    """Back up keys and login files, re-clone rl-swarm and restart the node"""
+    with LIFECYCLE_LOCK:
+        return _gensyn_hard_update(notify, progress, cancel)
+
+def _gensyn_hard_update(notify, progress, cancel):
+    backup_paths = [
+        SWARM_PEM_PATH,
+        USER_DATA_PATH,
+        USER_APIKEY_PATH
+    ]
+    backup_dir = "/root/gensyn-bot/hard-update-backup"
+    os.makedirs(backup_dir, exist_ok=True)
+    try:
+        for path in backup_paths:
+            if os.path.exists(path):
+                shutil.copy(path, backup_dir)
+        _stop_for_update(notify)
+        notify("Cloning repo...")
+        subprocess.run("rm -rf /root/rl-swarm", shell=True)
+        ok, out = run_command("git clone --progress https://github.com/shairkhan2/rl-swarm.git /root/rl-swarm", "Hard update", progress, cancel)
+        if ok:
+            msg = "Hard update done. Restoring backup..."
+        else:
+            msg = "Hard update failed. Restoring backup to last state."
+        for filename in ["swarm.pem", "userData.json", "userApiKey.json"]:
+            src = os.path.join(backup_dir, filename)
+            dst = f"/root/rl-swarm/{filename}" if filename == "swarm.pem" else f"/root/rl-swarm/modal-login/temp-data/{filename}"
+            if os.path.exists(src):
+                shutil.copy(src, dst)
+        subprocess.run(f"cd /root/rl-swarm && {GENSYN_SCREEN_CMD}", shell=True)
+        notify(f"{msg}\nGensyn started.")
+        return ok
+    except Exception as e:
+        notify(f"Hard update failed: {str(e)}")
+        return False
+
+
+# Status
+def get_gensyn_log_status(log_path=GENSYN_LOG_PATH):
+    """
+    Returns the latest activity in the Gensyn log as a dictionary with
+    timestamp, joining, and starting round info, or None.
+    Backed by the shared log follower, so only newly appended bytes are parsed.
+    """
+    try:
+        return get_log_follower(log_path).get_status()
+    except Exception as e:
+        logging.error(f"Error reading Gensyn log: {str(e)}")
+        return None
+
+def parse_api_response(status_code, text):
+    """
+    Classify a localhost:3000 response: alive when it serves a Gensyn page,
+    signed_out when that page is the Gensyn sign-in page
+    """
+    lowered = text.lower()
+    return {
+        "alive": status_code == 200 and any(indicator in lowered for indicator in GENSYN_API_INDICATORS),
+        "signed_out": "Sign in to Gensyn" in text,
+    }
+
+def probe_gensyn_api(timeout=3):
+    """One request to localhost:3000, classified by parse_api_response"""
+    try:
+        response = http_client.get(GENSYN_API_URL, timeout=timeout, retries=0)
+    except Exception as e:
+        logging.debug(f"Gensyn API probe failed: {str(e)}")
+        return {"alive": False, "signed_out": False}
+    return parse_api_response(response.status_code, response.text)
+
+def check_gensyn_api():
+    """
+    Checks if the Gensyn API is online by making a request to localhost:3000
+    Returns True if online, False otherwise
+    """
+    return probe_gensyn_api(timeout=5)["alive"]
+
+def check_vpn_active():
+    """True if the wg0 interface is up"""
+    result = subprocess.run("wg show", shell=True, capture_output=True, text=True)
+    return result.returncode == 0 and "wg0" in result.stdout
+
+def get_system_metrics(cpu_interval=None):
+    import psutil
+
+    return {
+        "cpu_percent": psutil.cpu_percent(interval=cpu_interval),
+        "memory_percent": psutil.virtual_memory().percent,
+        "disk_percent": psutil.disk_usage('/').percent
+    }
+
+
+# Status sections, refreshed in the background by the status snapshot
+def collect_api_section(sections):
+    """localhost:3000 shows the Gensyn sign-in page while the node is up"""
+    return {"running": probe_gensyn_api()["signed_out"]}
+
+def collect_log_section(sections):
+    return get_gensyn_log_status() or {}
+
+def collect_peer_section(sections):
+    """Peer name and id from the cached log info, resolving the id by name if needed"""
+    info = get_cached_peer_info() or {}
+    peer_name = info.get("peer_name") or None
+    peer_id = info.get("peer_id") or None
+    if not peer_id and peer_name:
+        name_data = get_peer_cache().get_by_name(peer_name)
+        # Split composite id in format "wallet|ipfsPeerId"
+        peer_id = split_peer_id(name_data.get("peerId"))
+        peer_name = name_data.get("peerName") or peer_name
+    return {"peer_name": peer_name, "peer_id": peer_id}
+
+def _section_peer_id(sections):
+    return (sections.get("peer", {}).get("value") or {}).get("peer_id")
+
+def collect_stats_section(sections):
+    peer_id = _section_peer_id(sections)
+    if not peer_id:
+        return {}
+    stats = get_peer_cache().get_by_id(peer_id)
+    return {
+        "reward": stats.get("reward", "?"),
+        "score": stats.get("score", "?"),
+        "online": stats.get("online", False),
+    }
+
+def collect_eoa_section(sections):
+    from chain_client import get_contract
+    from eoa_store import fetch_eoa_mapping
+
+    peer_id = _section_peer_id(sections)
+    if not peer_id:
+        return {}
+    contract = get_contract(STATUS_CONTRACT_ADDRESS)
+    eoa = fetch_eoa_mapping(contract, [peer_id]).get(peer_id, "?")
+    if eoa.startswith("Error:"):
+        raise RuntimeError(eoa)
+    return {"eoa": eoa}
+
+STATUS_COLLECTORS = {
+    "api": collect_api_section,
+    "log": collect_log_section,
+    "peer": collect_peer_section,
+    "stats": collect_stats_section,
+    "eoa": collect_eoa_section,
+}
+
+_status_snapshot = None
+_status_snapshot_lock = threading.Lock()
+
+def get_status_snapshot() -> StatusSnapshot:
+    """Return the process-wide status snapshot; call start() on it to refresh in the background"""
+    global _status_snapshot
+    with _status_snapshot_lock:
+        if _status_snapshot is None:
+            _status_snapshot = StatusSnapshot(
+                STATUS_COLLECTORS, STATUS_INTERVALS,
+                depends={"stats": "peer", "eoa": "peer"},
+            )
+        return _status_snapshot
+
+# Service probes run by the system sampler for the detailed webhook /status
+SYSTEM_PROBES = {
+    "gensyn_running": lambda sections: check_gensyn_screen_running(),
+    "vpn_status": lambda sections: "connected" if check_vpn_active() else "disconnected",
+    "api_status": lambda sections: "running" if collect_api_section(sections)["running"] else "stopped",
+}
+
+_system_sampler = None
+_system_sampler_lock = threading.Lock()
+
+def get_system_sampler() -> SystemSampler:
+    """Return the process-wide system sampler; call start() on it to sample in the background"""
+    global _system_sampler
+    with _system_sampler_lock:
+        if _system_sampler is None:
+            _system_sampler = SystemSampler(SYSTEM_PROBES)
+        return _system_sampler
+
+def render_gensyn_status(snapshot, with_ages=True):
+    """
+    Render the status message from a snapshot. Every line ends with the age
+    of the section it came from; sections whose last refresh failed or timed
+    out are marked stale and show their last known value, or unknown.
+    Without ages only stale and unknown markers are shown, so the text only
+    changes when the status does.
+    """
+    now = datetime.utcnow()
+    wall_now = time.time()
+    sections = snapshot["sections"]
+
+    def section(name):
+        entry = sections.get(name, {})
+        value = entry.get("value") or {}
+        if "value" not in entry:
+            # Timed out or failed before it was ever collected
+            age = "unknown" if entry.get("error") else "—"
+        else:
+            age = format_age(wall_now - entry["updated_at"]) if with_ages else ""
+            if entry.get("error"):
+                age = f"{age} stale".strip()
+        return value, f"  · {age}" if age else ""
+
+    api, api_age = section("api")
+    log_data, log_age = section("log")
+    peer, peer_age = section("peer")
+    stats, stats_age = section("stats")
+    eoa, eoa_age = section("eoa")
+
+    last_activity_min = None
+    joining_round_num = None
+    starting_round_str = None
+    if log_data.get("timestamp"):
+        last_activity_min = int((now - log_data["timestamp"]).total_seconds() / 60)
+    if log_data.get("joining"):
+        m = re.search(r"(\d+)", log_data["joining"])
+        joining_round_num = m.group(1) if m else log_data["joining"]
+    if log_data.get("starting"):
+        m = re.search(r"(\d+/\d+)", log_data["starting"])
+        starting_round_str = m.group(1) if m else log_data["starting"]
+
+    if not api:
+        status_label = "? Unknown"
+    else:
+        status_label = "✅ Running" if api.get("running") else "❌ Stopped"
+    last_txt = f"{last_activity_min}m" if last_activity_min is not None else "—"
+    join_txt = joining_round_num or "—"
+    start_txt = starting_round_str or "—"
+    pretty_lines = [
+        f"🌐 Status → {status_label} ({last_txt}){api_age}",
+        f"🐝 Round → {join_txt} | {start_txt}{log_age}",
+        f"🎁 Reward → {stats.get('reward', '?')}    🏆 Win → {stats.get('score', '?')}{stats_age}",
+        f"🧩 Peer → {peer.get('peer_name') or '—'}{peer_age}",
+        f"🆔 ID → {peer.get('peer_id') or '—'}",
+        f"🏦 EQA → {eoa.get('eoa', '?')}{eoa_age}",
+    ]
+    text = "\n".join(pretty_lines)
+    # Wrap in HTML <pre> for tap-to-copy in Telegram
+    return f"<pre>{html.escape(text)}</pre>"
+
+def format_gensyn_status():
+    """
+    Formats the complete Gensyn status message, including peer info and EQA address.
+    Renders from the background status snapshot; only sections that were
+    never collected are fetched in the caller, concurrently under the
+    snapshot deadline, on the first call.
+    """
+    snapshot = get_status_snapshot()
+    missing = snapshot.missing()
+    if missing:
+        snapshot.refresh(missing)
+    snapshot.start()
+    return render_gensyn_status(snapshot.snapshot())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Delta-encoded heartbeats for Gensyn Bot
+Heartbeats carry a sequence number and, between periodic full snapshots,
+only the fields that changed since the previous heartbeat, so static parts
+like the capabilities and command list are not resent every 5 minutes.
+"""
+
+import copy
+import uuid
+import threading
+from typing import Dict, Any, List, Tuple
+
+# A full snapshot every this many heartbeats (hourly at one per 5 minutes)
+FULL_SNAPSHOT_EVERY = 12
+
+# A removed field, as the keys leading to it
+Path = List[str]
+
+
+def diff_state(old: Dict[str, Any], new: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Path]]:
+    """(changed, removed): changed holds new or changed leaves, nested like the state"""
+    changed: Dict[str, Any] = {}
+    removed: List[Path] = []
+    for key, value in new.items():
+        if key not in old:
+            changed[key] = value
+        elif isinstance(value, dict) and isinstance(old[key], dict):
+            nested_changed, nested_removed = diff_state(old[key], value)
+            if nested_changed:
+                changed[key] = nested_changed
+            removed.extend([key, *path] for path in nested_removed)
+        elif value != old[key]:
+            changed[key] = value
+    removed.extend([key] for key in old if key not in new)
+    return changed, removed
+
+
+def merge_state(state: Dict[str, Any], changed: Dict[str, Any], removed: List[Path] = ()) -> Dict[str, Any]:
+    """Apply a diff to state in place and return it"""
+    for key, value in changed.items():
+        if isinstance(value, dict) and isinstance(state.get(key), dict):
+            merge_state(state[key], value)
+        else:
+            state[key] = copy.deepcopy(value)
+    for path in removed:
+        target = state
+        for key in path[:-1]:
+            target = target.get(key) if isinstance(target, dict) else None
+        if isinstance(target, dict):
+            target.pop(path[-1], None)
+    return state
+
+
+class HeartbeatEncoder:
+    """
+    Turns successive heartbeat states into heartbeat data. A full snapshot
+    is {"stream", "seq", "full": true, **state}, the same fields as before
+    plus the sequence. A delta is {"stream", "seq", "full": false,
+    "base_seq", "changed", "removed"} against the previous heartbeat;
+    webhook payloads are delivered in order, so the receiver has applied
+    that one first. stream is new for each process, so a restarted bot
+    starts again with a full snapshot. request_full() makes the next
+    heartbeat a full snapshot, e.g. when n8n answers with resync or a
+    heartbeat was lost.
+    """
+
+    def __init__(self, full_every: int = FULL_SNAPSHOT_EVERY):
+        self.full_every = full_every
+        self.stream = uuid.uuid4().hex[:8]
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._last = None
+        self._since_full = 0
+        self._full_requested = False
+        self.stats = {"full": 0, "delta": 0}
+
+    def encode(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self._seq += 1
+            full = self._last is None or self._full_requested or self._since_full >= self.full_every - 1
+            if full:
+                data = {"stream": self.stream, "seq": self._seq, "full": True, **copy.deepcopy(state)}
+                self._since_full = 0
+                self._full_requested = False
+            else:
+                changed, removed = diff_state(self._last, state)
+                data = {
+                    "stream": self.stream, "seq": self._seq, "full": False,
+                    "base_seq": self._seq - 1, "changed": changed,
+                }
+                if removed:
+                    data["removed"] = removed
+                self._since_full += 1
+            self._last = copy.deepcopy(state)
+            self.stats["full" if full else "delta"] += 1
+            return data
+
+    def request_full(self):
+        with self._lock:
+            self._full_requested = True
+
+
+def apply_heartbeat(record: Dict[str, Any], data: Dict[str, Any]) -> bool:
+    """
+    Reference receiver, mirrored by the n8n workflow nodes: update
+    record["heartbeat_state"] from heartbeat data and return True when the
+    VPS should be asked for a full snapshot (resync), because a delta did
+    not follow the heartbeat applied last.
+    """
+    fields = {key: copy.deepcopy(value) for key, value in data.items()
+              if key not in ("stream", "seq", "full", "base_seq", "changed", "removed")}
+    seq, stream = data.get("seq"), data.get("stream")
+    if seq is not None and stream == record.get("heartbeat_stream") and seq <= record.get("heartbeat_seq", 0):
+        # Replayed after a retry; already applied
+        return False
+    resync = False
+    if seq is None or data.get("full", True):
+        record["heartbeat_state"] = fields
+    else:
+        merge_state(record.setdefault("heartbeat_state", {}), data.get("changed", {}), data.get("removed", []))
+        resync = stream != record.get("heartbeat_stream") or data.get("base_seq") != record.get("heartbeat_seq")
+    record["heartbeat_seq"], record["heartbeat_stream"] = seq, stream
+    return resync
+
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client for Gensyn Bot
+One thread-safe, keep-alive connection pool with default timeouts, per-host
+connection limits and retries with jitter, used by every module
+"""
+
+import time
+import random
+import logging
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_TIMEOUT = 10
+DEFAULT_RETRIES = 2
+BACKOFF_SECONDS = 0.5
+MAX_RETRY_AFTER = 30
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+POOL_CONNECTIONS = 10  # hosts kept in the default pool
+POOL_MAXSIZE = 4  # connections per host
+# Per-host connection limits, keyed by URL prefix
+HOST_LIMITS = {
+    "https://dashboard.gensyn.ai": 8,
+    "https://dashboard-math.gensyn.ai": 8,
+    "http://localhost:3000": 2,
+}
+
+logger = logging.getLogger(__name__)
+
+
+class HttpClient:
+    """
+    Wraps one requests.Session so TCP and TLS connections are reused across
+    calls and threads. Idempotent requests are retried on connection errors
+    and retryable status codes with exponential backoff and full jitter.
+    """
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT, retries: int = DEFAULT_RETRIES,
+                 backoff: float = BACKOFF_SECONDS, host_limits: Optional[Dict[str, int]] = None):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = "gensyn-bot"
+
+        default_adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, pool_block=True)
+        self.session.mount("http://", default_adapter)
+        self.session.mount("https://", default_adapter)
+        for prefix, limit in (HOST_LIMITS if host_limits is None else host_limits).items():
+            self.session.mount(prefix, HTTPAdapter(pool_connections=1, pool_maxsize=limit, pool_block=True))
+
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "retries": 0, "errors": 0}
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _sleep_before_retry(self, attempt: int, response: Optional[requests.Response]):
+        delay = random.uniform(0, self.backoff * (2 ** attempt))
+        if response is not None and response.status_code == 429:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                delay = max(delay, min(int(retry_after), MAX_RETRY_AFTER))
+        time.sleep(delay)
+
+    def request(self, method: str, url: str, timeout: Optional[float] = None,
+                retries: Optional[int] = None, **kwargs) -> requests.Response:
+        """Send a request through the shared pool; raises the last error if every attempt fails"""
+        method = method.upper()
+        if retries is None:
+            retries = self.retries if method in IDEMPOTENT_METHODS else 0
+        timeout = self.timeout if timeout is None else timeout
+
+        for attempt in range(retries + 1):
+            self._count("requests")
+            response = None
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+                if response.status_code not in RETRY_STATUSES or attempt == retries:
+                    return response
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == retries:
+                    self._count("errors")
+                    raise
+                logger.debug(f"HTTP {method} {url} failed (attempt {attempt + 1}): {str(e)}")
+            self._count("retries")
+            self._sleep_before_retry(attempt, response)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Return the process-wide HTTP client"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """GET through the shared client"""
+    return get_http_client().get(url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    """POST through the shared client"""
+    return get_http_client().post(url, **kwargs)
+
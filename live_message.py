@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Live Telegram messages for Gensyn Bot
+A message that is edited in place instead of re-sent: identical text is
+skipped and edits are throttled. Used for the pinned live dashboard and for
+install progress.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Any, Callable, Optional
+
+from telegram_outbox import retry_after_seconds
+
+DASHBOARD_FILE = "/root/gensyn-bot/live_dashboard.json"
+
+# Telegram allows about one edit per second per chat; dashboards edit far less often
+LIVE_EDIT_INTERVAL = 1.0
+DASHBOARD_EDIT_INTERVAL = 10.0
+
+logger = logging.getLogger(__name__)
+
+
+class LiveMessage:
+    """
+    One Telegram message kept up to date with edit_message_text. update()
+    skips text identical to what is shown, and coalesces updates arriving
+    faster than min_interval: the latest text is sent when the interval
+    ends. The message is sent on the first update, or again if it was
+    deleted. key, when given, is compared instead of the text, so a
+    changing footer alone does not cause an edit.
+    """
+
+    def __init__(self, bot, chat_id, message_id: Optional[int] = None,
+                 min_interval: float = LIVE_EDIT_INTERVAL, parse_mode: Optional[str] = None,
+                 on_message_id: Optional[Callable[[int], None]] = None):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.min_interval = min_interval
+        self.parse_mode = parse_mode
+        self.on_message_id = on_message_id
+        self._lock = threading.Lock()
+        self._shown_key = None
+        self._pending = None
+        self._timer = None
+        self._ready_at = 0.0
+        self.stats = {"sent": 0, "edited": 0, "skipped": 0, "throttled": 0}
+
+    def update(self, text: str, key: Optional[str] = None):
+        key = text if key is None else key
+        with self._lock:
+            if key == self._shown_key:
+                self._pending = None
+                self.stats["skipped"] += 1
+                return
+            self._pending = (text, key)
+            wait = self._ready_at - time.monotonic()
+            if wait > 0:
+                self.stats["throttled"] += 1
+                if self._timer is None:
+                    self._timer = threading.Timer(wait, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+        self.flush()
+
+    def flush(self):
+        """Send the latest pending text now"""
+        with self._lock:
+            self._timer = None
+            pending, self._pending = self._pending, None
+            if pending is None or pending[1] == self._shown_key:
+                return
+            text, key = pending
+            try:
+                self._show(text)
+                self._shown_key = key
+                self._ready_at = time.monotonic() + self.min_interval
+            except Exception as e:
+                retry_after = retry_after_seconds(e)
+                if retry_after is None:
+                    logging.error(f"Live message update failed: {str(e)}")
+                    return
+                self._pending = pending
+                self._ready_at = time.monotonic() + retry_after
+                self._timer = threading.Timer(retry_after, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _show(self, text: str):
+        if self.message_id is not None:
+            try:
+                self.bot.edit_message_text(text, self.chat_id, self.message_id, parse_mode=self.parse_mode)
+                self.stats["edited"] += 1
+                return
+            except Exception as e:
+                if "message is not modified" in str(e):
+                    return
+                if retry_after_seconds(e) is not None or not any(
+                    reason in str(e) for reason in ("message to edit not found", "message can't be edited")
+                ):
+                    raise
+        message = self.bot.send_message(self.chat_id, text, parse_mode=self.parse_mode)
+        self.message_id = message.message_id
+        self.stats["sent"] += 1
+        if self.on_message_id:
+            self.on_message_id(self.message_id)
+
+
+class LiveDashboard:
+    """
+    One pinned status message per chat, re-rendered whenever the status
+    snapshot refreshes and edited only when the rendered status changed.
+    Chats and their message ids are kept in path so a restarted bot keeps
+    editing the same message.
+    """
+
+    def __init__(self, bot, render: Callable[[Dict[str, Any]], str], path: str = DASHBOARD_FILE,
+                 min_interval: float = DASHBOARD_EDIT_INTERVAL):
+        self.bot = bot
+        self.render = render
+        self.path = path
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._messages: Dict[str, LiveMessage] = {}
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            chats = {chat: live.message_id for chat, live in self._messages.items()}
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"chats": chats}, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Error saving live dashboard: {str(e)}")
+
+    def _live(self, chat_id, message_id: Optional[int] = None) -> LiveMessage:
+        def pin(new_message_id):
+            try:
+                self.bot.pin_chat_message(chat_id, new_message_id, disable_notification=True)
+            except Exception as e:
+                logger.error(f"Error pinning dashboard: {str(e)}")
+            with self._lock:
+                self._save()
+
+        return LiveMessage(self.bot, chat_id, message_id, self.min_interval, parse_mode="HTML", on_message_id=pin)
+
+    def restore(self):
+        """Resume the dashboards that were live before a restart"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                chats = json.load(f).get("chats", {})
+        except Exception as e:
+            logger.error(f"Error loading live dashboard: {str(e)}")
+            return
+        with self._lock:
+            for chat, message_id in chats.items():
+                self._messages[chat] = self._live(int(chat), message_id)
+
+    def enable(self, chat_id, snapshot: Dict[str, Any]):
+        with self._lock:
+            live = self._messages.get(str(chat_id))
+            if live is None:
+                live = self._messages[str(chat_id)] = self._live(chat_id)
+                self._save()
+        self._update(live, snapshot)
+
+    def disable(self, chat_id):
+        with self._lock:
+            live = self._messages.pop(str(chat_id), None)
+            self._save()
+        if live and live.message_id:
+            try:
+                self.bot.unpin_chat_message(chat_id, live.message_id)
+            except Exception as e:
+                logger.error(f"Error unpinning dashboard: {str(e)}")
+
+    def is_live(self, chat_id) -> bool:
+        return str(chat_id) in self._messages
+
+    def _update(self, live: LiveMessage, snapshot: Dict[str, Any]):
+        body = self.render(snapshot)
+        live.update(f"{body}\n🕒 {datetime.utcnow().strftime('%H:%M:%S')} UTC", key=body)
+
+    def on_snapshot(self, snapshot: Dict[str, Any]):
+        """Status snapshot subscriber"""
+        with self._lock:
+            messages = list(self._messages.values())
+        for live in messages:
+            self._update(live, snapshot)
+
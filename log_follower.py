@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Incremental log follower for Gensyn Bot
+Tracks swarm_launcher.log by byte offset and inode and turns newly appended
+lines into structured events that monitor loops subscribe to
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import atexit
+import logging
+import threading
+from itertools import islice
+from datetime import datetime
+from typing import Dict, Any, Optional, Callable, List
+
+from log_tail import iter_lines_reversed
+
+GENSYN_LOG_PATH = "/root/rl-swarm/logs/swarm_launcher.log"
+LOG_FOLLOWER_STATE_DIR = "/root/gensyn-bot"
+
+# Event kinds emitted for every timestamped line
+EVENT_ACTIVITY = "activity"
+EVENT_JOINING = "joining"
+EVENT_STARTING = "starting"
+EVENT_HELLO = "hello"
+
+READ_CHUNK_SIZE = 1024 * 1024
+BOOTSTRAP_LINES = 1000
+# Seconds between checkpoint writes while new lines keep arriving
+CHECKPOINT_INTERVAL = 5.0
+
+logger = logging.getLogger(__name__)
+
+
+def state_file_path(name: Optional[str] = None) -> str:
+    """One checkpoint per process, e.g. bot or webhook_bot; defaults to the running script's name"""
+    name = name or os.path.splitext(os.path.basename(sys.argv[0] or ""))[0] or "default"
+    return os.path.join(LOG_FOLLOWER_STATE_DIR, f"log_follower_state-{name}.json")
+
+
+def parse_hello(message: str) -> Optional[Dict[str, str]]:
+    """
+    Parse peer name and peer id from a Hello line, e.g.:
+    Hello ... [<peer name>] ... [<peer id>]
+    """
+    if "Hello" not in message:
+        return None
+    after = message.split("Hello", 1)[1]
+    # Capture the first two bracketed groups after "Hello"
+    brackets = []
+    for m in re.finditer(r"\[([^\]]+)\]", after):
+        brackets.append(m.group(1))
+        if len(brackets) == 2:
+            break
+    if len(brackets) >= 2:
+        peer_name = brackets[0].strip()
+        peer_id = brackets[1].strip()
+        if peer_name and peer_id:
+            return {"peer_name": peer_name, "peer_id": peer_id}
+    return None
+
+
+def parse_log_line(line: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse one swarm_launcher.log line into an event dict, or None for
+    lines without a "[timestamp]... - message" prefix.
+    """
+    if "] - " not in line:
+        return None
+    try:
+        ts_str = line.split("]")[0][1:]
+        ts = datetime.strptime(ts_str.split(",")[0], "%Y-%m-%d %H:%M:%S")
+    except (ValueError, IndexError):
+        return None
+    msg = line.split("] - ", 1)[-1].strip()
+
+    event = {"kind": EVENT_ACTIVITY, "timestamp": ts, "message": msg}
+    if "Joining round" in msg:
+        event["kind"] = EVENT_JOINING
+    elif "Starting round" in msg:
+        event["kind"] = EVENT_STARTING
+    else:
+        peer = parse_hello(msg)
+        if peer:
+            event["kind"] = EVENT_HELLO
+            event.update(peer)
+    return event
+
+
+class LogFollower:
+    """
+    Follows a log file incrementally. Each poll reads only the bytes appended
+    since the last poll, handles truncation and rotation, and dispatches the
+    parsed events to subscribers. The offset, inode and latest state are
+    checkpointed to state_file, when given, at most every
+    checkpoint_interval seconds and on stop() or exit, so a restart resumes
+    where it left off (re-reading at most that interval's lines). Each
+    process needs its own state_file; see state_file_path().
+    With replay=True a new or replaced file is read from the top instead of
+    being seeded from its tail, for consumers that need every event.
+    """
+
+    def __init__(self, log_path: str = GENSYN_LOG_PATH, state_file: Optional[str] = None,
+                 replay: bool = False, checkpoint_interval: float = CHECKPOINT_INTERVAL):
+        self.log_path = log_path
+        self.state_file = state_file
+        self.replay = replay
+        self.checkpoint_interval = checkpoint_interval
+        self._checkpoint_dirty = False
+        self._last_checkpoint = None
+        self.offset = 0
+        self.inode = None
+        self.state: Dict[str, Any] = {
+            "timestamp": None,
+            "joining": None,
+            "starting": None,
+            "peer_name": None,
+            "peer_id": None,
+        }
+        self._file = None
+        self._partial = b""
+        self._lock = threading.RLock()
+        self._subscribers: List[Callable[[Dict[str, Any]], None]] = []
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._load_checkpoint()
+        if self.state_file:
+            atexit.register(self.checkpoint)
+
+    # Subscriptions
+    def subscribe(self, callback: Callable[[Dict[str, Any]], None]):
+        """Register a callback receiving every new event dict"""
+        with self._lock:
+            if callback not in self._subscribers:
+                self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Dict[str, Any]], None]):
+        """Remove a previously registered callback"""
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def _dispatch(self, events: List[Dict[str, Any]]):
+        for callback in list(self._subscribers):
+            for event in events:
+                try:
+                    callback(event)
+                except Exception as e:
+                    logger.error(f"Log follower subscriber error: {str(e)}")
+
+    @property
+    def committed_offset(self) -> int:
+        """Offset of the end of the last complete line consumed"""
+        return self.offset - len(self._partial)
+
+    # Checkpointing
+    def _load_checkpoint(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file) as f:
+                data = json.load(f)
+            if data.get("log_path") != self.log_path:
+                return
+            self.offset = int(data.get("offset", 0))
+            self.inode = data.get("inode")
+            state = data.get("state", {})
+            for key in self.state:
+                self.state[key] = state.get(key)
+            if self.state["timestamp"]:
+                self.state["timestamp"] = datetime.fromisoformat(self.state["timestamp"])
+        except Exception as e:
+            logger.error(f"Error loading log follower checkpoint: {str(e)}")
+            self.offset = 0
+            self.inode = None
+
+    def checkpoint(self, force: bool = True):
+        """Write the checkpoint if anything changed, at most every checkpoint_interval unless forced"""
+        with self._lock:
+            if not self.state_file or not self._checkpoint_dirty:
+                return
+            now = time.monotonic()
+            if not force and self._last_checkpoint is not None and now - self._last_checkpoint < self.checkpoint_interval:
+                return
+            self._save_checkpoint()
+            self._checkpoint_dirty = False
+            self._last_checkpoint = now
+
+    def _save_checkpoint(self):
+        try:
+            state = dict(self.state)
+            if state["timestamp"]:
+                state["timestamp"] = state["timestamp"].isoformat()
+            payload = {
+                "log_path": self.log_path,
+                "offset": self.committed_offset,
+                "inode": self.inode,
+                "state": state,
+                "updated_at": datetime.utcnow().isoformat() + "Z"
+            }
+            os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+            tmp_path = f"{self.state_file}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(payload, f, separators=(",", ":"))
+            os.replace(tmp_path, self.state_file)
+        except Exception as e:
+            logger.error(f"Error saving log follower checkpoint: {str(e)}")
+
+    # Reading
+    def _apply(self, event: Dict[str, Any]):
+        """Fold an event into the latest-state view"""
+        ts = event["timestamp"]
+        if not self.state["timestamp"] or ts >= self.state["timestamp"]:
+            self.state["timestamp"] = ts
+        if event["kind"] == EVENT_JOINING:
+            self.state["joining"] = event["message"]
+        elif event["kind"] == EVENT_STARTING:
+            self.state["starting"] = event["message"]
+        elif event["kind"] == EVENT_HELLO:
+            self.state["peer_name"] = event["peer_name"]
+            self.state["peer_id"] = event["peer_id"]
+
+    def _bootstrap(self, size: int):
+        """Seed the state from the end of the log instead of replaying it all"""
+        found = {"timestamp": None, "joining": None, "starting": None, "peer_name": None, "peer_id": None}
+        for line in islice(iter_lines_reversed(self.log_path), BOOTSTRAP_LINES):
+            event = parse_log_line(line)
+            if not event:
+                continue
+            if not found["timestamp"]:
+                found["timestamp"] = event["timestamp"]
+            if event["kind"] == EVENT_JOINING and not found["joining"]:
+                found["joining"] = event["message"]
+            elif event["kind"] == EVENT_STARTING and not found["starting"]:
+                found["starting"] = event["message"]
+            elif event["kind"] == EVENT_HELLO and not found["peer_id"]:
+                found["peer_name"] = event["peer_name"]
+                found["peer_id"] = event["peer_id"]
+            if all(found.values()):
+                break
+        for key, value in found.items():
+            if value is not None:
+                self.state[key] = value
+        self.offset = size
+        self._partial = b""
+
+    def _open(self, resume: bool):
+        self._file = open(self.log_path, "rb")
+        st = os.fstat(self._file.fileno())
+        if not resume or self.inode != st.st_ino or st.st_size < self.offset:
+            self.inode = st.st_ino
+            if self.replay:
+                self.offset = 0
+                self._partial = b""
+            else:
+                self._bootstrap(st.st_size)
+        self._file.seek(self.offset)
+
+    def _read_appended(self, max_bytes: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Read complete lines from the current offset to EOF, or up to max_bytes"""
+        events = []
+        remaining = max_bytes
+        while remaining is None or remaining > 0:
+            size = READ_CHUNK_SIZE if remaining is None else min(READ_CHUNK_SIZE, remaining)
+            chunk = self._file.read(size)
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            data = self._partial + chunk
+            lines = data.split(b"\n")
+            # Keep an unterminated last line until the writer finishes it
+            self._partial = lines.pop()
+            self.offset += len(chunk)
+            for raw in lines:
+                event = parse_log_line(raw.rstrip(b"\r").decode("utf-8", "replace"))
+                if event:
+                    self._apply(event)
+                    events.append(event)
+        return events
+
+    def poll(self, max_bytes: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Read newly appended bytes, dispatch their events to subscribers and
+        return them. Cost depends only on how much was appended since the
+        last poll. max_bytes bounds a single call when catching up on a
+        large backlog.
+        """
+        with self._lock:
+            try:
+                if not os.path.exists(self.log_path):
+                    return []
+                start_offset = self.offset
+                events = []
+
+                if self._file is None:
+                    self._open(resume=True)
+                else:
+                    st = os.stat(self.log_path)
+                    if st.st_ino != self.inode:
+                        # Rotated: finish the old file, then start the new one from the top
+                        events.extend(self._read_appended())
+                        self._file.close()
+                        self._file = open(self.log_path, "rb")
+                        self.inode = os.fstat(self._file.fileno()).st_ino
+                        self.offset = 0
+                        self._partial = b""
+                    elif st.st_size < self.offset:
+                        # Truncated in place
+                        self._file.seek(0)
+                        self.offset = 0
+                        self._partial = b""
+
+                events.extend(self._read_appended(max_bytes))
+                if self.offset != start_offset or events:
+                    self._checkpoint_dirty = True
+                    self.checkpoint(force=False)
+            except Exception as e:
+                logger.error(f"Log follower poll error: {str(e)}")
+                if self._file is not None:
+                    try:
+                        self._file.close()
+                    except Exception:
+                        pass
+                self._file = None
+                return []
+
+        if events:
+            self._dispatch(events)
+        return events
+
+    def get_status(self) -> Optional[Dict[str, Any]]:
+        """
+        Return the latest timestamp, joining and starting round info in the
+        same shape as get_gensyn_log_status, or None if the log is missing.
+        """
+        if not os.path.exists(self.log_path):
+            return None
+        self.poll()
+        with self._lock:
+            return {
+                "timestamp": self.state["timestamp"],
+                "joining": self.state["joining"],
+                "starting": self.state["starting"],
+            }
+
+    def get_peer_info(self) -> Optional[Dict[str, str]]:
+        """Return the most recent peer name and id seen in a Hello line"""
+        if not os.path.exists(self.log_path):
+            return None
+        self.poll()
+        with self._lock:
+            if self.state["peer_name"] and self.state["peer_id"]:
+                return {"peer_name": self.state["peer_name"], "peer_id": self.state["peer_id"]}
+        return None
+
+    # Background polling
+    def start(self, interval: float = 5.0):
+        """Poll in a background thread so subscribers get events without asking"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, args=(interval,), daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background polling thread and write the checkpoint"""
+        self._stop_event.set()
+        self.checkpoint()
+
+    def _run(self, interval: float):
+        while not self._stop_event.is_set():
+            self.poll()
+            self._stop_event.wait(interval)
+
+
+_followers: Dict[str, LogFollower] = {}
+_followers_lock = threading.Lock()
+
+
+def get_log_follower(log_path: str = GENSYN_LOG_PATH) -> LogFollower:
+    """Return the process-wide follower for a log path"""
+    with _followers_lock:
+        follower = _followers.get(log_path)
+        if follower is None:
+            state_file = state_file_path() if log_path == GENSYN_LOG_PATH else None
+            follower = LogFollower(log_path, state_file)
+            _followers[log_path] = follower
+        return follower
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Reverse-seeking log tail reader for Gensyn Bot
+Reads lines newest-first from the end of large log files in fixed-size blocks
+"""
+
+import os
+import sys
+import time
+import argparse
+from itertools import islice
+from typing import Iterator, List
+
+DEFAULT_BLOCK_SIZE = 64 * 1024
+# Lines longer than this are truncated to their last bytes so memory stays bounded
+MAX_LINE_BYTES = 1024 * 1024
+
+
+def iter_lines_reversed(path: str, block_size: int = DEFAULT_BLOCK_SIZE,
+                        encoding: str = "utf-8", errors: str = "replace",
+                        max_line_bytes: int = MAX_LINE_BYTES) -> Iterator[str]:
+    """
+    Yield the lines of a file newest-first without reading the whole file.
+    Seeks backwards from EOF one block at a time, so I/O and memory only
+    depend on how many lines the caller consumes, not on the file size.
+    Lines are yielded without their trailing newline; a line longer than
+    max_line_bytes is yielded as its last max_line_bytes bytes.
+    """
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b""
+        first_block = True
+        # Set while skipping the start of a line already cut to max_line_bytes
+        truncated = False
+
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            block = f.read(read_size)
+
+            # A trailing newline terminates the last line, it does not start a new one
+            if first_block:
+                first_block = False
+                if block.endswith(b"\n"):
+                    block = block[:-1]
+
+            if truncated:
+                newline = block.rfind(b"\n")
+                if newline < 0:
+                    continue
+                # Keep the newline ending the previous line, drop the rest of the long line
+                block = block[:newline + 1]
+                truncated = False
+
+            chunk = block + remainder
+            parts = chunk.split(b"\n")
+            # The first part may continue in the previous block
+            remainder = parts[0]
+            if len(remainder) > max_line_bytes:
+                remainder = remainder[-max_line_bytes:]
+                truncated = True
+
+            for raw in reversed(parts[1:]):
+                yield raw.rstrip(b"\r").decode(encoding, errors)
+
+        if remainder or not first_block:
+            yield remainder.rstrip(b"\r").decode(encoding, errors)
+
+
+def tail_lines(path: str, count: int, block_size: int = DEFAULT_BLOCK_SIZE) -> List[str]:
+    """
+    Return the last `count` lines of a file in file order (oldest first),
+    equivalent to readlines()[-count:] without the trailing newlines.
+    """
+    if count <= 0:
+        return []
+    lines = list(islice(iter_lines_reversed(path, block_size), count))
+    lines.reverse()
+    return lines
+
+
+# Benchmark on a synthetic log
+def _write_synthetic_log(path: str, size_bytes: int):
+    """Write a swarm_launcher.log-like file of roughly `size_bytes` bytes"""
+    sample = []
+    for i in range(2000):
+        ts = f"[2025-01-01 00:{(i // 60) % 60:02d}:{i % 60:02d},{i % 1000:03d}][hivemind][INFO]"
+        if i % 200 == 0:
+            sample.append(f"{ts} - 🐝 Joining round: {i // 200}\n")
+        elif i % 200 == 1:
+            sample.append(f"{ts} - Starting round: {i // 200}/1000000.\n")
+        else:
+            sample.append(f"{ts} - Training step {i} loss=0.{i:04d} grad_norm=1.{i:03d}\n")
+    chunk = "".join(sample).encode("utf-8")
+
+    with open(path, "wb") as f:
+        written = 0
+        while written < size_bytes:
+            f.write(chunk)
+            written += len(chunk)
+        f.write(b"[2025-01-02 12:00:00,000][hivemind][INFO] - Hello \xf0\x9f\x90\x9d [sly loud alpaca] [QmPeerId]\n")
+
+
+def benchmark(size_gb: float = 2.0, path: str = "/tmp/gensyn_tail_benchmark.log",
+              lines: int = 1000, naive: bool = False, keep: bool = False):
+    """Compare reverse tailing with readlines() on a synthetic multi-GB log"""
+    import tracemalloc
+
+    size_bytes = int(size_gb * 1024 ** 3)
+    if not os.path.exists(path) or os.path.getsize(path) < size_bytes:
+        print(f"📝 Writing synthetic log ({size_gb:.1f} GB) to {path}...")
+        start = time.perf_counter()
+        _write_synthetic_log(path, size_bytes)
+        print(f"   done in {time.perf_counter() - start:.1f}s")
+
+    print(f"📏 Log size: {os.path.getsize(path) / 1024 ** 3:.2f} GB, tailing {lines} lines")
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = tail_lines(path, lines)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"⚡ tail_lines:  {elapsed * 1000:8.2f} ms, peak memory {peak / 1024:.0f} KiB, last line: {result[-1][:60]!r}")
+
+    if naive:
+        start = time.perf_counter()
+        with open(path, "r", errors="replace") as f:
+            baseline = f.readlines()[-lines:]
+        elapsed = time.perf_counter() - start
+        print(f"🐢 readlines(): {elapsed * 1000:8.2f} ms")
+        assert [l.rstrip("\n") for l in baseline] == result, "tail_lines result differs from readlines()"
+
+    if not keep:
+        os.remove(path)
+
+
+def main():
+    """Main function for standalone tailing and benchmarking"""
+    parser = argparse.ArgumentParser(description="Reverse-seeking log tail reader")
+    parser.add_argument("path", nargs="?", help="Log file to tail")
+    parser.add_argument("-n", "--lines", type=int, default=50, help="Number of lines")
+    parser.add_argument("--benchmark", action="store_true", help="Run benchmark on a synthetic log")
+    parser.add_argument("--size-gb", type=float, default=2.0, help="Synthetic log size for the benchmark")
+    parser.add_argument("--naive", action="store_true", help="Also time readlines() (reads the whole file)")
+    parser.add_argument("--keep", action="store_true", help="Keep the synthetic log after benchmarking")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(size_gb=args.size_gb, lines=args.lines, naive=args.naive, keep=args.keep)
+    elif args.path:
+        for line in tail_lines(args.path, args.lines):
+            print(line)
+    else:
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
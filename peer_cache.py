@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Peer lookup cache for Gensyn Bot
+Caches dashboard /api/v1/peer records by peer id and peer name with a TTL,
+serves stale records while revalidating, and collapses concurrent lookups
+for the same peer into a single request
+"""
+
+import time
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Any, Optional, Tuple, List
+
+import http_client
+
+DASHBOARD_PEER_URL = "https://dashboard.gensyn.ai/api/v1/peer"
+DASHBOARD_MATH_PEER_URL = "https://dashboard-math.gensyn.ai/api/v1/peer"
+
+# Seconds a record is served from memory without asking the dashboard
+PEER_CACHE_TTL = 60
+# Seconds past the TTL a record is still served while a refresh runs in the background
+PEER_CACHE_STALE_TTL = 600
+# Parallel lookups when fetching many peers; matches the per-host pool in http_client
+PEER_FETCH_WORKERS = 8
+
+logger = logging.getLogger(__name__)
+
+
+class PeerLookupError(Exception):
+    """The dashboard answered with a non-200 status"""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def split_peer_id(raw_peer_id: Optional[str]) -> Optional[str]:
+    """Split a composite "wallet|ipfsPeerId" id into the ipfs peer id"""
+    raw_peer_id = raw_peer_id or ""
+    return raw_peer_id.split("|")[-1] if "|" in raw_peer_id else raw_peer_id or None
+
+
+class PeerCache:
+    """
+    In-process cache of dashboard peer records. Fresh records are answered
+    from memory; records past the TTL but within the stale window are
+    answered from memory while one background request refreshes them.
+    Concurrent callers missing the same key wait on one in-flight request,
+    so the dashboard sees at most one request per peer per TTL window.
+    Polling loops that compare successive records pass allow_stale=False:
+    past the TTL they wait for a fresh record instead of getting the one
+    they saw on their previous poll.
+    """
+
+    def __init__(self, base_url: str = DASHBOARD_PEER_URL, ttl: float = PEER_CACHE_TTL,
+                 stale_ttl: float = PEER_CACHE_STALE_TTL, timeout: float = 10,
+                 client: Optional[http_client.HttpClient] = None):
+        self.base_url = base_url
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.timeout = timeout
+        self.client = client
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._in_flight: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "waits": 0, "fetches": 0, "errors": 0}
+
+    def get_by_id(self, peer_id: str, allow_stale: bool = True) -> Dict[str, Any]:
+        """Return the dashboard record for a peer id; raises on lookup failure"""
+        return self._get(("id", peer_id), allow_stale)
+
+    def get_by_name(self, peer_name: str, allow_stale: bool = True) -> Dict[str, Any]:
+        """Return the dashboard record for a peer name; raises on lookup failure"""
+        return self._get(("name", peer_name), allow_stale)
+
+    def get_many_by_name(self, peer_names: List[str], max_workers: int = PEER_FETCH_WORKERS,
+                         deadline: Optional[float] = None,
+                         allow_stale: bool = True) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+        """
+        Look up several peers in parallel on a bounded pool. Returns
+        (records, errors) keyed by peer name: peers that fail or are still
+        pending at the deadline land in errors, the rest are kept.
+        """
+        records: Dict[str, Dict[str, Any]] = {}
+        errors: Dict[str, str] = {}
+        names = list(dict.fromkeys(peer_names))
+        if not names:
+            return records, errors
+
+        executor = ThreadPoolExecutor(max_workers=min(max_workers, len(names)), thread_name_prefix="peer-fetch")
+        try:
+            futures = {executor.submit(self.get_by_name, name, allow_stale): name for name in names}
+            done, pending = wait(futures, timeout=deadline)
+            for future in done:
+                name = futures[future]
+                try:
+                    records[name] = future.result()
+                except Exception as e:
+                    errors[name] = str(e)
+            for future in pending:
+                errors[futures[future]] = "timed out"
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return records, errors
+
+    def invalidate(self, peer_id: Optional[str] = None, peer_name: Optional[str] = None):
+        with self._lock:
+            if peer_id:
+                self._entries.pop(("id", peer_id), None)
+            if peer_name:
+                self._entries.pop(("name", peer_name), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _get(self, key: Tuple[str, str], allow_stale: bool = True) -> Dict[str, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            age = time.monotonic() - entry["fetched_at"] if entry else None
+            if entry and age < self.ttl:
+                self.stats["hits"] += 1
+                return entry["record"]
+            if allow_stale and entry and age < self.ttl + self.stale_ttl:
+                self.stats["stale_hits"] += 1
+                if key not in self._in_flight:
+                    self._in_flight[key] = {"event": threading.Event(), "record": None, "error": None}
+                    threading.Thread(target=self._refresh, args=(key,), daemon=True).start()
+                return entry["record"]
+
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                self.stats["misses"] += 1
+                flight = {"event": threading.Event(), "record": None, "error": None}
+                self._in_flight[key] = flight
+            else:
+                self.stats["waits"] += 1
+
+        if leader:
+            self._refresh(key)
+        else:
+            # The leader may retry well past self.timeout; _refresh always sets the event
+            flight["event"].wait()
+        if flight["error"] is not None:
+            raise flight["error"]
+        return flight["record"]
+
+    def _fetch(self, key: Tuple[str, str]) -> Dict[str, Any]:
+        kind, value = key
+        client = self.client or http_client.get_http_client()
+        response = client.get(self.base_url, params={kind: value}, timeout=self.timeout)
+        if response.status_code != 200:
+            raise PeerLookupError(response.status_code)
+        return response.json()
+
+    def _refresh(self, key: Tuple[str, str]):
+        """Fetch one key and wake everyone waiting on it"""
+        with self._lock:
+            flight = self._in_flight[key]
+            self.stats["fetches"] += 1
+        try:
+            record = self._fetch(key)
+        except Exception as e:
+            with self._lock:
+                self.stats["errors"] += 1
+                del self._in_flight[key]
+            flight["error"] = e
+            flight["event"].set()
+            logger.debug(f"Peer lookup {key[0]}={key[1]} failed: {str(e)}")
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            entry = {"record": record, "fetched_at": now}
+            self._entries[key] = entry
+            # A record found by name also answers lookups by its id, and vice versa
+            peer_id = split_peer_id(record.get("peerId"))
+            if peer_id:
+                self._entries[("id", peer_id)] = entry
+            if record.get("peerName"):
+                self._entries[("name", record["peerName"])] = entry
+            del self._in_flight[key]
+        flight["record"] = record
+        flight["event"].set()
+
+
+_caches: Dict[str, PeerCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_peer_cache(base_url: str = DASHBOARD_PEER_URL) -> PeerCache:
+    """Return the process-wide peer cache for a dashboard"""
+    with _caches_lock:
+        cache = _caches.get(base_url)
+        if cache is None:
+            cache = PeerCache(base_url)
+            _caches[base_url] = cache
+        return cache
+
+
+# Benchmark against a local stand-in dashboard
+def benchmark_many(peers: int = 120, delay: float = 0.05, workers: int = PEER_FETCH_WORKERS, failing: int = 5):
+    """Compare sequential and concurrent multi-peer fetches against a local stand-in dashboard"""
+    names = [f"stand in peer {i}" for i in range(peers)]
+    from tests.stand_in_dashboard import start_stand_in_dashboard
+
+    missing = set(names[:failing])
+    server, counters = start_stand_in_dashboard(delay=delay, missing=missing)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/api/v1/peer"
+    client = http_client.HttpClient(retries=0, host_limits={f"http://127.0.0.1:{server.server_address[1]}": workers})
+    try:
+        cache = PeerCache(base_url, client=client)
+        start = time.perf_counter()
+        sequential_ok = 0
+        for name in names:
+            try:
+                cache.get_by_name(name)
+                sequential_ok += 1
+            except Exception:
+                pass
+        sequential_elapsed = time.perf_counter() - start
+
+        cache = PeerCache(base_url, client=client)
+        start = time.perf_counter()
+        records, errors = cache.get_many_by_name(names, max_workers=workers)
+        concurrent_elapsed = time.perf_counter() - start
+    finally:
+        client.close()
+        server.shutdown()
+
+    print(f"🧪 {peers} peers, {delay * 1000:.0f} ms dashboard latency, {failing} missing")
+    print(f"🐢 sequential:         {sequential_elapsed * 1000:8.1f} ms, {sequential_ok} ok")
+    print(f"⚡ concurrent ({workers} workers): {concurrent_elapsed * 1000:8.1f} ms, {len(records)} ok, {len(errors)} failed")
+    assert len(records) == sequential_ok == peers - failing, "partial results were not kept"
+    assert set(errors) == missing, "failed peers were not reported"
+    print(f"✅ {sequential_elapsed / concurrent_elapsed:.1f}x faster with partial results kept")
+
+
+def main():
+    """Main function for the benchmark"""
+    parser = argparse.ArgumentParser(description="Peer lookup cache")
+    parser.add_argument("--benchmark", action="store_true", help="Benchmark concurrent multi-peer fetching against a local stand-in server")
+    parser.add_argument("--peers", type=int, default=120, help="Simulated peers for the benchmark")
+    parser.add_argument("--workers", type=int, default=PEER_FETCH_WORKERS, help="Parallel lookups for the benchmark")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark_many(args.peers, workers=args.workers)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
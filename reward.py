@@ -2,10 +2,12 @@ import os
 import time
 import json
 import html
-import requests
+import http_client
+from peer_cache import get_peer_cache, DASHBOARD_MATH_PEER_URL, PEER_FETCH_WORKERS
+from eoa_store import get_eoa_store
+from chain_client import get_contract
 import subprocess
-from web3 import Web3
-from datetime import datetime, date
+from datetime import datetime
 from dotenv import load_dotenv
 
 # Load only TOKEN and CHAT ID from env file
@@ -19,8 +21,8 @@ PEER_NAMES = ["sly loud alpaca", "blue fast tiger"]  # Edit these if needed
 DELAY_SECONDS = 1800
 SCREEN_NAME = "gensyn"
 NODE_NO = "1"
+PEER_FETCH_DEADLINE = 30  # seconds to wait for all peers before reporting what arrived
 
-ALCHEMY_RPC = "https://gensyn-testnet.g.alchemy.com/v2/TD5tr7mo4VfXlSaolFlSr3tL70br2M9J"
 CONTRACT_ADDRESS = "0x69C6e1D608ec64885E7b185d39b04B491a71768C"
 ABI = [
     {
@@ -32,8 +34,6 @@ ABI = [
     }
 ]
 
-EOA_CACHE_FILE = "eoa_cache.json"
-
 def send_telegram_message(token, chat_id, message: str):
     url = f"https://api.telegram.org/bot{token}/sendMessage"
     payload = {
@@ -42,7 +42,7 @@ def send_telegram_message(token, chat_id, message: str):
         "parse_mode": "HTML",
         "disable_web_page_preview": True
     }
-    return requests.post(url, json=payload)
+    return http_client.post(url, json=payload)
 
 def log_message(message: str):
     log_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -60,47 +60,33 @@ def get_last_screen_logs(screen_name="gensyn", lines=10):
         return f"Log fetch error: {str(e)}"
 
 def fetch_peer_data(peer_name):
-    url_name = peer_name.replace(" ", "%20")
-    url = f"https://dashboard-math.gensyn.ai/api/v1/peer?name={url_name}"
     try:
-        response = requests.get(url)
-        if response.ok:
-            return response.json()
+        return get_peer_cache(DASHBOARD_MATH_PEER_URL).get_by_name(peer_name, allow_stale=False)
     except:
         pass
     return None
 
-def fetch_eoa_mapping(w3, contract, peer_ids):
-    today = str(date.today())
-    if os.path.exists(EOA_CACHE_FILE):
-        with open(EOA_CACHE_FILE) as f:
-            data = json.load(f)
-            if data.get("date") == today:
-                return data.get("mapping", {})
+def fetch_all_peers(peer_names):
+    """Fetch peers in parallel; returns ([(name, data)] in order, {name: error})"""
+    names = [name.strip() for name in peer_names]
+    records, errors = get_peer_cache(DASHBOARD_MATH_PEER_URL).get_many_by_name(
+        names, max_workers=PEER_FETCH_WORKERS, deadline=PEER_FETCH_DEADLINE, allow_stale=False
+    )
+    return [(name, records[name]) for name in names if records.get(name)], errors
 
-    addresses = contract.functions.getEoa(peer_ids).call()
-    mapping = {pid: eoa for pid, eoa in zip(peer_ids, addresses)}
-    with open(EOA_CACHE_FILE, "w") as f:
-        json.dump({"date": today, "mapping": mapping}, f, indent=4)
-    return mapping
+def fetch_eoa_mapping(contract, peer_ids):
+    return get_eoa_store().lookup(contract, peer_ids)
 
 def main():
-    w3 = Web3(Web3.HTTPProvider(ALCHEMY_RPC))
-    contract = w3.eth.contract(address=Web3.to_checksum_address(CONTRACT_ADDRESS), abi=ABI)
+    contract = get_contract(CONTRACT_ADDRESS, ABI)
 
     while True:
         try:
             messages = []
-            peer_infos = []
-            peer_ids = []
-
-            for name in PEER_NAMES:
-                data = fetch_peer_data(name.strip())
-                if data:
-                    peer_infos.append((name, data))
-                    peer_ids.append(data["peerId"])
+            peer_infos, fetch_errors = fetch_all_peers(PEER_NAMES)
+            peer_ids = [data["peerId"] for _name, data in peer_infos]
 
-            eoa_map = fetch_eoa_mapping(w3, contract, peer_ids)
+            eoa_map = fetch_eoa_mapping(contract, peer_ids)
 
             for i, (name, info) in enumerate(peer_infos):
                 peer_id = info["peerId"]
@@ -120,6 +106,9 @@ def main():
                 )
                 messages.append(msg)
 
+            for name, error in fetch_errors.items():
+                messages.append(f"⚠️ <code>{html.escape(name)}</code>: fetch failed ({html.escape(error)})")
+
             logs = get_last_screen_logs(SCREEN_NAME)
             full_message = "\n\n".join(messages) + f"\n\n<b>Last Logs:</b>\n<code>{html.escape(logs)}</code>"
 
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Persistent round-history index for Gensyn Bot
+Records every round transition from swarm_launcher.log in SQLite so round
+statistics are answered from an index instead of rescanning the log
+"""
+
+import os
+import re
+import fcntl
+import logging
+import sqlite3
+import calendar
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional, List
+
+from log_follower import LogFollower, GENSYN_LOG_PATH, EVENT_JOINING, EVENT_STARTING
+
+ROUND_HISTORY_DB = "/root/gensyn-bot/round_history.db"
+
+# Bytes parsed per transaction while catching up on an existing log
+SYNC_BATCH_BYTES = 8 * 1024 * 1024
+# Seconds between background syncs once the index has caught up
+SYNC_INTERVAL = 5.0
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS round_events (
+    id INTEGER PRIMARY KEY,
+    ts INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    round INTEGER,
+    stage TEXT,
+    message TEXT NOT NULL,
+    UNIQUE (ts, kind, message)
+);
+CREATE INDEX IF NOT EXISTS idx_round_events_kind_ts ON round_events (kind, ts);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _to_epoch(ts: datetime) -> int:
+    """Log timestamps are naive UTC"""
+    return calendar.timegm(ts.timetuple())
+
+
+def _format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "—"
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60}s"
+    return f"{seconds // 3600}h {(seconds % 3600) // 60}m"
+
+
+class RoundHistory:
+    """
+    SQLite index of joining/starting round events. sync() parses only the
+    bytes appended since the previous sync; the log offset and inode are
+    committed in the same transaction as the rows they produced. start()
+    runs sync() in a background thread; queries only read the index, so
+    while an existing log is still being indexed they report indexing.
+    bot.py and webhook_bot.py share the database, so only the process
+    holding the lock file next to it syncs; the others only query, and
+    take over the index from its stored offset when the owner exits.
+    """
+
+    def __init__(self, db_path: str = ROUND_HISTORY_DB, log_path: str = GENSYN_LOG_PATH):
+        self.db_path = db_path
+        self.log_path = log_path
+        # _lock guards the connection, _sync_lock the follower; queries wait for one batch at most
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._caught_up = False
+        self._lock_file = None
+        self._thread = None
+        self._stop_event = threading.Event()
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+        # The follower keeps no checkpoint of its own; ours lives in the meta table
+        self.follower = LogFollower(log_path, state_file=None, replay=True)
+
+    def _get_meta(self) -> Dict[str, str]:
+        return dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+
+    @property
+    def owner(self) -> bool:
+        """Whether this process syncs the index"""
+        return self._lock_file is not None
+
+    def _claim(self) -> bool:
+        """Become the process that syncs the index, resuming from its stored offset"""
+        if self._lock_file is not None:
+            return True
+        try:
+            lock_file = open(f"{self.db_path}.lock", "w")
+        except OSError as e:
+            logger.error(f"Round history lock unavailable: {str(e)}")
+            return False
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        with self._lock:
+            meta = self._get_meta()
+        if meta.get("log_path") == self.log_path:
+            self.follower.offset = int(meta.get("offset", 0))
+            self.follower.inode = int(meta["inode"]) if meta.get("inode") else None
+        return True
+
+    @property
+    def caught_up(self) -> bool:
+        """Whether the index has reached the end of the log, as last recorded by its owner"""
+        if self.owner:
+            return self._caught_up
+        with self._lock:
+            return self._get_meta().get("caught_up") == "1"
+
+    @staticmethod
+    def _event_row(event: Dict[str, Any]) -> Optional[tuple]:
+        message = event["message"]
+        if event["kind"] == EVENT_JOINING:
+            m = re.search(r"(\d+)", message)
+            return (_to_epoch(event["timestamp"]), EVENT_JOINING, int(m.group(1)) if m else None, None, message)
+        if event["kind"] == EVENT_STARTING:
+            m = re.search(r"(\d+)/(\d+)", message) or re.search(r"(\d+)", message)
+            round_num = int(m.group(1)) if m else None
+            stage = m.group(0) if m else None
+            return (_to_epoch(event["timestamp"]), EVENT_STARTING, round_num, stage, message)
+        return None
+
+    def sync(self) -> int:
+        """
+        Index newly appended round events; returns the number of new rows.
+        Does nothing while another process owns the index.
+        """
+        added = 0
+        with self._sync_lock:
+            if not self._claim():
+                return 0
+            if not os.path.exists(self.log_path):
+                self._caught_up = True
+                return 0
+            while not self._stop_event.is_set():
+                before = self.follower.offset
+                events = self.follower.poll(max_bytes=SYNC_BATCH_BYTES)
+                rows = [row for row in map(self._event_row, events) if row]
+                done = self.follower.offset - before < SYNC_BATCH_BYTES
+                with self._lock, self._conn:
+                    cursor = self._conn.executemany(
+                        "INSERT OR IGNORE INTO round_events (ts, kind, round, stage, message) VALUES (?, ?, ?, ?, ?)",
+                        rows
+                    )
+                    added += max(cursor.rowcount, 0)
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                        [
+                            ("log_path", self.log_path),
+                            ("offset", str(self.follower.committed_offset)),
+                            ("inode", str(self.follower.inode or "")),
+                            ("caught_up", "1" if done else "0"),
+                        ]
+                    )
+                if done:
+                    self._caught_up = True
+                    break
+        return added
+
+    # Background syncing
+    def start(self, interval: float = SYNC_INTERVAL):
+        """Sync in a background thread; safe to call more than once"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, args=(interval,), name="round-history", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background sync thread"""
+        self._stop_event.set()
+
+    def close(self):
+        """Stop syncing, hand the index over to another process and close the database"""
+        self.stop()
+        with self._sync_lock:
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+            with self._lock:
+                self._conn.close()
+
+    def _run(self, interval: float):
+        while not self._stop_event.is_set():
+            try:
+                self.sync()
+            except Exception as e:
+                logger.error(f"Round history sync error: {str(e)}")
+            self._stop_event.wait(interval)
+
+    # Queries
+    def _joins_since(self, since: Optional[int]) -> str:
+        return "kind = 'joining'" + (" AND ts >= :since" if since is not None else "")
+
+    def rounds_completed(self, hours: float = 24) -> int:
+        """Rounds joined in the window that the node has since moved on from"""
+        since = int(time.time() - hours * 3600)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM round_events WHERE kind = 'joining' AND ts >= :since "
+                "AND ts < (SELECT MAX(ts) FROM round_events WHERE kind = 'joining')",
+                {"since": since}
+            ).fetchone()
+        return row[0] or 0
+
+    def mean_seconds_per_round(self, hours: Optional[float] = 24) -> Optional[float]:
+        """Average time between consecutive round joins"""
+        since = int(time.time() - hours * 3600) if hours else None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT AVG(ts - prev) FROM ("
+                "  SELECT ts, LAG(ts) OVER (ORDER BY ts) AS prev FROM round_events"
+                f"  WHERE {self._joins_since(since)}"
+                ") WHERE prev IS NOT NULL",
+                {"since": since}
+            ).fetchone()
+        return row[0]
+
+    def longest_gap(self, hours: Optional[float] = 24) -> Optional[Dict[str, Any]]:
+        """Longest time between consecutive round joins, with where it started"""
+        since = int(time.time() - hours * 3600) if hours else None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT ts - prev AS gap, prev, prev_round, round FROM ("
+                "  SELECT ts, round, LAG(ts) OVER (ORDER BY ts) AS prev,"
+                "         LAG(round) OVER (ORDER BY ts) AS prev_round FROM round_events"
+                f"  WHERE {self._joins_since(since)}"
+                ") WHERE prev IS NOT NULL ORDER BY gap DESC LIMIT 1",
+                {"since": since}
+            ).fetchone()
+        if not row:
+            return None
+        return {
+            "seconds": row[0],
+            "from": datetime.utcfromtimestamp(row[1]).isoformat() + "Z",
+            "from_round": row[2],
+            "to_round": row[3],
+        }
+
+    def recent_rounds(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Most recent round transitions, newest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ts, kind, round, stage FROM round_events ORDER BY ts DESC, id DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [
+            {"timestamp": datetime.utcfromtimestamp(ts).isoformat() + "Z", "kind": kind, "round": rnd, "stage": stage}
+            for ts, kind, rnd, stage in rows
+        ]
+
+    def summary(self, hours: float = 24) -> Dict[str, Any]:
+        """Round statistics for the window from the index, without reading the log"""
+        with self._lock:
+            total, first_ts, last_ts = self._conn.execute(
+                "SELECT COUNT(*), MIN(ts), MAX(ts) FROM round_events WHERE kind = 'joining'"
+            ).fetchone()
+            last_round = self._conn.execute(
+                "SELECT round FROM round_events WHERE kind = 'joining' ORDER BY ts DESC, id DESC LIMIT 1"
+            ).fetchone()
+        return {
+            "window_hours": hours,
+            "rounds_completed": self.rounds_completed(hours),
+            "mean_seconds_per_round": self.mean_seconds_per_round(hours),
+            "longest_gap": self.longest_gap(hours),
+            "last_round": last_round[0] if last_round else None,
+            "total_rounds_indexed": total,
+            "first_seen": datetime.utcfromtimestamp(first_ts).isoformat() + "Z" if first_ts else None,
+            "last_seen": datetime.utcfromtimestamp(last_ts).isoformat() + "Z" if last_ts else None,
+            "indexing": not self.caught_up,
+        }
+
+
+def format_round_history(summary: Dict[str, Any]) -> str:
+    """Render a round-history summary as a Telegram message"""
+    gap = summary.get("longest_gap")
+    gap_txt = "—"
+    if gap:
+        gap_txt = f"{_format_duration(gap['seconds'])} (round {gap['from_round']} → {gap['to_round']})"
+    lines = [
+        f"🐝 Rounds (last {summary['window_hours']:g}h)",
+        f"✅ Completed → {summary['rounds_completed']}",
+        f"⏱️ Mean/round → {_format_duration(summary['mean_seconds_per_round'])}",
+        f"🕳️ Longest gap → {gap_txt}",
+        f"🔢 Last round → {summary['last_round'] if summary['last_round'] is not None else '—'}",
+        f"📚 Indexed → {summary['total_rounds_indexed']} since {summary['first_seen'] or '—'}",
+    ]
+    if summary.get("indexing"):
+        lines.append("⏳ Still indexing the log, counts are incomplete")
+    return "\n".join(lines)
+
+
+_round_history = None
+_round_history_lock = threading.Lock()
+
+
+def get_round_history() -> RoundHistory:
+    """Return the process-wide round-history index, syncing in the background"""
+    global _round_history
+    with _round_history_lock:
+        if _round_history is None:
+            _round_history = RoundHistory()
+            _round_history.start()
+        return _round_history
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Background status snapshot for Gensyn Bot
+Keeps a versioned snapshot of named status sections up to date from one
+background thread, each section on its own schedule, so status renders are
+a memory read instead of a chain of network calls. Sections are collected
+concurrently under one deadline.
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, Callable, Iterable, Optional
+
+# Seconds a live collection may take before unfinished sections are reported as timed out
+STATUS_DEADLINE = 8
+
+logger = logging.getLogger(__name__)
+
+# A collector gets the current sections and returns the new value of its own section
+Collector = Callable[[Dict[str, Dict[str, Any]]], Any]
+
+
+def collect_sections(collectors: Dict[str, Collector], depends: Optional[Dict[str, str]] = None,
+                     deadline: float = STATUS_DEADLINE, sections: Optional[Dict[str, Dict[str, Any]]] = None,
+                     max_workers: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Run collectors concurrently under one overall deadline and return a
+    section for each: {"value", "updated_at", "error": None} when it
+    finished, or the previous section from sections (if any) with "error"
+    set when it failed or was still running at the deadline. A collector
+    listed in depends starts as soon as its parent has finished and sees
+    the parent's new value, so the wall time is bounded by the slowest
+    chain, not the sum of all collectors.
+    """
+    depends = {child: parent for child, parent in (depends or {}).items()
+               if child in collectors and parent in collectors}
+    previous = dict(sections or {})
+    results: Dict[str, Dict[str, Any]] = {}
+    if not collectors:
+        return results
+
+    end = time.monotonic() + deadline
+    executor = ThreadPoolExecutor(max_workers=max_workers or len(collectors), thread_name_prefix="status-collect")
+    futures = {}
+
+    def submit(name):
+        future = executor.submit(collectors[name], {**previous, **results})
+        futures[future] = name
+        return future
+
+    try:
+        for name in collectors:
+            if name not in depends:
+                submit(name)
+        pending = set(futures)
+        while pending:
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = futures[future]
+                try:
+                    results[name] = {"value": future.result(), "updated_at": time.time(), "error": None}
+                except Exception as e:
+                    results[name] = {**previous.get(name, {}), "error": str(e), "failed_at": time.time()}
+                for child, parent in depends.items():
+                    if parent == name:
+                        pending.add(submit(child))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    for name in collectors:
+        if name not in results:
+            results[name] = {**previous.get(name, {}), "error": "timed out", "failed_at": time.time()}
+    return results
+
+
+class StatusSnapshot:
+    """
+    Sections are refreshed by their collector every interval seconds. The
+    snapshot dict is never mutated: every update builds a new one and swaps
+    it in, so readers take it without a lock and always see a consistent
+    version. A section whose collector fails keeps its last value and
+    records the error, so renders can show it as stale. When a section's
+    value changes, the sections depending on it are refreshed right away.
+    """
+
+    def __init__(self, collectors: Dict[str, Collector], intervals: Dict[str, float],
+                 depends: Optional[Dict[str, str]] = None, deadline: float = STATUS_DEADLINE):
+        self.collectors = dict(collectors)
+        self.intervals = dict(intervals)
+        self.depends = dict(depends or {})
+        self.deadline = deadline
+        self._snapshot: Dict[str, Any] = {"version": 0, "sections": {}}
+        self._write_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._next_due = {name: 0.0 for name in self.collectors}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._subscribers = []
+        self.stats = {"refreshes": 0, "errors": 0, "timeouts": 0, "last_cycle_ms": 0.0}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the current snapshot: {"version", "sections": {name: section}}"""
+        return self._snapshot
+
+    def subscribe(self, callback: Callable[[Dict[str, Any]], None]):
+        """Call callback(snapshot) after every refresh cycle that stored new sections"""
+        self._subscribers.append(callback)
+
+    def missing(self) -> list:
+        """Sections that have never been collected successfully"""
+        sections = self._snapshot["sections"]
+        return [name for name in self.collectors if "value" not in sections.get(name, {})]
+
+    def _store(self, name: str, section: Dict[str, Any]):
+        with self._write_lock:
+            sections = dict(self._snapshot["sections"])
+            sections[name] = section
+            self._snapshot = {"version": self._snapshot["version"] + 1, "sections": sections}
+
+    def refresh(self, names: Optional[Iterable[str]] = None, deadline: Optional[float] = None):
+        """Collect the given sections (all by default) now, concurrently under the deadline"""
+        names = list(self.collectors) if names is None else list(names)
+        with self._refresh_lock:
+            start = time.perf_counter()
+            now = time.monotonic()
+            for name in names:
+                self._next_due[name] = now + self.intervals.get(name, 60)
+            previous = self._snapshot["sections"]
+            results = collect_sections(
+                {name: self.collectors[name] for name in names}, self.depends,
+                self.deadline if deadline is None else deadline, previous,
+            )
+            for name, section in results.items():
+                self._apply(name, section, previous.get(name, {}), names)
+            self.stats["last_cycle_ms"] = (time.perf_counter() - start) * 1000
+        snapshot = self._snapshot
+        for callback in self._subscribers:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                logger.error(f"Status snapshot subscriber error: {str(e)}")
+
+    def _apply(self, name: str, section: Dict[str, Any], previous: Dict[str, Any], refreshed: list):
+        self.stats["refreshes"] += 1
+        self._store(name, section)
+        if section.get("error"):
+            self.stats["timeouts" if section["error"] == "timed out" else "errors"] += 1
+            logger.debug(f"Status section {name} failed: {section['error']}")
+            return
+        if previous.get("value") != section["value"]:
+            for dependent, parent in self.depends.items():
+                if parent == name and dependent not in refreshed:
+                    self._next_due[dependent] = 0.0
+                    self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                now = time.monotonic()
+                due = [name for name in self.collectors if self._next_due[name] <= now]
+                if due:
+                    self.refresh(due)
+            except Exception as e:
+                logger.error(f"Status snapshot error: {str(e)}")
+            wait = min(self._next_due.values()) - time.monotonic()
+            self._wake.wait(max(wait, 0.05))
+            self._wake.clear()
+
+    def start(self):
+        """Start the background refresher; safe to call more than once"""
+        with self._write_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="status-snapshot", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The snapshot with per-section ages in seconds, for JSON endpoints"""
+        snapshot = self._snapshot
+        now = time.time()
+        sections = {}
+        for name, section in snapshot["sections"].items():
+            updated_at = section.get("updated_at")
+            sections[name] = {
+                "value": section.get("value"),
+                "age_seconds": round(now - updated_at, 1) if updated_at else None,
+                "stale": bool(section.get("error")),
+                "error": section.get("error"),
+            }
+        return {"version": snapshot["version"], "sections": sections}
+
+
+def format_age(seconds: Optional[float]) -> str:
+    """Short age for status lines: 12s, 5m, 3h"""
+    if seconds is None:
+        return "—"
+    if seconds < 60:
+        return f"{int(seconds)}s"
+    if seconds < 3600:
+        return f"{int(seconds // 60)}m"
+    return f"{int(seconds // 3600)}h"
+
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Background system sampler for Gensyn Bot
+Samples CPU, memory, disk and network with psutil on a fixed cadence and
+runs the service probes (screen, WireGuard, localhost:3000) on a slower
+one, keeping readings in a ring buffer with min/max/avg over the last 1, 5
+and 15 minutes. Status endpoints read the latest result from memory.
+"""
+
+import os
+import time
+import logging
+import argparse
+import threading
+from collections import deque
+from typing import Dict, Any, Callable, Optional
+
+from status_snapshot import collect_sections, Collector
+
+# Seconds between psutil samples; CPU percent is measured over this interval
+SAMPLE_INTERVAL = 5
+# Seconds between service probe rounds, and how long one round may take
+PROBE_INTERVAL = 15
+PROBE_DEADLINE = 5
+# Aggregation windows in seconds
+SAMPLE_WINDOWS = {"1m": 60, "5m": 300, "15m": 900}
+
+METRICS = ("cpu_percent", "memory_percent", "disk_percent", "net_rx_bps", "net_tx_bps", "load_1m")
+
+logger = logging.getLogger(__name__)
+
+
+def _cpu_busy_total(times) -> tuple:
+    """Busy and total CPU seconds from psutil.cpu_times(), counted the way psutil.cpu_percent does"""
+    # guest time is already part of user and nice
+    total = sum(times) - getattr(times, "guest", 0) - getattr(times, "guest_nice", 0)
+    idle = times.idle + getattr(times, "iowait", 0)
+    return total - idle, total
+
+
+def _window_stats(samples: list, now: float) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """min/max/avg of every metric for each window, newest samples last"""
+    windows = {}
+    for label, seconds in SAMPLE_WINDOWS.items():
+        recent = [sample for sample in samples if now - sample["at"] <= seconds]
+        stats = {}
+        for metric in METRICS:
+            values = [sample[metric] for sample in recent if sample.get(metric) is not None]
+            if values:
+                stats[metric] = {
+                    "min": round(min(values), 2),
+                    "max": round(max(values), 2),
+                    "avg": round(sum(values) / len(values), 2),
+                }
+        windows[label] = {"samples": len(recent), **stats}
+    return windows
+
+
+class SystemSampler:
+    """
+    One background thread takes a psutil sample every interval seconds and
+    runs the probes every probe_interval seconds, concurrently under
+    PROBE_DEADLINE. After each sample the status dict, including window
+    aggregates, is rebuilt and swapped in, so status() never computes or
+    blocks. A probe that fails or times out keeps its last value.
+    """
+
+    def __init__(self, probes: Optional[Dict[str, Collector]] = None, interval: float = SAMPLE_INTERVAL,
+                 probe_interval: float = PROBE_INTERVAL, read_sample: Optional[Callable[[], Dict[str, float]]] = None):
+        self.probes = dict(probes or {})
+        self.interval = interval
+        self.probe_interval = probe_interval
+        self._read_sample = read_sample or self._read_psutil
+        self._samples = deque(maxlen=int(max(SAMPLE_WINDOWS.values()) / interval) + 1)
+        self._probed: Dict[str, Dict[str, Any]] = {}
+        self._status: Dict[str, Any] = {"sampled_at": None, "latest": {}, "windows": {}, "probes": {}}
+        self._last_net = None
+        # Our own cpu_times baseline; psutil.cpu_percent(None) shares one with every other caller in the process
+        self._last_cpu = None
+        self._next_probe = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _read_psutil(self) -> Dict[str, float]:
+        import psutil
+
+        now = time.monotonic()
+        net = psutil.net_io_counters()
+        busy, total = _cpu_busy_total(psutil.cpu_times())
+        sample = {
+            "cpu_percent": None,
+            "memory_percent": psutil.virtual_memory().percent,
+            "disk_percent": psutil.disk_usage('/').percent,
+            "net_rx_bps": None,
+            "net_tx_bps": None,
+            "load_1m": os.getloadavg()[0] if hasattr(os, "getloadavg") else None,
+        }
+        if self._last_cpu is not None and total > self._last_cpu[1]:
+            # Percent since the previous sample, i.e. over the sampling interval
+            busy_percent = (busy - self._last_cpu[0]) * 100 / (total - self._last_cpu[1])
+            sample["cpu_percent"] = round(min(max(busy_percent, 0.0), 100.0), 1)
+        self._last_cpu = (busy, total)
+        if self._last_net is not None:
+            elapsed = now - self._last_net[0]
+            if elapsed > 0:
+                sample["net_rx_bps"] = max(net.bytes_recv - self._last_net[1], 0) / elapsed
+                sample["net_tx_bps"] = max(net.bytes_sent - self._last_net[2], 0) / elapsed
+        self._last_net = (now, net.bytes_recv, net.bytes_sent)
+        return sample
+
+    def sample(self, now: Optional[float] = None):
+        """Take one sample, run the probes if they are due, and publish the new status"""
+        now = time.time() if now is None else now
+        try:
+            sample = {"at": now, **self._read_sample()}
+            self._samples.append(sample)
+        except Exception as e:
+            logger.error(f"System sample error: {str(e)}")
+        if self.probes and now >= self._next_probe:
+            self._next_probe = now + self.probe_interval
+            self._probed = collect_sections(self.probes, deadline=PROBE_DEADLINE, sections=self._probed)
+        samples = list(self._samples)
+        latest = {key: value for key, value in samples[-1].items() if key != "at"} if samples else {}
+        self._status = {
+            "sampled_at": samples[-1]["at"] if samples else None,
+            "latest": latest,
+            "windows": _window_stats(samples, now),
+            "probes": {
+                name: {
+                    "value": section.get("value"),
+                    "checked_at": section.get("updated_at"),
+                    "error": section.get("error"),
+                }
+                for name, section in self._probed.items()
+            },
+        }
+
+    def status(self) -> Dict[str, Any]:
+        """The latest published status: {"sampled_at", "latest", "windows", "probes"}"""
+        return self._status
+
+    def probe(self, name: str, default: Any = "unknown") -> Any:
+        """Last value of one probe"""
+        section = self._status["probes"].get(name) or {}
+        value = section.get("value")
+        return default if value is None else value
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error(f"System sampler error: {str(e)}")
+            self._stop.wait(max(self.interval - (time.monotonic() - started), 0.05))
+
+    def start(self):
+        """Start the sampler thread; safe to call more than once"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            if self._read_sample == self._read_psutil:
+                try:
+                    # The first reading only sets the CPU and network baselines
+                    self._read_psutil()
+                except Exception as e:
+                    logger.error(f"System sampler baseline error: {str(e)}")
+            self._thread = threading.Thread(target=self._run, name="system-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+def main():
+    """Main function for inspecting the sampler"""
+    parser = argparse.ArgumentParser(description="Background system sampler")
+    parser.add_argument("--sample", action="store_true", help="Take two real samples and print the status")
+    args = parser.parse_args()
+
+    if args.sample:
+        import json
+        sampler = SystemSampler()
+        sampler._read_psutil()
+        time.sleep(1)
+        sampler.sample()
+        print(json.dumps(sampler.status(), indent=2))
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
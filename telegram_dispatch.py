@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Telegram dispatcher for Gensyn Bot
+Runs button and command handlers on a bounded worker pool with per-action
+concurrency limits, so one slow action no longer stalls every other button,
+and keeps queue depth and handler latency for monitoring
+"""
+
+import time
+import queue
+import logging
+import threading
+from typing import Dict, Any, Callable, Optional
+
+DISPATCH_WORKERS = 4
+DISPATCH_QUEUE_LIMIT = 32
+# Actions queued or running at once when no limit is configured
+DEFAULT_ACTION_LIMIT = 2
+
+logger = logging.getLogger(__name__)
+
+
+class Dispatcher:
+    """
+    A fixed set of worker threads fed from one bounded queue. submit()
+    returns at once: False when the queue is full or the action already
+    has as many jobs queued or running as its limit allows, so callers
+    can tell the user instead of piling up work. Per-action stats record
+    how long jobs waited in the queue and how long the handler ran.
+    """
+
+    def __init__(self, workers: int = DISPATCH_WORKERS, queue_limit: int = DISPATCH_QUEUE_LIMIT,
+                 action_limits: Optional[Dict[str, int]] = None, default_limit: int = DEFAULT_ACTION_LIMIT):
+        self.workers = workers
+        self.action_limits = dict(action_limits or {})
+        self.default_limit = default_limit
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_limit)
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, int] = {}
+        self._threads = []
+        self.stats = {"submitted": 0, "rejected": 0, "completed": 0, "errors": 0, "running": 0}
+        self.action_stats: Dict[str, Dict[str, float]] = {}
+
+    def start(self):
+        """Start the worker threads; safe to call more than once"""
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"tg-dispatch-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, action: str, handler: Callable, *args, **kwargs) -> bool:
+        """Queue handler(*args, **kwargs) under action; returns False if it was rejected"""
+        self.start()
+        with self._lock:
+            limit = self.action_limits.get(action, self.default_limit)
+            if self._in_flight.get(action, 0) >= limit:
+                self.stats["rejected"] += 1
+                return False
+            try:
+                self._queue.put_nowait((action, handler, args, kwargs, time.perf_counter()))
+            except queue.Full:
+                self.stats["rejected"] += 1
+                return False
+            self._in_flight[action] = self._in_flight.get(action, 0) + 1
+            self.stats["submitted"] += 1
+            return True
+
+    def _work(self):
+        while True:
+            action, handler, args, kwargs, queued_at = self._queue.get()
+            started = time.perf_counter()
+            with self._lock:
+                self.stats["running"] += 1
+            try:
+                handler(*args, **kwargs)
+                failed = False
+            except Exception as e:
+                failed = True
+                logging.error(f"Dispatch error in {action}: {str(e)}")
+            finished = time.perf_counter()
+            with self._lock:
+                self.stats["running"] -= 1
+                self.stats["errors" if failed else "completed"] += 1
+                self._in_flight[action] -= 1
+                self._record(action, (started - queued_at) * 1000, (finished - started) * 1000)
+
+    def _record(self, action: str, wait_ms: float, run_ms: float):
+        entry = self.action_stats.setdefault(
+            action, {"count": 0, "wait_ms_avg": 0.0, "wait_ms_max": 0.0, "run_ms_avg": 0.0, "run_ms_max": 0.0}
+        )
+        entry["count"] += 1
+        entry["wait_ms_avg"] += (wait_ms - entry["wait_ms_avg"]) / entry["count"]
+        entry["run_ms_avg"] += (run_ms - entry["run_ms_avg"]) / entry["count"]
+        entry["wait_ms_max"] = max(entry["wait_ms_max"], wait_ms)
+        entry["run_ms_max"] = max(entry["run_ms_max"], run_ms)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, counters and per-action latency"""
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                **self.stats,
+                "actions": {action: dict(entry) for action, entry in self.action_stats.items()},
+            }
+
+
+def format_metrics(metrics: Dict[str, Any]) -> str:
+    """Plain-text metrics for the /queue command"""
+    lines = [
+        f"📥 Queue: {metrics['queue_depth']}   ⚙️ Running: {metrics['running']}",
+        f"✅ Done: {metrics['completed']}   ❌ Errors: {metrics['errors']}   🚫 Rejected: {metrics['rejected']}",
+    ]
+    for action, entry in sorted(metrics["actions"].items()):
+        lines.append(
+            f"{action}: {entry['count']}x wait {entry['wait_ms_avg']:.0f}/{entry['wait_ms_max']:.0f} ms, "
+            f"run {entry['run_ms_avg']:.0f}/{entry['run_ms_max']:.0f} ms"
+        )
+    return "\n".join(lines)
+
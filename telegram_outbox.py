@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Outbound Telegram queue for Gensyn Bot
+One queue for background notifications that keeps under Telegram's rate
+limits, retries 429s after retry_after, merges bursts of alerts into one
+digest and keeps pending messages on disk across restarts
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Dict, Any, Callable, List, Optional
+
+OUTBOX_FILE = "/root/gensyn-bot/telegram_outbox.json"
+
+# Telegram allows about one message per second per chat and 30 per second overall
+PER_CHAT_INTERVAL = 1.0
+GLOBAL_INTERVAL = 1.0 / 25
+# Alerts for the same chat arriving within this window go out as one digest
+DIGEST_WINDOW = 3.0
+# Digests stop growing before Telegram's 4096 character message limit
+MAX_DIGEST_LENGTH = 3500
+MAX_ATTEMPTS = 5
+BACKOFF_SECONDS = 2.0
+MAX_RETRY_AFTER = 300
+
+logger = logging.getLogger(__name__)
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Seconds Telegram asked us to wait, for a 429 ApiTelegramException"""
+    if getattr(error, "error_code", None) != 429:
+        return None
+    result = getattr(error, "result_json", None) or {}
+    return float(result.get("parameters", {}).get("retry_after", 1))
+
+
+class TelegramOutbox:
+    """
+    Messages are sent by one worker thread in FIFO order per chat, no more
+    often than PER_CHAT_INTERVAL per chat and GLOBAL_INTERVAL overall. A
+    429 pauses that chat for retry_after seconds and the message is kept;
+    other failures are retried with backoff up to MAX_ATTEMPTS. Messages
+    queued with coalesce=True wait DIGEST_WINDOW seconds and absorb later
+    coalescable messages for the same chat. Pending messages are written
+    to path after every change and reloaded on start.
+    """
+
+    def __init__(self, send: Callable, path: Optional[str] = OUTBOX_FILE,
+                 per_chat_interval: float = PER_CHAT_INTERVAL, global_interval: float = GLOBAL_INTERVAL,
+                 digest_window: float = DIGEST_WINDOW):
+        self._send = send
+        self.path = path
+        self.per_chat_interval = per_chat_interval
+        self.global_interval = global_interval
+        self.digest_window = digest_window
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pending: List[Dict[str, Any]] = []
+        self._chat_ready: Dict[str, float] = {}
+        self._global_ready = 0.0
+        self._next_id = 1
+        self._thread = None
+        self.stats = {"queued": 0, "sent": 0, "coalesced": 0, "rate_limited": 0, "retries": 0, "dropped": 0}
+        self._load()
+
+    # Persistence
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                self._pending = json.load(f).get("pending", [])
+            self._next_id = max((entry["id"] for entry in self._pending), default=0) + 1
+            if self._pending:
+                logger.info(f"Loaded {len(self._pending)} pending Telegram message(s)")
+        except Exception as e:
+            logger.error(f"Error loading Telegram outbox: {str(e)}")
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"pending": self._pending}, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Error saving Telegram outbox: {str(e)}")
+
+    # Queueing
+    def send(self, chat_id, text: str, coalesce: bool = False, **kwargs):
+        """
+        Queue a message. kwargs are passed to the sender and must be JSON
+        serialisable; pass reply_markup as markup.to_json().
+        """
+        now = time.time()
+        with self._lock:
+            if coalesce:
+                for entry in self._pending:
+                    if (entry["chat_id"] == chat_id and entry["coalesce"] and entry["attempts"] == 0
+                            and len(self.render(entry)) + len(text) < MAX_DIGEST_LENGTH):
+                        entry["texts"].append(text)
+                        self.stats["coalesced"] += 1
+                        self._save()
+                        return
+            self._pending.append({
+                "id": self._next_id,
+                "chat_id": chat_id,
+                "texts": [text],
+                "kwargs": kwargs,
+                "coalesce": coalesce,
+                "created_at": now,
+                "not_before": now + self.digest_window if coalesce else now,
+                "attempts": 0,
+            })
+            self._next_id += 1
+            self.stats["queued"] += 1
+            self._save()
+        self._wake.set()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    @staticmethod
+    def render(entry: Dict[str, Any]) -> str:
+        texts = entry["texts"]
+        if len(texts) == 1:
+            return texts[0]
+        return f"🔔 {len(texts)} updates\n" + "\n".join(texts)
+
+    # Sending
+    def _next_entry(self, now: float):
+        """First sendable entry, keeping per-chat order; returns (entry, seconds to wait)"""
+        wait = 1.0
+        blocked = set()
+        for entry in self._pending:
+            chat = str(entry["chat_id"])
+            if chat in blocked:
+                continue
+            blocked.add(chat)
+            ready_at = max(entry["not_before"], self._chat_ready.get(chat, 0.0), self._global_ready)
+            if ready_at <= now:
+                return entry, 0.0
+            wait = min(wait, ready_at - now)
+        return None, wait
+
+    def _run(self):
+        while True:
+            with self._lock:
+                entry, wait = self._next_entry(time.time())
+            if entry is None:
+                self._wake.wait(max(wait, 0.01))
+                self._wake.clear()
+                continue
+            self._deliver(entry)
+
+    def _deliver(self, entry: Dict[str, Any]):
+        chat = str(entry["chat_id"])
+        with self._lock:
+            # The digest is closed once sending starts
+            entry["attempts"] += 1
+            text = self.render(entry)
+        try:
+            self._send(entry["chat_id"], text, **entry["kwargs"])
+            failed = None
+        except Exception as e:
+            failed = e
+
+        now = time.time()
+        with self._lock:
+            self._global_ready = now + self.global_interval
+            self._chat_ready[chat] = now + self.per_chat_interval
+            if failed is None:
+                self._pending.remove(entry)
+                self.stats["sent"] += 1
+            else:
+                retry_after = retry_after_seconds(failed)
+                if retry_after is not None:
+                    self.stats["rate_limited"] += 1
+                    entry["attempts"] -= 1
+                    self._chat_ready[chat] = now + min(retry_after, MAX_RETRY_AFTER)
+                elif entry["attempts"] >= MAX_ATTEMPTS:
+                    self._pending.remove(entry)
+                    self.stats["dropped"] += 1
+                    logging.error(f"Dropped Telegram message after {entry['attempts']} attempts: {str(failed)}")
+                else:
+                    self.stats["retries"] += 1
+                    entry["not_before"] = now + BACKOFF_SECONDS * (2 ** (entry["attempts"] - 1))
+            self._save()
+
+    def start(self):
+        """Start the sender thread; safe to call more than once"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="telegram-outbox", daemon=True)
+            self._thread.start()
+        self._wake.set()
+
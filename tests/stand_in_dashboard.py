@@ -0,0 +1,56 @@
+"""Local stand-in for the Gensyn dashboard peer API"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+
+def start_stand_in_dashboard(delay: float = 0.0, missing: Optional[set] = None):
+    """
+    Start a local HTTP/1.1 server answering /api/v1/peer like the dashboard.
+    Counts accepted TCP connections and requests; delay adds per-request
+    latency and peer names in missing are answered with 404.
+    """
+    counters = {"connections": 0, "requests": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Send headers and body in one segment so keep-alive is not slowed by delayed ACKs
+        wbufsize = 64 * 1024
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            with lock:
+                counters["connections"] += 1
+
+        def do_GET(self):
+            with lock:
+                counters["requests"] += 1
+            if delay:
+                time.sleep(delay)
+            query = parse_qs(urlparse(self.path).query)
+            name = query.get("name", ["stand in peer"])[0]
+            peer_id = query.get("id", ["Qm" + name.title().replace(" ", "")])[0]
+            if missing and name in missing:
+                body = json.dumps({"error": "peer not found"}).encode()
+                self.send_response(404)
+            else:
+                record = {"peerId": f"0xStandIn|{peer_id}", "peerName": name, "reward": 1, "score": 2, "online": True}
+                body = json.dumps(record).encode()
+                self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, counters
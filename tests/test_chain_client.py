@@ -0,0 +1,99 @@
+"""Shared chain client against a local stand-in JSON-RPC server"""
+
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from chain_client import get_chain_client, get_contract, use_rpc_url, ALCHEMY_RPC
+
+CONTRACT = "0xFaD7C5e93f28257429569B854151A1B8DCD404c2"
+
+
+def start_stand_in_rpc(delay: float = 0.0):
+    """
+    Start a local JSON-RPC server answering eth_chainId and getEoa eth_calls
+    with deterministic addresses. Counts connections and requests.
+    """
+    counters = {"connections": 0, "requests": 0}
+    lock = threading.Lock()
+
+    def encode_addresses(calldata: str) -> str:
+        # getEoa(string[]): selector, offset, length, ...; reply with address[] of the same length
+        count = int(calldata[10 + 64:10 + 128], 16) if len(calldata) >= 10 + 128 else 0
+        words = [f"{32:064x}", f"{count:064x}"]
+        words.extend(f"{i + 1:064x}" for i in range(count))
+        return "0x" + "".join(words)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        wbufsize = 64 * 1024
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            with lock:
+                counters["connections"] += 1
+
+        def do_POST(self):
+            with lock:
+                counters["requests"] += 1
+            if delay:
+                time.sleep(delay)
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            method = request.get("method")
+            if method == "eth_chainId":
+                result = hex(685685)
+            elif method == "eth_call":
+                result = encode_addresses(request["params"][0].get("data") or request["params"][0].get("input", ""))
+            else:
+                result = None
+            body = json.dumps({"jsonrpc": "2.0", "id": request.get("id"), "result": result}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, counters
+
+
+@pytest.fixture
+def rpc():
+    server, counters = start_stand_in_rpc()
+    use_rpc_url(f"http://127.0.0.1:{server.server_address[1]}")
+    yield counters
+    use_rpc_url(None)
+    server.shutdown()
+
+
+def test_renders_reuse_one_rpc_connection(rpc):
+    get_chain_client().warm_up()
+    for i in range(20):
+        assert len(get_contract(CONTRACT).functions.getEoa([f"QmPeer{i}"]).call()) == 1
+    assert rpc["connections"] == 1
+
+
+def test_provider_and_contract_are_built_once(rpc):
+    client = get_chain_client()
+    assert get_chain_client() is client
+    assert client.w3 is client.w3
+    assert get_contract(CONTRACT) is get_contract(CONTRACT.lower())
+
+
+def test_warm_up_reports_what_the_first_use_cost(rpc):
+    warmup = get_chain_client().warm_up()
+    assert set(warmup) == {"import_ms", "build_ms", "first_call_ms", "total_ms"}
+    assert get_chain_client().warm_up() == warmup
+
+
+def test_use_rpc_url_none_restores_the_configured_endpoint(rpc):
+    use_rpc_url(None)
+    assert get_chain_client().rpc_url == ALCHEMY_RPC
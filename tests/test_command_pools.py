@@ -0,0 +1,92 @@
+"""Command executor pools with stand-in commands"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from command_pools import CommandPools, PoolSaturated
+
+
+def test_fast_commands_are_not_held_up_by_slow_ones():
+    pools = CommandPools()
+    release = threading.Event()
+
+    async def scenario():
+        reads = [asyncio.ensure_future(pools.run("get_logs", release.wait)) for _ in range(6)]
+        await asyncio.sleep(0.05)
+        latencies = []
+        for _ in range(20):
+            start = time.perf_counter()
+            await pools.run("check_ip", lambda: "1.2.3.4")
+            latencies.append((time.perf_counter() - start) * 1000)
+        release.set()
+        await asyncio.gather(*reads)
+        return latencies
+
+    assert max(asyncio.run(scenario())) < 50
+
+
+def test_saturated_pool_rejects():
+    pools = CommandPools()
+    release = threading.Event()
+
+    async def scenario():
+        reads = [asyncio.ensure_future(pools.run("get_logs", release.wait)) for _ in range(8)]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*reads, return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    # Two workers and four waiting, the rest is refused
+    assert sum(isinstance(result, PoolSaturated) for result in results) == 2
+    assert pools.metrics()["slow"]["rejected"] == 2
+    assert pools.metrics()["slow"]["completed"] == 6
+
+
+def test_exclusive_commands_never_interleave():
+    pools = CommandPools()
+    order = []
+
+    def lifecycle(command):
+        order.append(("start", command))
+        time.sleep(0.05)
+        order.append(("end", command))
+        return command
+
+    async def scenario():
+        return await asyncio.gather(
+            *(pools.run(command, lifecycle, command) for command in ("start_gensyn", "kill_gensyn", "vpn_on")),
+            return_exceptions=True,
+        )
+
+    assert asyncio.run(scenario()) == ["start_gensyn", "kill_gensyn", "vpn_on"]
+    assert [event for event, _command in order] == ["start", "end"] * 3
+
+
+def test_unknown_commands_run_on_the_slow_pool():
+    pools = CommandPools()
+    assert pools.pool_for("hard_update").name == "slow"
+
+
+def test_config_overrides_pools_and_classes():
+    pools = CommandPools(pools={"fast": {"workers": 8}, "bulk": {"workers": 1, "queue": 1}},
+                         classes={"get_logs": "bulk"})
+    assert pools.pools["fast"].workers == 8
+    assert pools.pools["fast"].queue_limit == 16
+    assert pools.pool_for("get_logs").name == "bulk"
+    with pytest.raises(ValueError):
+        pools.set_class("get_logs", "missing")
+
+
+def test_errors_are_counted_and_raised():
+    pools = CommandPools()
+
+    def broken():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(pools.run("check_ip", broken))
+    assert pools.metrics()["fast"]["errors"] == 1
+    assert pools.metrics()["fast"]["running"] == 0
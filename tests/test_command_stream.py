@@ -0,0 +1,87 @@
+"""Streaming command runner with stand-in commands"""
+
+import os
+import threading
+import time
+
+import pytest
+
+from command_stream import run_chains, stream_command
+
+CHATTY = "for i in $(seq 1 5000); do echo line $i; [ $((i % 1000)) -eq 0 ] && sleep 0.2; done; echo oops >&2"
+
+
+@pytest.fixture
+def chatty(tmp_path):
+    updates = []
+    ok, tail, log_path = stream_command(
+        CHATTY, progress=updates.append, log_name="Check stream", log_dir=str(tmp_path),
+        interval=0.15, tail_lines=50,
+    )
+    return ok, tail, log_path, updates
+
+
+def test_stderr_is_merged_in_order(chatty):
+    ok, tail, _log_path, _updates = chatty
+    assert ok
+    assert tail.splitlines()[-1] == "oops"
+
+
+def test_tail_is_bounded(chatty):
+    _ok, tail, _log_path, _updates = chatty
+    assert len(tail.splitlines()) == 50
+
+
+def test_full_output_is_spooled(chatty):
+    _ok, _tail, log_path, _updates = chatty
+    with open(log_path) as f:
+        logged = f.read().splitlines()
+    assert logged[0] == f"$ {CHATTY}"
+    assert logged[1] == "line 1"
+    assert logged[-1] == "[exit 0]"
+    assert len(logged) == 5003
+
+
+def test_progress_is_throttled(chatty):
+    _ok, _tail, _log_path, updates = chatty
+    assert 2 <= len(updates) <= 10
+    assert all(0 < len(update) <= 5 for update in updates)
+
+
+def test_old_logs_are_pruned(tmp_path):
+    for i in range(60):
+        (tmp_path / f"20000101-0000{i:02d}-old.log").write_text("")
+    stream_command("true", log_name="new", log_dir=str(tmp_path))
+    assert len(os.listdir(tmp_path)) == 50
+
+
+def test_chains_run_in_parallel():
+    start = time.perf_counter()
+    ok, desc, _out = run_chains(
+        [[("sleep 0.5", "A1"), ("sleep 0.5", "A2")], [("sleep 0.8", "B")], [("false", "C")]],
+        lambda cmd, desc: stream_command(cmd)[:2],
+    )
+    assert not ok
+    assert desc == "C"
+    assert time.perf_counter() - start < 1.5
+
+
+def test_chain_stops_at_its_first_failure():
+    ran = []
+
+    def run(cmd, desc):
+        ran.append(desc)
+        return cmd != "fail", desc
+
+    assert run_chains([[("ok", "A"), ("fail", "B"), ("ok", "C")]], run) == (False, "B", "B")
+    assert ran == ["A", "B"]
+
+
+def test_cancel_stops_the_command_and_its_children():
+    cancel = threading.Event()
+    threading.Timer(0.3, cancel.set).start()
+    start = time.perf_counter()
+    ok, tail, _log_path = stream_command("sleep 30 & sleep 30; echo done", cancel=cancel)
+    assert not ok
+    assert tail.splitlines()[-1] == "Cancelled"
+    assert time.perf_counter() - start < 2
@@ -0,0 +1,71 @@
+"""Persistent EOA store against a stand-in contract"""
+
+import pytest
+
+from eoa_store import EoaStore, ZERO_ADDRESS
+
+
+class StandInContract:
+    """Duck-typed stand-in for a web3 contract exposing getEoa"""
+
+    address = "0xStandInContract"
+
+    def __init__(self, addresses=None, fail=False):
+        self.calls = []
+        self.addresses = addresses or {}
+        self.fail = fail
+        self.functions = self
+
+    def getEoa(self, peer_ids):
+        self.calls.append(list(peer_ids))
+        if self.fail:
+            raise ConnectionError("rpc down")
+        addresses = [self.addresses.get(pid, f"0x{pid.encode().hex():0>40}") for pid in peer_ids]
+        return type("Call", (), {"call": lambda _self: addresses})()
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "eoa_store.json")
+
+
+def test_only_missing_ids_reach_the_chain(path):
+    contract = StandInContract()
+    store = EoaStore(path)
+    store.lookup(contract, ["QmA", "QmB"])
+    for _ in range(100):
+        store.lookup(contract, ["QmA", "QmB"])
+    mapping = store.lookup(contract, ["QmA", "QmB", "QmC"])
+    assert contract.calls == [["QmA", "QmB"], ["QmC"]]
+    assert set(mapping) == {"QmA", "QmB", "QmC"}
+
+
+def test_another_process_reads_the_stored_entries(path):
+    contract = StandInContract()
+    first = EoaStore(path).lookup(contract, ["QmA", "QmB"])
+    assert EoaStore(path).lookup(contract, ["QmA", "QmB"]) == first
+    assert contract.calls == [["QmA", "QmB"]]
+
+
+def test_expired_entries_are_fetched_again(path):
+    contract = StandInContract()
+    store = EoaStore(path, ttl=0)
+    store.lookup(contract, ["QmA"])
+    store.lookup(contract, ["QmA"])
+    assert contract.calls == [["QmA"], ["QmA"]]
+
+
+def test_unregistered_peers_expire_sooner(path):
+    contract = StandInContract({"QmNew": ZERO_ADDRESS})
+    store = EoaStore(path, unregistered_ttl=0)
+    store.lookup(contract, ["QmNew", "QmA"])
+    store.lookup(contract, ["QmNew", "QmA"])
+    assert contract.calls == [["QmNew", "QmA"], ["QmNew"]]
+
+
+def test_chain_errors_fall_back_to_stored_entries(path):
+    EoaStore(path).lookup(StandInContract(), ["QmA"])
+    failing = StandInContract(fail=True)
+    mapping = EoaStore(path, ttl=0).lookup(failing, ["QmA", "QmB"])
+    assert mapping["QmA"].startswith("0x")
+    assert mapping["QmB"] == "Error: rpc down"
@@ -0,0 +1,79 @@
+"""inotify event loop on scratch directories"""
+
+import os
+import time
+
+import pytest
+
+from fs_watch import EventLoop, IN_CLOSE_WRITE, IN_CREATE, IN_ISDIR, IN_MODIFY, IN_MOVED_TO
+
+
+@pytest.fixture
+def loop():
+    loop = EventLoop(poll_interval=5.0)
+    if not loop.event_driven:
+        loop.close()
+        pytest.skip("inotify is not available")
+    yield loop
+    loop.close()
+
+
+def run_until(loop, done, timeout=5.0):
+    """Run the loop until done() holds; returns whether it did before the timeout"""
+    deadline = time.monotonic() + timeout
+    # Wake up regularly so a finished test is not left blocked until the next deadline
+    loop.add_timer("test_tick", 0.05, lambda: None)
+    while not done() and time.monotonic() < deadline:
+        loop.run_once()
+    return done()
+
+
+def test_writes_are_delivered(loop, tmp_path):
+    events = []
+    assert loop.watch(str(tmp_path), IN_MODIFY | IN_CLOSE_WRITE, lambda path, name, mask: events.append((name, mask)))
+    (tmp_path / "userData.json").write_text("{}")
+    assert run_until(loop, lambda: any(mask & IN_CLOSE_WRITE for _name, mask in events))
+    assert ("userData.json", IN_MODIFY) in events
+    assert ("userData.json", IN_CLOSE_WRITE) in events
+
+
+def test_deadline_fires_without_writes(loop, tmp_path):
+    fired = []
+    loop.watch(str(tmp_path), IN_MODIFY, lambda path, name, mask: fired.append(name))
+    start = time.monotonic()
+    loop.call_later("stale", 0.1, lambda: fired.append(time.monotonic() - start))
+    assert run_until(loop, lambda: fired)
+    assert len(fired) == 1
+    assert 0.1 <= fired[0] < 1.0
+
+
+def test_rewatching_picks_up_a_new_subdirectory(loop, tmp_path):
+    """The bot.monitor WANDB pattern: every new directory gets its own watch"""
+    created = []
+
+    def on_create(path, name, mask):
+        full_path = os.path.join(path, name)
+        created.append(full_path)
+        if mask & IN_ISDIR:
+            loop.watch(full_path, IN_CREATE | IN_MOVED_TO, on_create)
+
+    loop.watch(str(tmp_path), IN_CREATE | IN_MOVED_TO, on_create)
+    run_dir = tmp_path / "run-1"
+    run_dir.mkdir()
+    assert run_until(loop, lambda: str(run_dir) in created)
+    (run_dir / "output.log").write_text("")
+    assert run_until(loop, lambda: str(run_dir / "output.log") in created)
+
+
+def test_missing_path_is_watched_once_it_appears(tmp_path):
+    loop = EventLoop(poll_interval=0.05)
+    calls = []
+    later = tmp_path / "wandb"
+    assert not loop.watch(str(later), IN_CREATE, lambda path, name, mask: calls.append(name))
+    later.mkdir()
+    try:
+        assert run_until(loop, lambda: calls)
+        # The first call after the watch is added is a rescan
+        assert calls[0] is None
+    finally:
+        loop.close()
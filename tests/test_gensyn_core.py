@@ -0,0 +1,85 @@
+"""Pure Gensyn helpers with stand-in files and responses"""
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import gensyn_core
+from gensyn_core import (
+    get_cached_peer_info, load_bot_config, parse_api_response, probe_gensyn_api, render_gensyn_status,
+    write_cached_peer_info,
+)
+
+
+def test_load_bot_config(tmp_path):
+    path = tmp_path / "bot_config.env"
+    path.write_text("BOT_TOKEN=123:abc\nUSER_ID=42\nnot a setting\nURL=http://x/?a=b\n")
+    assert load_bot_config(str(path)) == {"BOT_TOKEN": "123:abc", "USER_ID": "42", "URL": "http://x/?a=b"}
+
+
+@pytest.mark.parametrize("status_code, text, expected", [
+    (200, "<html><title>Sign in to Gensyn</title></html>", {"alive": True, "signed_out": True}),
+    (200, "<!DOCTYPE html><div id=__next_error__></div>", {"alive": True, "signed_out": False}),
+    (200, "nothing here", {"alive": False, "signed_out": False}),
+    (502, "<html>Bad Gateway</html>", {"alive": False, "signed_out": False}),
+])
+def test_parse_api_response(status_code, text, expected):
+    assert parse_api_response(status_code, text) == expected
+
+
+def test_probe_reports_down_when_the_request_fails(monkeypatch):
+    def refuse(url, **kwargs):
+        raise ConnectionError("connection refused")
+
+    monkeypatch.setattr(gensyn_core.http_client, "get", refuse)
+    assert probe_gensyn_api() == {"alive": False, "signed_out": False}
+    assert gensyn_core.check_gensyn_api() is False
+    assert gensyn_core.collect_api_section({}) == {"running": False}
+
+
+def test_install_failure_is_reported_as_plain_text(monkeypatch):
+    monkeypatch.setattr(gensyn_core, "run_chains", lambda stage, run_step: (False, "Install Node", "E: <pkg> & co"))
+    steps = []
+    assert gensyn_core.install_gensyn(steps.append) is False
+    assert steps[-1] == "❌ Install Node failed: E: <pkg> & co"
+
+
+def test_cached_peer_info_round_trips(tmp_path):
+    cache_path = str(tmp_path / "peer_info.json")
+    assert write_cached_peer_info({"peer_name": "sly loud alpaca", "peer_id": "QmPeer"}, cache_path)
+    info = get_cached_peer_info(cache_path)
+    assert info["peer_name"] == "sly loud alpaca"
+    assert info["peer_id"] == "QmPeer"
+    assert info["updated_at"].endswith("Z")
+
+
+def snapshot(**sections):
+    now = time.time()
+    return {"sections": {name: {"value": value, "updated_at": now} for name, value in sections.items()}}
+
+
+def test_render_status():
+    text = render_gensyn_status(snapshot(
+        api={"running": True},
+        log={"timestamp": datetime.utcnow() - timedelta(minutes=3),
+             "joining": "🐝 Joining round: 1200", "starting": "Starting round: 1200/1000000."},
+        peer={"peer_name": "sly loud alpaca", "peer_id": "QmPeer"},
+        stats={"reward": 5, "score": 7},
+        eoa={"eoa": "0xabc"},
+    ), with_ages=False)
+    assert text.startswith("<pre>") and text.endswith("</pre>")
+    assert "✅ Running (3m)" in text
+    assert "Round → 1200 | 1200/1000000" in text
+    assert "Reward → 5" in text and "Win → 7" in text
+    assert "EQA → 0xabc" in text
+
+
+def test_render_status_marks_failed_sections():
+    state = snapshot(api={"running": False})
+    state["sections"]["api"]["error"] = "timed out"
+    state["sections"]["peer"] = {"error": "timed out"}
+    text = render_gensyn_status(state, with_ages=False)
+    assert "❌ Stopped (—)  · stale" in text
+    assert "Peer → —  · unknown" in text
+    assert "Reward → ?" in text
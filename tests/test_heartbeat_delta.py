@@ -0,0 +1,102 @@
+"""Delta-encoded heartbeats with stand-in states"""
+
+import json
+
+from heartbeat_delta import HeartbeatEncoder, apply_heartbeat, diff_state, merge_state
+
+COMMANDS = ["check_ip", "vpn_on", "vpn_off", "gensyn_status", "start_gensyn", "kill_gensyn", "get_logs",
+            "soft_update", "hard_update", "get_backup_files", "system_status", "restart_services"]
+
+
+def state(i):
+    """A 5-minute heartbeat with static capabilities; load_average disappears after 30 beats"""
+    return {
+        "uptime": f"{i * 5 / 60:.1f}h",
+        "system_info": {"cpu_percent": 10 + i % 7, "memory_percent": 41.5, "disk_percent": 63.0,
+                        **({"load_average": 0.5} if i < 30 else {})},
+        "status": "online",
+        "capabilities": {"gensyn": True, "vpn": True, "gensyn_running": i % 20 < 15, "vpn_active": True,
+                         "auto_discovery": True, "monitoring": True, "webhook_server": True, "commands": COMMANDS},
+    }
+
+
+def test_diff_and_merge_round_trip():
+    old = {"a": 1, "nested": {"keep": 1, "change": 1, "drop": 1}, "gone": True}
+    new = {"a": 1, "nested": {"keep": 1, "change": 2, "add": 3}, "list": [1, 2]}
+    changed, removed = diff_state(old, new)
+    assert changed == {"nested": {"change": 2, "add": 3}, "list": [1, 2]}
+    assert sorted(removed) == [["gone"], ["nested", "drop"]]
+    assert merge_state(old, changed, removed) == new
+
+
+def test_deltas_merge_to_the_full_state():
+    encoder = HeartbeatEncoder()
+    record = {}
+    for i in range(48):
+        assert not apply_heartbeat(record, encoder.encode(state(i)))
+        assert record["heartbeat_state"] == state(i)
+
+
+def test_full_snapshots_are_periodic():
+    encoder = HeartbeatEncoder(full_every=12)
+    fulls = [i for i in range(48) if encoder.encode(state(i))["full"]]
+    assert fulls == [0, 12, 24, 36]
+
+
+def test_request_full_makes_the_next_one_a_snapshot():
+    encoder = HeartbeatEncoder()
+    encoder.encode(state(0))
+    assert not encoder.encode(state(1))["full"]
+    encoder.request_full()
+    data = encoder.encode(state(2))
+    assert data["full"]
+    assert {key: value for key, value in data.items() if key not in ("stream", "seq", "full")} == state(2)
+
+
+def test_lost_heartbeat_asks_for_a_resync():
+    encoder = HeartbeatEncoder()
+    record = {}
+    apply_heartbeat(record, encoder.encode(state(0)))
+    encoder.encode(state(1))
+    assert apply_heartbeat(record, encoder.encode(state(2)))
+    encoder.request_full()
+    assert not apply_heartbeat(record, encoder.encode(state(3)))
+    assert record["heartbeat_state"] == state(3)
+
+
+def test_replayed_heartbeat_is_applied_once():
+    encoder = HeartbeatEncoder()
+    record = {}
+    apply_heartbeat(record, encoder.encode(state(0)))
+    data = encoder.encode(state(1))
+    assert not apply_heartbeat(record, data)
+    record["heartbeat_state"]["status"] = "marker"
+    assert not apply_heartbeat(record, data)
+    assert record["heartbeat_state"]["status"] == "marker"
+
+
+def test_restarted_sender_starts_a_new_stream():
+    record = {}
+    before = HeartbeatEncoder()
+    apply_heartbeat(record, before.encode(state(0)))
+    apply_heartbeat(record, before.encode(state(1)))
+    after = HeartbeatEncoder()
+    data = after.encode(state(2))
+    assert data["full"] and data["stream"] != before.stream
+    assert not apply_heartbeat(record, data)
+    assert record["heartbeat_state"] == state(2)
+
+
+def test_legacy_heartbeat_without_seq_is_a_snapshot():
+    record = {"heartbeat_state": {"old": True}}
+    assert not apply_heartbeat(record, state(0))
+    assert record["heartbeat_state"] == state(0)
+
+
+def test_deltas_shrink_heartbeats():
+    encoder = HeartbeatEncoder()
+    full_bytes = sent_bytes = 0
+    for i in range(48):
+        full_bytes += len(json.dumps(state(i)))
+        sent_bytes += len(json.dumps(encoder.encode(state(i))))
+    assert sent_bytes < full_bytes / 2
@@ -0,0 +1,33 @@
+"""Shared HTTP client against a local stand-in dashboard"""
+
+import pytest
+import requests
+
+from http_client import HttpClient
+from tests.stand_in_dashboard import start_stand_in_dashboard
+
+
+@pytest.fixture
+def dashboard():
+    server, counters = start_stand_in_dashboard()
+    yield f"http://127.0.0.1:{server.server_address[1]}/api/v1/peer?id=QmStandIn", counters
+    server.shutdown()
+
+
+def test_repeat_renders_reuse_one_connection(dashboard):
+    url, counters = dashboard
+    client = HttpClient()
+    try:
+        for _ in range(20):
+            assert client.get(url).json()["peerId"] == "0xStandIn|QmStandIn"
+    finally:
+        client.close()
+    assert counters["requests"] == 20
+    assert counters["connections"] == 1
+
+
+def test_bare_requests_open_a_connection_per_render(dashboard):
+    url, counters = dashboard
+    for _ in range(5):
+        requests.get(url, timeout=5).json()
+    assert counters["connections"] == 5
@@ -0,0 +1,89 @@
+"""Live Telegram messages with a stand-in bot"""
+
+import time
+
+from live_message import LiveDashboard, LiveMessage
+
+
+class StandInBot:
+    def __init__(self, missing_edit=False):
+        self.calls = []
+        self.missing_edit = missing_edit
+        self._next_id = 100
+
+    def send_message(self, chat_id, text, **kwargs):
+        self.calls.append(("send", text))
+        self._next_id += 1
+        return type("Message", (), {"message_id": self._next_id})()
+
+    def edit_message_text(self, text, chat_id, message_id, **kwargs):
+        if self.missing_edit:
+            raise Exception("Bad Request: message to edit not found")
+        self.calls.append(("edit", text))
+
+    def pin_chat_message(self, chat_id, message_id, **kwargs):
+        self.calls.append(("pin", message_id))
+
+    def unpin_chat_message(self, chat_id, message_id, **kwargs):
+        self.calls.append(("unpin", message_id))
+
+
+def test_first_update_sends_and_later_ones_edit():
+    bot = StandInBot()
+    live = LiveMessage(bot, 1, min_interval=0)
+    live.update("Round 1")
+    live.update("Round 2")
+    assert bot.calls == [("send", "Round 1"), ("edit", "Round 2")]
+    assert live.stats["sent"] == 1
+
+
+def test_identical_text_is_skipped():
+    bot = StandInBot()
+    live = LiveMessage(bot, 1, min_interval=0)
+    for _ in range(50):
+        live.update("Round 1")
+    assert len(bot.calls) == 1
+    assert live.stats["skipped"] == 49
+
+
+def test_key_ignores_a_changing_footer():
+    bot = StandInBot()
+    live = LiveMessage(bot, 1, min_interval=0)
+    live.update("Round 1\n🕒 10:00:00", key="Round 1")
+    live.update("Round 1\n🕒 10:00:05", key="Round 1")
+    assert len(bot.calls) == 1
+
+
+def test_burst_is_throttled_and_latest_text_flushed():
+    bot = StandInBot()
+    live = LiveMessage(bot, 1, min_interval=0.2)
+    for i in range(100):
+        live.update(f"Round {i}")
+        time.sleep(0.001)
+    time.sleep(0.4)
+    assert bot.calls[-1] == ("edit", "Round 99")
+    assert len(bot.calls) < 10
+    assert live.stats["throttled"] > 0
+
+
+def test_deleted_message_is_sent_again():
+    bot = StandInBot(missing_edit=True)
+    live = LiveMessage(bot, 1, message_id=42, min_interval=0)
+    live.update("Round 1")
+    assert bot.calls == [("send", "Round 1")]
+    assert live.message_id == 101
+
+
+def test_dashboard_pins_and_survives_a_restart(tmp_path):
+    path = str(tmp_path / "live_dashboard.json")
+    bot = StandInBot()
+    dashboard = LiveDashboard(bot, lambda snapshot: f"v{snapshot['version']}", path, min_interval=0)
+    dashboard.enable(1, {"version": 1})
+    assert ("pin", 101) in bot.calls
+
+    restarted = LiveDashboard(bot, lambda snapshot: f"v{snapshot['version']}", path, min_interval=0)
+    restarted.restore()
+    assert restarted.is_live(1)
+    restarted.on_snapshot({"version": 2})
+    assert bot.calls[-1][0] == "edit"
+    assert bot.calls[-1][1].startswith("v2\n")
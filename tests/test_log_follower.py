@@ -0,0 +1,122 @@
+"""Incremental log follower on scratch logs"""
+
+import json
+import os
+
+import pytest
+
+from log_follower import EVENT_HELLO, EVENT_JOINING, LogFollower, parse_log_line
+
+
+def line(second: int, message: str) -> bytes:
+    return f"[2025-01-01 00:00:{second:02d},000][hivemind][INFO] - {message}\n".encode()
+
+
+@pytest.fixture
+def log(tmp_path):
+    path = tmp_path / "swarm_launcher.log"
+    path.write_bytes(line(0, "🐝 Joining round: 1") + line(1, "Starting round: 1/1000000."))
+    return path
+
+
+@pytest.fixture
+def state_file(tmp_path):
+    return str(tmp_path / "log_follower_state-test.json")
+
+
+def append(path, data: bytes):
+    with open(path, "ab") as f:
+        f.write(data)
+
+
+def messages(events):
+    return [event["message"] for event in events]
+
+
+def test_existing_log_is_seeded_from_its_tail(log):
+    follower = LogFollower(str(log))
+    assert follower.poll() == []
+    assert follower.get_status()["joining"] == "🐝 Joining round: 1"
+    assert follower.offset == log.stat().st_size
+
+
+def test_only_appended_lines_are_read(log):
+    follower = LogFollower(str(log))
+    follower.poll()
+    seen = []
+    follower.subscribe(seen.append)
+    append(log, line(2, "🐝 Joining round: 2"))
+    events = follower.poll()
+    assert messages(events) == ["🐝 Joining round: 2"]
+    assert events[0]["kind"] == EVENT_JOINING
+    assert seen == events
+    assert follower.poll() == []
+
+
+def test_partial_last_line_waits_for_its_newline(log):
+    follower = LogFollower(str(log))
+    follower.poll()
+    full = line(2, "🐝 Joining round: 2")
+    append(log, full[:20])
+    assert follower.poll() == []
+    assert follower.committed_offset == log.stat().st_size - 20
+    append(log, full[20:])
+    assert messages(follower.poll()) == ["🐝 Joining round: 2"]
+
+
+def test_truncation_resets_the_offset(log):
+    follower = LogFollower(str(log))
+    follower.poll()
+    log.write_bytes(line(5, "🐝 Joining round: 9"))
+    assert messages(follower.poll()) == ["🐝 Joining round: 9"]
+    assert follower.offset == log.stat().st_size
+
+
+def test_rotation_finishes_the_old_file_then_reads_the_new_one(log, tmp_path):
+    follower = LogFollower(str(log))
+    follower.poll()
+    append(log, line(2, "🐝 Joining round: 2"))
+    os.rename(log, tmp_path / "swarm_launcher.log.1")
+    log.write_bytes(line(3, "🐝 Joining round: 3"))
+    assert messages(follower.poll()) == ["🐝 Joining round: 2", "🐝 Joining round: 3"]
+    assert follower.inode == log.stat().st_ino
+
+
+def test_resumes_from_the_checkpoint(log, state_file):
+    follower = LogFollower(str(log), state_file, checkpoint_interval=0)
+    follower.poll()
+    append(log, line(2, "Hello [sly loud alpaca] [QmPeer]"))
+    follower.poll()
+
+    # Lines written while the process was down are read after the restart
+    append(log, line(3, "🐝 Joining round: 3"))
+    restarted = LogFollower(str(log), state_file)
+    assert restarted.get_peer_info() == {"peer_name": "sly loud alpaca", "peer_id": "QmPeer"}
+    assert restarted.get_status()["joining"] == "🐝 Joining round: 3"
+
+
+def test_replay_reads_a_new_log_from_the_top(log):
+    follower = LogFollower(str(log), replay=True)
+    assert messages(follower.poll()) == ["🐝 Joining round: 1", "Starting round: 1/1000000."]
+
+
+def test_checkpoint_is_compact_and_throttled(log, state_file):
+    follower = LogFollower(str(log), state_file, checkpoint_interval=60)
+    follower.poll()
+    with open(state_file) as f:
+        written = f.read()
+    assert "\n" not in written
+    assert json.loads(written)["offset"] == log.stat().st_size
+
+    append(log, line(2, "🐝 Joining round: 2"))
+    follower.poll()
+    assert open(state_file).read() == written
+    follower.stop()
+    assert json.loads(open(state_file).read())["offset"] == log.stat().st_size
+
+
+def test_parse_log_line():
+    event = parse_log_line(line(4, "Hello 🐝 [sly loud alpaca] [QmPeer]").decode().rstrip("\n"))
+    assert event["kind"] == EVENT_HELLO
+    assert event["peer_name"] == "sly loud alpaca"
+    assert parse_log_line("no timestamp here") is None
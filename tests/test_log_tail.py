@@ -0,0 +1,72 @@
+"""Reverse-seeking log tail reader on scratch files"""
+
+import pytest
+
+from log_tail import iter_lines_reversed, tail_lines
+
+
+@pytest.fixture
+def write(tmp_path):
+    def write(content: bytes) -> str:
+        path = tmp_path / "swarm.log"
+        path.write_bytes(content)
+        return str(path)
+    return write
+
+
+def expected(content: bytes, count: int):
+    """readlines()[-count:] without line endings"""
+    return [line.rstrip(b"\r\n").decode() for line in content.splitlines(keepends=True)][-count:]
+
+
+@pytest.mark.parametrize("block_size", [3, 7, 64 * 1024])
+def test_matches_readlines(write, block_size):
+    content = b"".join(f"line {i} - Joining round: {i}\n".encode() for i in range(200))
+    path = write(content)
+    for count in (1, 5, 199, 200, 500):
+        assert tail_lines(path, count, block_size) == expected(content, count)
+
+
+def test_empty_file(write):
+    path = write(b"")
+    assert tail_lines(path, 10) == []
+    assert list(iter_lines_reversed(path)) == []
+
+
+def test_no_trailing_newline(write):
+    path = write(b"first\nsecond\nlast without newline")
+    assert tail_lines(path, 2, block_size=4) == ["second", "last without newline"]
+
+
+def test_crlf_line_endings(write):
+    path = write(b"one\r\ntwo\r\nthree\r\n")
+    assert tail_lines(path, 3, block_size=4) == ["one", "two", "three"]
+
+
+def test_line_spanning_a_block_boundary(write):
+    path = write(b"short\n" + b"x" * 100 + b"\nend\n")
+    assert tail_lines(path, 3, block_size=16) == ["short", "x" * 100, "end"]
+
+
+def test_blank_lines_are_kept(write):
+    path = write(b"a\n\n\nb\n")
+    assert tail_lines(path, 4, block_size=2) == ["a", "", "", "b"]
+
+
+def test_over_long_line_keeps_its_tail(write):
+    long_line = b"".join(b"%04d" % i for i in range(100))
+    path = write(b"before\n" + long_line + b"\nafter\n")
+    lines = list(iter_lines_reversed(path, block_size=16, max_line_bytes=40))
+    assert lines == ["after", long_line[-40:].decode(), "before"]
+
+
+def test_over_long_first_line_keeps_its_tail(write):
+    long_line = b"".join(b"%04d" % i for i in range(100))
+    path = write(long_line + b"\nafter\n")
+    lines = list(iter_lines_reversed(path, block_size=16, max_line_bytes=40))
+    assert lines == ["after", long_line[-40:].decode()]
+
+
+def test_invalid_utf8_is_replaced(write):
+    path = write(b"ok\n\xff\xfe broken\n")
+    assert tail_lines(path, 2) == ["ok", "�� broken"]
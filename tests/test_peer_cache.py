@@ -0,0 +1,130 @@
+"""Peer lookup cache against a local stand-in dashboard"""
+
+import threading
+import time
+
+import pytest
+
+from peer_cache import PeerCache, PeerLookupError
+from tests.stand_in_dashboard import start_stand_in_dashboard
+
+
+@pytest.fixture
+def dashboard():
+    server, counters = start_stand_in_dashboard(delay=0.2, missing={"gone peer"})
+    yield f"http://127.0.0.1:{server.server_address[1]}/api/v1/peer", counters
+    server.shutdown()
+
+
+def age(cache, seconds):
+    """Make every cached record seconds older"""
+    for entry in cache._entries.values():
+        entry["fetched_at"] -= seconds
+
+
+def test_concurrent_lookups_share_one_request(dashboard):
+    url, counters = dashboard
+    cache = PeerCache(url, ttl=60)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_by_id("QmStandIn"))) for _ in range(50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 50 and all(record["peerId"] == "0xStandIn|QmStandIn" for record in results)
+    assert counters["requests"] == 1
+
+
+def test_waiters_outlast_a_leader_that_retries():
+    cache = PeerCache("http://127.0.0.1:9/api/v1/peer", timeout=0.05)
+    started = threading.Event()
+    record = {"peerId": "0xStandIn|QmStandIn", "peerName": "stand in peer"}
+
+    def retrying_fetch(key):
+        # An HttpClient retrying with backoff takes well over twice the timeout
+        started.set()
+        time.sleep(0.3)
+        return record
+
+    cache._fetch = retrying_fetch
+    leader = threading.Thread(target=cache.get_by_id, args=("QmStandIn",))
+    leader.start()
+    started.wait(5)
+    assert cache.get_by_id("QmStandIn") is record
+    leader.join()
+    assert cache.stats["waits"] == 1
+
+
+def test_fresh_records_are_answered_from_memory(dashboard):
+    url, counters = dashboard
+    cache = PeerCache(url, ttl=60)
+    for _ in range(20):
+        cache.get_by_name("stand in peer")
+    assert counters["requests"] == 1
+    assert cache.stats["hits"] == 19
+
+
+def test_record_found_by_name_answers_lookup_by_id(dashboard):
+    url, counters = dashboard
+    cache = PeerCache(url, ttl=60)
+    record = cache.get_by_name("stand in peer")
+    assert cache.get_by_id("QmStandInPeer") is record
+    assert counters["requests"] == 1
+
+
+def test_stale_record_is_served_while_refreshing(dashboard):
+    url, counters = dashboard
+    cache = PeerCache(url, ttl=60, stale_ttl=600)
+    first = cache.get_by_id("QmStandIn")
+    age(cache, 120)
+    assert cache.get_by_id("QmStandIn") is first
+    assert cache.stats["stale_hits"] == 1
+    # The background refresh replaces the record
+    cache._in_flight[("id", "QmStandIn")]["event"].wait(5)
+    assert cache.get_by_id("QmStandIn") is not first
+    assert counters["requests"] == 2
+
+
+def test_allow_stale_false_waits_for_a_fresh_record(dashboard):
+    url, counters = dashboard
+    cache = PeerCache(url, ttl=60, stale_ttl=600)
+    first = cache.get_by_id("QmStandIn")
+    age(cache, 120)
+    assert cache.get_by_id("QmStandIn", allow_stale=False) is not first
+    assert cache.stats["stale_hits"] == 0
+    assert counters["requests"] == 2
+
+
+def test_records_past_the_stale_window_are_fetched_again(dashboard):
+    url, counters = dashboard
+    cache = PeerCache(url, ttl=60, stale_ttl=600)
+    first = cache.get_by_id("QmStandIn")
+    age(cache, 700)
+    assert cache.get_by_id("QmStandIn") is not first
+    assert counters["requests"] == 2
+
+
+def test_failed_lookup_raises_and_is_not_cached(dashboard):
+    url, counters = dashboard
+    cache = PeerCache(url, ttl=60)
+    for _ in range(2):
+        with pytest.raises(PeerLookupError):
+            cache.get_by_name("gone peer")
+    assert counters["requests"] == 2
+
+
+def test_many_peers_keep_partial_results(dashboard):
+    url, counters = dashboard
+    cache = PeerCache(url)
+    names = [f"stand in peer {i}" for i in range(16)] + ["gone peer"]
+    records, errors = cache.get_many_by_name(names, max_workers=8)
+    assert sorted(records) == sorted(names[:-1])
+    assert set(errors) == {"gone peer"}
+    assert counters["requests"] == 17
+
+
+def test_many_peers_report_lookups_past_the_deadline(dashboard):
+    url, _counters = dashboard
+    records, errors = PeerCache(url).get_many_by_name(["stand in peer 1", "stand in peer 2"], deadline=0.05)
+    assert records == {}
+    assert errors == {"stand in peer 1": "timed out", "stand in peer 2": "timed out"}
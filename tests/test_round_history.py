@@ -0,0 +1,113 @@
+"""Round-history index over scratch logs"""
+
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from round_history import RoundHistory
+
+NOW = datetime.utcnow().replace(microsecond=0)
+
+
+def line(minutes_ago: int, message: str) -> bytes:
+    ts = NOW - timedelta(minutes=minutes_ago)
+    return f"[{ts:%Y-%m-%d %H:%M:%S},000][hivemind][INFO] - {message}\n".encode()
+
+
+def rounds(*joins) -> bytes:
+    """A join and a start line per (minutes_ago, round)"""
+    return b"".join(
+        line(minutes_ago, f"🐝 Joining round: {rnd}") + line(minutes_ago, f"Starting round: {rnd}/1000000.")
+        for minutes_ago, rnd in joins
+    )
+
+
+@pytest.fixture
+def log(tmp_path):
+    path = tmp_path / "swarm_launcher.log"
+    path.write_bytes(line(70, "Hello 🐝 [sly loud alpaca] [QmPeer]") + rounds((60, 1), (50, 2), (20, 3)))
+    return path
+
+
+@pytest.fixture
+def open_history(tmp_path, log):
+    histories = []
+
+    def open_history():
+        history = RoundHistory(db_path=str(tmp_path / "round_history.db"), log_path=str(log))
+        histories.append(history)
+        return history
+
+    yield open_history
+    for history in histories:
+        history.close()
+
+
+def append(path, data: bytes):
+    with open(path, "ab") as f:
+        f.write(data)
+
+
+def test_sample_lines_are_indexed(open_history):
+    history = open_history()
+    assert history.sync() == 6
+    assert [(r["kind"], r["round"], r["stage"]) for r in history.recent_rounds(2)] == [
+        ("starting", 3, "3/1000000"), ("joining", 3, None),
+    ]
+    assert not history.summary()["indexing"]
+
+
+def test_replayed_lines_are_not_indexed_twice(open_history, log, tmp_path):
+    history = open_history()
+    history.sync()
+    # A rotation that copies the old content into the new file
+    content = log.read_bytes()
+    os.rename(log, tmp_path / "swarm_launcher.log.1")
+    log.write_bytes(content + rounds((10, 4)))
+    assert history.sync() == 2
+    assert history.summary()["total_rounds_indexed"] == 4
+
+
+def test_resumes_from_the_stored_offset(open_history, log):
+    history = open_history()
+    history.sync()
+    history.close()
+
+    append(log, rounds((10, 4)))
+    restarted = open_history()
+    assert restarted.sync() == 2
+    assert restarted.follower.offset == log.stat().st_size
+
+
+def test_range_and_latest_queries(open_history):
+    history = open_history()
+    history.sync()
+    assert history.rounds_completed(hours=2) == 2
+    assert history.rounds_completed(hours=0.25) == 0
+    assert history.mean_seconds_per_round(hours=2) == 20 * 60
+    assert history.longest_gap(hours=2) == {
+        "seconds": 30 * 60,
+        "from": (NOW - timedelta(minutes=50)).isoformat() + "Z",
+        "from_round": 2,
+        "to_round": 3,
+    }
+    summary = history.summary(hours=2)
+    assert summary["last_round"] == 3
+    assert summary["last_seen"] == (NOW - timedelta(minutes=20)).isoformat() + "Z"
+
+
+def test_one_process_owns_the_index(open_history, log):
+    owner = open_history()
+    owner.sync()
+    other = open_history()
+    append(log, rounds((10, 4)))
+    assert other.sync() == 0
+    assert not other.owner
+    assert not other.summary()["indexing"]
+    assert other.summary()["last_round"] == 3
+
+    # The other process takes over from the owner's offset once it is gone
+    owner.close()
+    assert other.sync() == 2
+    assert other.summary()["last_round"] == 4
@@ -0,0 +1,119 @@
+"""Background status snapshot with stand-in sections"""
+
+import time
+
+import pytest
+
+from status_snapshot import StatusSnapshot, collect_sections, format_age
+
+
+@pytest.fixture
+def engine():
+    calls = {"slow": 0, "fast": 0, "child": 0}
+
+    def slow(sections):
+        calls["slow"] += 1
+        time.sleep(0.2)
+        return {"peer_id": "QmStandIn"}
+
+    def fast(sections):
+        calls["fast"] += 1
+        return {"tick": calls["fast"]}
+
+    def child(sections):
+        calls["child"] += 1
+        return {"of": sections.get("slow", {}).get("value", {}).get("peer_id")}
+
+    engine = StatusSnapshot(
+        # child waits for slow within the same collection
+        {"child": child, "slow": slow, "fast": fast},
+        {"slow": 60, "fast": 0.1, "child": 3600},
+        depends={"child": "slow"},
+    )
+    engine.calls = calls
+    engine.start()
+    deadline = time.monotonic() + 5
+    while engine.missing() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.5)
+    yield engine
+    engine.stop()
+
+
+def test_sections_refresh_on_their_own_schedule(engine):
+    assert engine.calls["slow"] == 1
+    assert engine.calls["child"] == 1
+    assert engine.calls["fast"] > 1
+
+
+def test_dependent_section_sees_parent_value(engine):
+    assert engine.snapshot()["sections"]["child"]["value"] == {"of": "QmStandIn"}
+
+
+def test_renders_are_a_memory_read(engine):
+    renders = 10000
+    start = time.perf_counter()
+    for _ in range(renders):
+        sections = engine.snapshot()["sections"]
+        " | ".join(
+            f"{name}={section['value']} ({format_age(time.time() - section['updated_at'])})"
+            for name, section in sections.items()
+        )
+    render_ms = (time.perf_counter() - start) * 1000 / renders
+    assert render_ms < 1
+    assert engine.calls["slow"] == 1
+
+
+def test_format_age():
+    assert format_age(None) == "—"
+    assert format_age(12.5) == "12s"
+    assert format_age(300) == "5m"
+    assert format_age(3 * 3600 + 5) == "3h"
+
+
+@pytest.fixture
+def collected():
+    delays = {"api": 0.2, "log": 0.05, "peer_name": 0.4, "peer_id": 0.3, "eoa": 0.5, "hung": 5.0}
+
+    def probe(name):
+        def run(sections):
+            time.sleep(delays[name])
+            return {"probe": name, "parent": sections.get("peer_id", {}).get("value")}
+        return run
+
+    start = time.perf_counter()
+    results = collect_sections(
+        {name: probe(name) for name in delays}, depends={"eoa": "peer_id"}, deadline=1.0,
+        sections={"hung": {"value": {"probe": "hung"}, "updated_at": time.time() - 120}},
+    )
+    return results, time.perf_counter() - start
+
+
+def test_collection_honours_the_deadline(collected):
+    _results, elapsed = collected
+    assert elapsed < 1.2
+
+
+def test_timed_out_section_keeps_last_value(collected):
+    results, _elapsed = collected
+    assert results["hung"]["error"] == "timed out"
+    assert results["hung"]["value"] == {"probe": "hung"}
+
+
+def test_finished_sections_are_kept(collected):
+    results, _elapsed = collected
+    assert all(not results[name]["error"] for name in results if name != "hung")
+
+
+def test_dependent_collector_sees_new_parent_value(collected):
+    results, _elapsed = collected
+    assert results["eoa"]["value"]["parent"] == {"probe": "peer_id", "parent": None}
+
+
+def test_failed_collector_keeps_last_value():
+    def broken(sections):
+        raise ConnectionError("rpc down")
+
+    results = collect_sections({"eoa": broken}, sections={"eoa": {"value": "0xabc", "updated_at": 1.0}})
+    assert results["eoa"]["error"] == "rpc down"
+    assert results["eoa"]["value"] == "0xabc"
@@ -0,0 +1,93 @@
+"""Background system sampler with stand-in readings"""
+
+import time
+from collections import namedtuple
+
+import psutil
+import pytest
+
+from system_sampler import METRICS, SystemSampler, _cpu_busy_total
+
+CpuTimes = namedtuple("CpuTimes", "user nice system idle iowait guest guest_nice")
+
+
+@pytest.fixture
+def replayed():
+    step = {"i": 0}
+    probe_calls = {"count": 0}
+
+    def stand_in_sample():
+        step["i"] += 1
+        return {metric: float(step["i"] % 100) for metric in METRICS}
+
+    def probe(sections):
+        probe_calls["count"] += 1
+        return True
+
+    sampler = SystemSampler({"gensyn_running": probe}, interval=5, probe_interval=15, read_sample=stand_in_sample)
+    # Replay 15 minutes of samples on a simulated clock
+    now = time.time() - 900
+    for _ in range(180):
+        sampler.sample(now)
+        now += 5
+    sampler.probe_calls = probe_calls
+    return sampler
+
+
+def test_samples_are_aggregated_per_window(replayed):
+    windows = replayed.status()["windows"]
+    assert windows["1m"]["samples"] == 13
+    assert windows["5m"]["samples"] == 61
+    assert windows["15m"]["samples"] == 180
+    assert windows["1m"]["cpu_percent"] == {"min": 68.0, "max": 80.0, "avg": 74.0}
+
+
+def test_probes_run_on_their_own_cadence(replayed):
+    assert replayed.probe_calls["count"] == 60
+    assert replayed.probe("gensyn_running") is True
+    assert replayed.probe("missing") == "unknown"
+
+
+def test_status_reads_are_a_memory_read(replayed):
+    reads = 100000
+    start = time.perf_counter()
+    for _ in range(reads):
+        replayed.status()
+        replayed.probe("gensyn_running")
+    assert (time.perf_counter() - start) * 1e6 / reads < 5
+
+
+def test_failed_probe_keeps_its_last_value():
+    state = {"fail": False}
+
+    def probe(sections):
+        if state["fail"]:
+            raise ConnectionError("down")
+        return "running"
+
+    sampler = SystemSampler({"gensyn": probe}, interval=5, probe_interval=0, read_sample=dict)
+    sampler.sample()
+    state["fail"] = True
+    sampler.sample()
+    assert sampler.probe("gensyn") == "running"
+    assert sampler.status()["probes"]["gensyn"]["error"] == "down"
+
+
+def test_cpu_busy_total_leaves_out_guest_and_iowait():
+    busy, total = _cpu_busy_total(CpuTimes(10, 2, 5, 80, 3, 4, 1))
+    assert total == 100
+    assert busy == 17
+
+
+def test_cpu_percent_uses_its_own_baseline(monkeypatch):
+    reading = {"times": CpuTimes(10, 0, 0, 90, 0, 0, 0)}
+    monkeypatch.setattr(psutil, "cpu_times", lambda percpu=False: reading["times"])
+
+    def shared_baseline(*args, **kwargs):
+        raise AssertionError("psutil.cpu_percent shares its baseline with every other caller")
+
+    monkeypatch.setattr(psutil, "cpu_percent", shared_baseline)
+    sampler = SystemSampler()
+    assert sampler._read_psutil()["cpu_percent"] is None
+    reading["times"] = CpuTimes(35, 0, 0, 115, 0, 0, 0)
+    assert sampler._read_psutil()["cpu_percent"] == 50.0
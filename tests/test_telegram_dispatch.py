@@ -0,0 +1,71 @@
+"""Telegram dispatcher with stand-in handlers"""
+
+import threading
+import time
+
+from telegram_dispatch import Dispatcher, format_metrics
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_per_action_limit_is_enforced():
+    dispatcher = Dispatcher(workers=4, action_limits={"tmate": 1})
+    release = threading.Event()
+    accepted = [dispatcher.submit("tmate", release.wait) for _ in range(3)]
+    release.set()
+    assert accepted == [True, False, False]
+    assert dispatcher.metrics()["rejected"] == 2
+
+
+def test_limit_frees_up_when_the_action_finishes():
+    dispatcher = Dispatcher(workers=2, action_limits={"tmate": 1})
+    assert dispatcher.submit("tmate", lambda: None)
+    assert wait_for(lambda: dispatcher.metrics()["completed"] == 1)
+    assert dispatcher.submit("tmate", lambda: None)
+
+
+def test_slow_action_does_not_stall_fast_taps():
+    dispatcher = Dispatcher(workers=4, action_limits={"tmate": 1})
+    release = threading.Event()
+    latency = []
+
+    def fast(submitted_at):
+        latency.append((time.perf_counter() - submitted_at) * 1000)
+
+    dispatcher.submit("tmate", release.wait)
+    for _ in range(20):
+        assert dispatcher.submit("check_ip", fast, time.perf_counter())
+        time.sleep(0.01)
+    assert wait_for(lambda: len(latency) == 20)
+    release.set()
+    assert max(latency) < 100
+
+
+def test_full_queue_rejects():
+    dispatcher = Dispatcher(workers=1, queue_limit=1, default_limit=10)
+    release = threading.Event()
+    assert dispatcher.submit("a", release.wait)
+    assert wait_for(lambda: dispatcher.metrics()["running"] == 1)
+    assert dispatcher.submit("a", lambda: None)
+    assert not dispatcher.submit("a", lambda: None)
+    release.set()
+
+
+def test_metrics_count_errors_and_latency():
+    dispatcher = Dispatcher(workers=1)
+
+    def broken():
+        raise RuntimeError("boom")
+
+    dispatcher.submit("broken", broken)
+    dispatcher.submit("ok", lambda: None)
+    assert wait_for(lambda: dispatcher.metrics()["completed"] == 1 and dispatcher.metrics()["errors"] == 1)
+    metrics = dispatcher.metrics()
+    assert set(metrics["actions"]) == {"broken", "ok"}
+    assert metrics["actions"]["ok"]["count"] == 1
+    assert "❌ Errors: 1" in format_metrics(metrics)
@@ -0,0 +1,99 @@
+"""Outbound Telegram queue with a stand-in sender"""
+
+import time
+
+import pytest
+
+from telegram_outbox import TelegramOutbox, retry_after_seconds
+
+
+class StandInRateLimit(Exception):
+    """Shaped like telebot's ApiTelegramException for a 429"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Too Many Requests: retry after {retry_after}")
+        self.error_code = 429
+        self.result_json = {"parameters": {"retry_after": retry_after}}
+
+
+class StandInSender:
+    def __init__(self, limited=()):
+        self.sent = []
+        self.limited = set(limited)
+
+    def __call__(self, chat_id, text, **kwargs):
+        if chat_id in self.limited:
+            self.limited.discard(chat_id)
+            raise StandInRateLimit(0.5)
+        self.sent.append((time.time(), chat_id, text, kwargs))
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "telegram_outbox.json")
+
+
+def drain(outbox, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while outbox.pending() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return outbox.pending()
+
+
+def test_pending_messages_survive_a_restart(path):
+    sender = StandInSender()
+    before_restart = TelegramOutbox(sender, path)
+    before_restart.send(1, "🔑 login reminder", parse_mode="HTML")
+    before_restart.send(2, "⚠️ other chat")
+
+    outbox = TelegramOutbox(sender, path)
+    assert outbox.pending() == 2
+    outbox.start()
+    assert drain(outbox) == 0
+    assert [(chat_id, text, kwargs) for _ts, chat_id, text, kwargs in sender.sent] == [
+        (1, "🔑 login reminder", {"parse_mode": "HTML"}),
+        (2, "⚠️ other chat", {}),
+    ]
+
+
+def test_retry_after_is_honoured_for_that_chat_only(path):
+    sender = StandInSender(limited={1})
+    outbox = TelegramOutbox(sender, path, per_chat_interval=0.05)
+    start = time.time()
+    outbox.send(1, "first")
+    outbox.send(2, "other chat")
+    outbox.start()
+    assert drain(outbox) == 0
+    sent_at = {chat_id: ts - start for ts, chat_id, _text, _kwargs in sender.sent}
+    assert outbox.stats["rate_limited"] == 1
+    assert sent_at[1] >= 0.5
+    assert sent_at[2] < 0.5
+
+
+def test_per_chat_rate_is_respected(path):
+    sender = StandInSender()
+    outbox = TelegramOutbox(sender, path, per_chat_interval=0.2)
+    for i in range(4):
+        outbox.send(1, f"message {i}")
+    outbox.start()
+    assert drain(outbox) == 0
+    times = [ts for ts, _chat_id, _text, _kwargs in sender.sent]
+    assert [text for _ts, _chat_id, text, _kwargs in sender.sent] == [f"message {i}" for i in range(4)]
+    assert all(b - a >= 0.19 for a, b in zip(times, times[1:]))
+
+
+def test_alert_burst_is_merged_into_a_digest(path):
+    sender = StandInSender()
+    outbox = TelegramOutbox(sender, path, digest_window=0.3)
+    outbox.start()
+    for i in range(20):
+        outbox.send(1, f"⚠️ IP changed: 10.0.0.{i}", coalesce=True)
+    assert drain(outbox) == 0
+    assert len(sender.sent) == 1
+    assert sender.sent[0][2].startswith("🔔 20 updates\n")
+    assert outbox.stats["coalesced"] == 19
+
+
+def test_retry_after_seconds():
+    assert retry_after_seconds(StandInRateLimit(7)) == 7.0
+    assert retry_after_seconds(ConnectionError("down")) is None
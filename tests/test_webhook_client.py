@@ -0,0 +1,232 @@
+"""Webhook sender against a stand-in n8n endpoint"""
+
+import atexit
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from webhook_client import WebhookClient
+from wire_codec import JSON, MSGPACK, decode_body, msgpack_available
+
+
+class StandInEndpoint(BaseHTTPRequestHandler):
+    """Decodes every POST like n8n would; messages containing "malformed" get a 400"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        state = self.server.state
+        body = decode_body(self.rfile.read(int(self.headers["Content-Length"])),
+                           self.headers["Content-Type"], self.headers.get("Content-Encoding"))
+        state["encodings"].append((self.headers["Content-Type"], self.headers.get("Content-Encoding")))
+        events = body["data"]["events"] if body["message_type"] == "batch" else [body]
+        messages = [event["data"]["message"] for event in events]
+        time.sleep(state["delay"])
+        state["attempts"].append(time.monotonic())
+        state["posts"].append(len(messages))
+        status = 400 if "malformed" in messages else state["status"]
+        if status == 200:
+            state["received"].extend(messages)
+        state["connections"].add(self.client_address)
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def endpoint():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInEndpoint)
+    server.state = {
+        "status": 200, "delay": 0.0, "attempts": [], "posts": [], "encodings": [],
+        "received": [], "connections": set(), "url": f"http://127.0.0.1:{server.server_port}/webhook",
+    }
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.state
+    server.shutdown()
+
+
+def kill(client):
+    """Stop a client the way a dying process would: no flush, outbox released"""
+    with client._cond:
+        client._retry_at = float("inf")
+    atexit.unregister(client.close)
+    client.outbox.close()
+
+
+@pytest.fixture
+def new_client(endpoint, tmp_path):
+    outbox_file = str(tmp_path / "webhook_outbox.log")
+    clients = []
+
+    def new_client():
+        client = WebhookClient(outbox_file=outbox_file)
+        config = {"webhook_url": endpoint["url"], "vps_name": "test", "vps_id": "test",
+                  "auth_token": "test", "enabled": True}
+        client.config_manager.config.update(config)
+        client.config.update(config)
+        client.backoff_base, client.backoff_max = 0.05, 0.4
+        clients.append(client)
+        return client
+
+    yield new_client
+    for client in clients:
+        kill(client)
+
+
+def test_sends_return_without_waiting_for_delivery(endpoint, new_client):
+    endpoint["delay"] = 0.01
+    client = new_client()
+    start = time.perf_counter()
+    for i in range(200):
+        client.send_notification("test", f"message {i}")
+    # Blocking sends would take at least two seconds
+    assert time.perf_counter() - start < 0.2
+    assert client.flush(timeout=60)
+
+
+def test_payloads_are_delivered_in_order(endpoint, new_client):
+    client = new_client()
+    for i in range(200):
+        client.send_notification("test", f"message {i}")
+    assert client.flush(timeout=60)
+    assert endpoint["received"] == [f"message {i}" for i in range(200)]
+    assert client.metrics()["sent"] == 200
+
+
+def test_one_connection_is_reused(endpoint, new_client):
+    client = new_client()
+    for i in range(50):
+        client.send_notification("test", f"message {i}")
+    assert client.flush(timeout=60)
+    assert len(endpoint["connections"]) == 1
+
+
+def test_retries_back_off_while_n8n_is_down(endpoint, new_client):
+    endpoint["status"] = 503
+    client = new_client()
+    client.send_notification("test", "outage 0")
+    time.sleep(1.5)
+    gaps = [b - a for a, b in zip(endpoint["attempts"], endpoint["attempts"][1:])]
+    assert gaps
+    assert gaps[-1] > gaps[0] * 3
+    assert max(gaps) < 0.6
+    assert not endpoint["received"]
+    assert client.metrics()["queue_depth"] == 1
+
+
+def test_outage_backlog_is_replayed_after_a_restart(endpoint, new_client):
+    endpoint["status"] = 503
+    client = new_client()
+    for i in range(20):
+        client.send_notification("test", f"outage {i}")
+    time.sleep(0.3)
+    kill(client)
+
+    endpoint["status"] = 200
+    restarted = new_client()
+    restarted.send_notification("test", "after restart")
+    assert restarted.flush(timeout=30)
+    assert endpoint["received"] == [f"outage {i}" for i in range(20)] + ["after restart"]
+    assert restarted.metrics()["outbox"]["recovered"] == 20
+
+
+def test_rejected_payload_does_not_block_the_outbox(endpoint, new_client):
+    client = new_client()
+    client.send_notification("test", "before")
+    client.send_notification("test", "malformed")
+    client.send_notification("test", "after")
+    assert client.flush(timeout=10)
+    assert endpoint["received"] == ["before", "after"]
+    assert client.metrics()["rejected"] == 1
+
+
+def test_full_batches_go_out_at_once(endpoint, new_client):
+    client = new_client()
+    client.batch_max_events, client.batch_max_delay = 50, 5.0
+    start = time.perf_counter()
+    for i in range(100):
+        client.send_notification("test", f"batched {i}")
+    assert client.flush(timeout=10)
+    assert time.perf_counter() - start < 2
+    assert endpoint["posts"] == [50, 50]
+    assert endpoint["received"] == [f"batched {i}" for i in range(100)]
+    assert client.metrics()["batches"] == 2
+
+
+def test_short_batch_waits_for_the_delay(endpoint, new_client):
+    client = new_client()
+    client.batch_max_events, client.batch_max_delay = 50, 0.2
+    start = time.perf_counter()
+    for i in range(5):
+        client.send_notification("test", f"trickle {i}")
+    assert client.flush(timeout=5)
+    assert 0.2 <= time.perf_counter() - start < 0.8
+    assert endpoint["posts"] == [5]
+
+
+def test_rejected_batch_is_resent_event_by_event(endpoint, new_client):
+    client = new_client()
+    client.batch_max_events, client.batch_max_delay = 50, 0.2
+    messages = [f"batched {i}" for i in range(120)]
+    messages.insert(70, "malformed")
+    for message in messages:
+        client.send_notification("test", message)
+    assert client.flush(timeout=30)
+    posts = endpoint["posts"]
+    assert posts[:2] == [50, 50]
+    assert posts[2:52] == [1] * 50
+    assert posts[-1] == 21
+    assert endpoint["received"] == [message for message in messages if message != "malformed"]
+    assert client.metrics()["rejected"] == 1
+
+
+def test_batch_envelope_is_sent_once():
+    envelope = {"vps_name": "test", "vps_id": "test", "auth_token": "test"}
+    entries = [
+        {"seq": i, "payload": {**envelope, "timestamp": f"t{i}", "message_type": "notification", "data": {"i": i}}}
+        for i in range(3)
+    ]
+    payload = WebhookClient._batch_payload(entries)
+    assert payload["message_type"] == "batch"
+    assert {field: payload[field] for field in envelope} == envelope
+    assert payload["data"] == {
+        "count": 3,
+        "events": [{"timestamp": f"t{i}", "message_type": "notification", "data": {"i": i}} for i in range(3)],
+    }
+
+
+LOG_LINES = [f"2025-09-03 12:00:{i:02d} - INFO - hivemind_exp.runner - Joining round: {1200 + i // 10}" for i in range(50)]
+
+
+def test_large_requests_are_compressed(endpoint, new_client):
+    client = new_client()
+    client.request_encoding = "gzip"
+    client.send_notification("test", "small")
+    client.send_notification("test", "\n".join(LOG_LINES))
+    assert client.flush(timeout=5)
+    assert endpoint["received"] == ["small", "\n".join(LOG_LINES)]
+    assert endpoint["encodings"] == [(JSON, None), (JSON, "gzip")]
+    metrics = client.metrics()
+    assert metrics["wire_bytes"] < metrics["body_bytes"] * 0.75
+
+
+def test_requests_are_plain_json_by_default(endpoint, new_client):
+    client = new_client()
+    client.send_notification("test", "\n".join(LOG_LINES))
+    assert client.flush(timeout=5)
+    assert endpoint["encodings"] == [(JSON, None)]
+
+
+@pytest.mark.skipif(not msgpack_available(), reason="msgpack is not installed")
+def test_msgpack_requests(endpoint, new_client):
+    client = new_client()
+    client.content_type, client.request_encoding = MSGPACK, "gzip"
+    client.send_notification("test", "\n".join(LOG_LINES))
+    assert client.flush(timeout=5)
+    assert endpoint["received"] == ["\n".join(LOG_LINES)]
+    assert endpoint["encodings"] == [(MSGPACK, "gzip")]
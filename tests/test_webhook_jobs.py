@@ -0,0 +1,129 @@
+"""Webhook background jobs with stand-in handlers"""
+
+import threading
+import time
+
+import pytest
+
+from command_stream import stream_command
+from webhook_jobs import (
+    JOB_CANCELLED, JOB_FAILED, JOB_INTERRUPTED, JOB_QUEUED, JOB_SUCCEEDED, FINISHED_STATES,
+    JobFailed, JobManager, JobQueueFull,
+)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "webhook_jobs.json")
+
+
+def install(params, job):
+    for step in range(params["steps"]):
+        job.notify(f"⏳ step {step}")
+        ok, out, _ = stream_command("sleep 0.1; echo working", job.progress, interval=0, cancel=job.cancel)
+        if not ok:
+            raise JobFailed(f"step {step} failed: {out}")
+    return "Installation completed"
+
+
+def hang(params, job):
+    _ok, out, _ = stream_command("sleep 30", cancel=job.cancel)
+    return out
+
+
+def wait_finished(manager, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while manager.get(job_id)["status"] not in FINISHED_STATES and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return manager.get(job_id)
+
+
+def test_submit_returns_at_once(path):
+    manager = JobManager(path=path)
+    start = time.perf_counter()
+    job = manager.submit("install_gensyn", install, {"steps": 3}, request_id="n8n-1")
+    assert (time.perf_counter() - start) * 1000 < 50
+    assert job["status"] not in FINISHED_STATES
+    assert job["request_id"] == "n8n-1"
+    wait_finished(manager, job["id"])
+
+
+def test_cursor_polling_returns_each_step_once(path):
+    manager = JobManager(path=path)
+    job = manager.submit("install_gensyn", install, {"steps": 5})
+    cursor, seen = 0, []
+    while True:
+        polled = manager.get(job["id"], since=cursor)
+        seen.extend(step["text"] for step in polled["steps"])
+        cursor = polled["next_cursor"]
+        if polled["status"] in FINISHED_STATES:
+            break
+        time.sleep(0.05)
+    assert seen == [f"⏳ step {i}" for i in range(5)]
+    assert polled["status"] == JOB_SUCCEEDED
+    assert polled["result"] == "Installation completed"
+    assert "working" in polled["output"]
+
+
+def test_job_failed_finishes_as_failed(path):
+    def broken(params, job):
+        raise JobFailed("step 0 failed")
+
+    manager = JobManager(path=path)
+    job = wait_finished(manager, manager.submit("install_gensyn", broken)["id"])
+    assert job["status"] == JOB_FAILED
+    assert job["result"] == "step 0 failed"
+
+
+def test_cancel_stops_a_running_command(path):
+    manager = JobManager(path=path)
+    job = manager.submit("soft_update", hang)
+    time.sleep(0.2)
+    start = time.perf_counter()
+    assert manager.cancel(job["id"])["cancel_requested"]
+    assert wait_finished(manager, job["id"])["status"] == JOB_CANCELLED
+    assert time.perf_counter() - start < 2
+
+
+def test_cancel_before_start(path):
+    release = threading.Event()
+    manager = JobManager(workers=1, path=path)
+    manager.submit("soft_update", lambda params, job: release.wait())
+    queued = manager.submit("hard_update", install, {"steps": 1})
+    assert queued["status"] == JOB_QUEUED
+    assert manager.cancel(queued["id"])["status"] == JOB_CANCELLED
+    release.set()
+
+
+def test_full_queue_is_refused(path):
+    release = threading.Event()
+    manager = JobManager(workers=1, path=path, queue_limit=1)
+    manager.submit("soft_update", lambda params, job: release.wait())
+    time.sleep(0.1)
+    manager.submit("soft_update", lambda params, job: "done")
+    with pytest.raises(JobQueueFull):
+        manager.submit("soft_update", lambda params, job: "done")
+    release.set()
+
+
+def test_on_finish_is_called(path):
+    finished = []
+    manager = JobManager(path=path, on_finish=finished.append)
+    job = wait_finished(manager, manager.submit("install_gensyn", install, {"steps": 1})["id"])
+    deadline = time.monotonic() + 2
+    while not finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [(entry["id"], entry["status"]) for entry in finished] == [(job["id"], JOB_SUCCEEDED)]
+
+
+def test_history_survives_a_restart(path):
+    release = threading.Event()
+    manager = JobManager(path=path)
+    done = wait_finished(manager, manager.submit("install_gensyn", install, {"steps": 1})["id"])
+    running = manager.submit("soft_update", lambda params, job: release.wait())
+    time.sleep(0.1)
+
+    reloaded = JobManager(path=path)
+    history = {job["id"]: job["status"] for job in reloaded.list()}
+    assert history == {done["id"]: JOB_SUCCEEDED, running["id"]: JOB_INTERRUPTED}
+    release.set()
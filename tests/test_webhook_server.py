@@ -0,0 +1,66 @@
+"""Telegram webhook route with a stand-in bot"""
+
+import asyncio
+import json
+
+import pytest
+
+from webhook_server import WebhookServer
+
+SECRET = "stand-in-secret"
+UPDATE = {"update_id": 7, "message": {"message_id": 1, "date": 0, "chat": {"id": 42, "type": "private"},
+                                      "from": {"id": 42, "is_bot": False, "first_name": "Stand"}, "text": "/start"}}
+
+
+class StandInBot:
+    def __init__(self):
+        self.updates = []
+
+    def process_new_updates(self, updates):
+        self.updates.extend(updates)
+
+
+@pytest.fixture
+def post():
+    """POST UPDATE to a path of a webhook server with the Telegram route enabled"""
+    bot = StandInBot()
+    server = WebhookServer()
+    server.enable_telegram_webhook(bot, SECRET)
+
+    def post(path, headers):
+        body = json.dumps(UPDATE).encode()
+        sent = []
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "POST", "path": path, "raw_path": path.encode(), "query_string": b"",
+                 "scheme": "http", "server": ("127.0.0.1", 8080), "client": ("127.0.0.1", 50000),
+                 "http_version": "1.1", "root_path": "",
+                 "headers": [(b"content-type", b"application/json")] +
+                            [(key.lower().encode(), value.encode()) for key, value in headers.items()]}
+        asyncio.run(server.app(scope, receive, send))
+        return sent[0]["status"]
+
+    post.bot = bot
+    return post
+
+
+def test_update_reaches_the_bot(post):
+    assert post(f"/telegram/{SECRET}", {"X-Telegram-Bot-Api-Secret-Token": SECRET}) == 200
+    assert [update.update_id for update in post.bot.updates] == [7]
+    assert post.bot.updates[0].message.text == "/start"
+
+
+@pytest.mark.parametrize("headers", [{}, {"X-Telegram-Bot-Api-Secret-Token": "wrong"}])
+def test_missing_or_wrong_secret_header_is_forbidden(post, headers):
+    assert post(f"/telegram/{SECRET}", headers) == 403
+    assert post.bot.updates == []
+
+
+def test_other_paths_are_not_routed(post):
+    assert post("/telegram/wrong", {"X-Telegram-Bot-Api-Secret-Token": SECRET}) == 404
+    assert post.bot.updates == []
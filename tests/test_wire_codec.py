@@ -0,0 +1,128 @@
+"""Webhook wire encoding with a stand-in ASGI app"""
+
+import asyncio
+import json
+
+import pytest
+
+from wire_codec import (
+    JSON, MSGPACK, WireEncodingMiddleware, _bench_payloads, choose_content_type, choose_encoding,
+    decode_body, encode_body, msgpack_available, serialize,
+)
+
+PAYLOADS = _bench_payloads()
+LOGS = PAYLOADS["get_logs 500 lines"]
+SMALL = PAYLOADS["heartbeat delta"]
+COMMAND = {"command": "get_logs", "parameters": {"lines": 500}, "auth_token": "t", "request_id": "bot-1"}
+
+needs_msgpack = pytest.mark.skipif(not msgpack_available(), reason="msgpack is not installed")
+
+
+@pytest.fixture
+def call():
+    """Call the middleware around an app answering /logs with LOGS and anything else with SMALL"""
+    received = {}
+
+    async def app(scope, receive, send):
+        message = await receive()
+        received["body"] = message.get("body", b"")
+        received["content_type"] = dict(scope["headers"]).get(b"content-type")
+        response = serialize(LOGS if scope["path"] == "/logs" else SMALL)
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", JSON.encode()), (b"content-length", str(len(response)).encode())]})
+        await send({"type": "http.response.body", "body": response})
+
+    middleware = WireEncodingMiddleware(app)
+
+    def call(path, headers, body=b""):
+        sent = []
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "path": path,
+                 "headers": [(key.lower().encode(), value.encode()) for key, value in headers.items()]}
+        asyncio.run(middleware(scope, receive, send))
+        response_headers = {key.decode(): value.decode() for key, value in sent[0]["headers"]}
+        return sent[0]["status"], response_headers, b"".join(message.get("body", b"") for message in sent[1:])
+
+    call.received = received
+    call.middleware = middleware
+    return call
+
+
+def test_encoding_negotiation():
+    assert choose_encoding("gzip, deflate, br") == "gzip"
+    assert choose_encoding("gzip;q=0, identity") is None
+    assert choose_encoding(None) is None
+    assert choose_content_type("application/json") == JSON
+    assert choose_content_type(None) == JSON
+
+
+@needs_msgpack
+def test_msgpack_is_chosen_when_preferred():
+    assert choose_content_type("application/msgpack, application/json;q=0.5") == MSGPACK
+    assert choose_content_type("application/msgpack;q=0.5, application/json") == JSON
+
+
+def test_large_body_round_trips_compressed():
+    body, headers = encode_body(LOGS, JSON, "gzip")
+    assert headers["Content-Encoding"] == "gzip"
+    assert len(body) < len(serialize(LOGS)) / 2
+    assert decode_body(body, JSON, "gzip") == LOGS
+
+
+def test_small_body_is_not_compressed():
+    _body, headers = encode_body(SMALL, JSON, "gzip")
+    assert "Content-Encoding" not in headers
+
+
+@needs_msgpack
+def test_msgpack_body_round_trips():
+    body, _headers = encode_body(LOGS, MSGPACK, "gzip")
+    assert decode_body(body, MSGPACK, "gzip") == LOGS
+
+
+def test_response_is_compressed_when_accepted(call):
+    _status, headers, wire = call("/logs", {"accept-encoding": "gzip"})
+    assert headers["content-encoding"] == "gzip"
+    assert int(headers["content-length"]) == len(wire)
+    assert decode_body(wire, JSON, "gzip") == LOGS
+    assert call.middleware.stats["encoded"] == 1
+
+
+def test_small_response_is_left_alone(call):
+    _status, headers, wire = call("/status", {"accept-encoding": "gzip"})
+    assert "content-encoding" not in headers
+    assert json.loads(wire) == SMALL
+
+
+def test_response_is_plain_without_accept_encoding(call):
+    _status, headers, wire = call("/logs", {})
+    assert "content-encoding" not in headers
+    assert json.loads(wire) == LOGS
+
+
+def test_compressed_request_is_decoded_before_the_app(call):
+    body, headers = encode_body(COMMAND, JSON, "gzip", min_size=0)
+    call("/webhook/command", headers, body)
+    assert json.loads(call.received["body"]) == COMMAND
+    assert call.received["content_type"] == JSON.encode()
+
+
+@needs_msgpack
+def test_msgpack_request_and_response(call):
+    body, headers = encode_body(COMMAND, MSGPACK, "gzip", min_size=0)
+    _status, response_headers, wire = call("/logs", {**headers, "accept": MSGPACK, "accept-encoding": "gzip"}, body)
+    assert json.loads(call.received["body"]) == COMMAND
+    assert response_headers["content-type"] == MSGPACK
+    assert decode_body(wire, MSGPACK, "gzip") == LOGS
+
+
+def test_undecodable_request_is_refused(call):
+    status, _headers, _wire = call("/webhook/command", {"content-encoding": "gzip"}, b"not gzip")
+    assert status == 400
+    assert "body" not in call.received
@@ -18,9 +18,12 @@ else
     echo "bot.py not found, skipping removal"
 fi
 
-# Change to the bot directory and download the new bot.py
+# Change to the bot directory and download the new bot.py and the modules it imports
 cd "$HOME/gensyn-bot/" || { echo "Failed to cd into $HOME/gensyn-bot"; exit 1; }
-wget https://raw.githubusercontent.com/shairkhan2/gensyn-bot/refs/heads/main/bot.py -O bot.py
+BOT_MODULES="bot.py log_tail.py log_follower.py round_history.py fs_watch.py http_client.py peer_cache.py eoa_store.py chain_client.py status_snapshot.py gensyn_core.py telegram_dispatch.py telegram_outbox.py live_message.py command_stream.py system_sampler.py webhook_server.py webhook_config.py webhook_jobs.py command_pools.py wire_codec.py"
+for module in $BOT_MODULES; do
+    wget https://raw.githubusercontent.com/shairkhan2/gensyn-bot/refs/heads/main/$module -O $module
+done
 
 # Enable and start the bot.service
 echo "Enabling and starting bot.service..."
@@ -9,12 +9,12 @@ import time
 import threading
 import subprocess
 import logging
-import requests
 import shutil
 import json
 import re
 import html
 import asyncio
+import tempfile
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
 
@@ -26,33 +26,18 @@ sys.path.append('/root/gensyn-bot')
 from webhook_config import WebhookConfig
 from webhook_client import WebhookClient
 from webhook_server import WebhookServer
+from webhook_jobs import JobContext, JobFailed, JOB_SUCCEEDED
+from log_follower import get_log_follower
+from round_history import get_round_history
+import http_client
+from peer_cache import get_peer_cache, split_peer_id
 
-# Import reusable functions from original bot
-try:
-    from bot import (
-        get_cached_peer_info, parse_peer_info_from_swarm_log, write_cached_peer_info,
-        backup_user_data, backup_user_data_sync, run_command, install_gensyn,
-        setup_autostart, gensyn_soft_update, gensyn_hard_update, send_backup_files,
-        check_gensyn_screen_running, start_gensyn_session, get_gensyn_log_status,
-        check_gensyn_api, format_gensyn_status, start_vpn, stop_vpn,
-        # Constants
-        BOT_CONFIG, WG_CONFIG_PATH, SWARM_PEM_PATH, USER_DATA_PATH, USER_APIKEY_PATH,
-        BACKUP_USERDATA_DIR, SYNC_BACKUP_DIR, GENSYN_LOG_PATH, WANDB_LOG_DIR,
-        PEER_CACHE_FILE
-    )
-except ImportError as e:
-    logging.error(f"Failed to import from original bot: {e}")
-    # Define fallback constants
-    BOT_CONFIG = "/root/bot_config.env"
-    WG_CONFIG_PATH = "/etc/wireguard/wg0.conf"
-    SWARM_PEM_PATH = "/root/rl-swarm/swarm.pem"
-    USER_DATA_PATH = "/root/rl-swarm/modal-login/temp-data/userData.json"
-    USER_APIKEY_PATH = "/root/rl-swarm/modal-login/temp-data/userApiKey.json"
-    BACKUP_USERDATA_DIR = "/root/gensyn-bot/backup-userdata"
-    SYNC_BACKUP_DIR = "/root/gensyn-bot/sync-backup"
-    GENSYN_LOG_PATH = "/root/rl-swarm/logs/swarm_launcher.log"
-    WANDB_LOG_DIR = "/root/rl-swarm/logs/wandb"
-    PEER_CACHE_FILE = "/root/gensyn-bot/peer_info.json"
+# Side-effect-free core: importing it reads no config and starts no threads
+from gensyn_core import (
+    get_cached_peer_info, backup_user_data_sync, install_gensyn, setup_autostart,
+    gensyn_soft_update, gensyn_hard_update, check_gensyn_api, ensure_directories, get_status_snapshot,
+    WANDB_LOG_DIR, BACKUP_FILES
+)
 
 class WebhookBot:
     def __init__(self):
@@ -86,20 +71,18 @@ class WebhookBot:
     
     def _ensure_directories(self):
         """Ensure required directories exist"""
-        directories = [BACKUP_USERDATA_DIR, SYNC_BACKUP_DIR]
-        for directory in directories:
-            os.makedirs(directory, exist_ok=True)
+        ensure_directories()
     
     def _register_custom_handlers(self):
         """Register custom command handlers with the webhook server"""
         
-        def gensyn_login(params: Dict[str, Any]) -> str:
+        def gensyn_login(params: Dict[str, Any], job: JobContext) -> str:
             """Handle Gensyn login process"""
             email = params.get("email")
             otp = params.get("otp")
             
             if not email and not otp:
-                return "Email and OTP required for login"
+                raise JobFailed("Email and OTP required for login")
             
             try:
                 # Clear any previous state
@@ -121,63 +104,51 @@ class WebhookBot:
                 signup_script = "/root/gensyn-bot/signup.py"
                 venv_site_packages = "/root/gensyn-bot/.venv/lib/python3.12/site-packages"
                 
-                process = subprocess.Popen(
-                    [venv_python, signup_script],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    env={**os.environ, "PYTHONPATH": venv_site_packages}
-                )
-                
-                # Wait for completion with timeout
-                try:
-                    stdout, _ = process.communicate(timeout=300)  # 5 minute timeout
-                    if process.returncode == 0:
-                        return "Login process completed successfully"
-                    else:
-                        return f"Login failed: {stdout.decode()}"
-                except subprocess.TimeoutExpired:
-                    process.kill()
-                    return "Login process timed out"
+                job.notify("⏳ Running signup...")
+                with tempfile.TemporaryFile() as output:
+                    process = subprocess.Popen(
+                        [venv_python, signup_script],
+                        stdout=output,
+                        stderr=subprocess.STDOUT,
+                        env={**os.environ, "PYTHONPATH": venv_site_packages}
+                    )
+                    
+                    # Wait for completion with timeout, checking for cancellation
+                    deadline = time.time() + 300  # 5 minute timeout
+                    while process.poll() is None:
+                        if job.cancel.wait(1):
+                            process.kill()
+                            return "Login cancelled"
+                        if time.time() > deadline:
+                            process.kill()
+                            raise JobFailed("Login process timed out")
+                    output.seek(0)
+                    stdout = output.read().decode(errors="replace")
+                if process.returncode == 0:
+                    return "Login process completed successfully"
+                raise JobFailed(f"Login failed: {stdout}")
                     
+            except JobFailed:
+                raise
             except Exception as e:
-                return f"Login error: {str(e)}"
+                raise JobFailed(f"Login error: {str(e)}")
         
         def set_autostart(params: Dict[str, Any]) -> str:
             """Setup autostart service"""
             try:
-                # Use the original setup_autostart function but capture output
-                import io
-                from contextlib import redirect_stdout, redirect_stderr
-                
-                f = io.StringIO()
-                with redirect_stdout(f), redirect_stderr(f):
-                    setup_autostart(None)  # Pass None instead of chat_id
-                
-                output = f.getvalue()
-                if "error" in output.lower() or "failed" in output.lower():
-                    return f"Autostart setup failed: {output}"
+                ok, message = setup_autostart()
+                if not ok:
+                    return f"Autostart setup failed: {message}"
                 else:
                     return "Autostart configured successfully"
             except Exception as e:
                 return f"Error setting up autostart: {str(e)}"
         
-        def install_gensyn_cmd(params: Dict[str, Any]) -> str:
+        def install_gensyn_cmd(params: Dict[str, Any], job: JobContext) -> str:
             """Install Gensyn prerequisites"""
-            try:
-                # Run installation in a separate thread to avoid blocking
-                def install_worker():
-                    install_gensyn(None)  # Pass None instead of chat_id
-                
-                install_thread = threading.Thread(target=install_worker)
-                install_thread.start()
-                install_thread.join(timeout=1800)  # 30 minute timeout
-                
-                if install_thread.is_alive():
-                    return "Installation is taking longer than expected but is still running"
-                else:
-                    return "Installation completed"
-            except Exception as e:
-                return f"Installation error: {str(e)}"
+            if not install_gensyn(job.notify, job.progress, job.cancel):
+                raise JobFailed("Installation failed, see the job steps")
+            return "Installation completed"
         
         def toggle_monitoring(params: Dict[str, Any]) -> str:
             """Toggle system monitoring"""
@@ -205,9 +176,7 @@ class WebhookBot:
             """Get backup files info"""
             try:
                 files_info = []
-                backup_files = [SWARM_PEM_PATH, USER_DATA_PATH, USER_APIKEY_PATH]
-                
-                for file_path in backup_files:
+                for file_path in BACKUP_FILES:
                     if os.path.exists(file_path):
                         stat = os.stat(file_path)
                         files_info.append({
@@ -225,49 +194,36 @@ class WebhookBot:
             except Exception as e:
                 return f"Error getting backup info: {str(e)}"
         
-        def soft_update(params: Dict[str, Any]) -> str:
+        def soft_update(params: Dict[str, Any], job: JobContext) -> str:
             """Perform soft update of Gensyn"""
-            try:
-                def update_worker():
-                    gensyn_soft_update(None)  # Pass None instead of chat_id
-                
-                update_thread = threading.Thread(target=update_worker)
-                update_thread.start()
-                update_thread.join(timeout=600)  # 10 minute timeout
-                
-                if update_thread.is_alive():
-                    return "Soft update is taking longer than expected but is still running"
-                else:
-                    return "Soft update completed"
-            except Exception as e:
-                return f"Soft update error: {str(e)}"
+            if not gensyn_soft_update(job.notify, job.progress, job.cancel):
+                raise JobFailed("Soft update failed, backup restored")
+            return "Soft update completed"
         
-        def hard_update(params: Dict[str, Any]) -> str:
+        def hard_update(params: Dict[str, Any], job: JobContext) -> str:
             """Perform hard update of Gensyn"""
-            try:
-                def update_worker():
-                    gensyn_hard_update(None)  # Pass None instead of chat_id
-                
-                update_thread = threading.Thread(target=update_worker)
-                update_thread.start()
-                update_thread.join(timeout=600)  # 10 minute timeout
-                
-                if update_thread.is_alive():
-                    return "Hard update is taking longer than expected but is still running"
-                else:
-                    return "Hard update completed"
-            except Exception as e:
-                return f"Hard update error: {str(e)}"
+            if not gensyn_hard_update(job.notify, job.progress, job.cancel):
+                raise JobFailed("Hard update failed, backup restored")
+            return "Hard update completed"
+        
+        def job_finished(job: Dict[str, Any]):
+            """Report finished jobs to n8n, so it does not have to poll"""
+            self.webhook_client.send_command_response(
+                job["command"], job["status"] == JOB_SUCCEEDED, job["result"] or job["status"],
+                job["duration"], job_id=job["id"]
+            )
         
         # Register all custom handlers
-        self.webhook_server.register_command_handler("gensyn_login", gensyn_login)
+        self.webhook_server.register_job_handler("gensyn_login", gensyn_login)
         self.webhook_server.register_command_handler("set_autostart", set_autostart)
-        self.webhook_server.register_command_handler("install_gensyn", install_gensyn_cmd)
+        self.webhook_server.register_job_handler("install_gensyn", install_gensyn_cmd)
         self.webhook_server.register_command_handler("toggle_monitoring", toggle_monitoring)
         self.webhook_server.register_command_handler("toggle_reward_monitoring", toggle_reward_monitoring)
         self.webhook_server.register_command_handler("get_backup_files", get_backup_files)
-        self.webhook_server.register_command_handler("soft_update", soft_update)
-        self.webhook_server.register_command_handler("hard_update", hard_update)
+        self.webhook_server.register_job_handler("soft_update", soft_update)
+        self.webhook_server.register_job_handler("hard_update", hard_update)
+        self.webhook_server.jobs.on_finish = job_finished
+        self.webhook_server.register_metrics("webhook_client", self.webhook_client.metrics)
     
     def _start_background_tasks(self):
         """Start background monitoring tasks"""
@@ -295,6 +251,12 @@ class WebhookBot:
                     time.sleep(60)
         
         threading.Thread(target=send_heartbeat, daemon=True).start()
+        
+        # Keep the status snapshot warm for gensyn_status and /status
+        get_status_snapshot().start()
+        
+        # Index swarm_launcher.log rounds in the background; round_history only reads the index
+        get_round_history()
     
     def start_monitoring(self):
         """Start system monitoring"""
@@ -311,6 +273,18 @@ class WebhookBot:
             last_stale_sent_ts = None
             previous_localhost_alive = None
             
+            # Track log activity from follower events instead of re-reading the log
+            log_follower = get_log_follower()
+            initial_log = log_follower.get_status() or {}
+            log_state = {"latest_ts": initial_log.get("timestamp")}
+            
+            def on_log_event(event):
+                if not log_state["latest_ts"] or event["timestamp"] > log_state["latest_ts"]:
+                    log_state["latest_ts"] = event["timestamp"]
+            
+            log_follower.subscribe(on_log_event)
+            log_follower.start()
+            
             while self.monitoring_active:
                 try:
                     # 1. API status monitoring
@@ -318,7 +292,7 @@ class WebhookBot:
                     
                     # 1a. Localhost:3000 status
                     try:
-                        response = requests.get("http://localhost:3000", timeout=3)
+                        response = http_client.get("http://localhost:3000", timeout=3, retries=0)
                         localhost_alive = "Sign in to Gensyn" in response.text
                     except Exception:
                         localhost_alive = False
@@ -334,7 +308,7 @@ class WebhookBot:
                     
                     # 2. IP change monitoring
                     try:
-                        ip = requests.get('https://api.ipify.org', timeout=10).text.strip()
+                        ip = http_client.get('https://api.ipify.org', timeout=10, retries=0).text.strip()
                     except:
                         ip = "Unknown"
                     
@@ -356,9 +330,8 @@ class WebhookBot:
                     previous_alive = alive
                     
                     # 3. Log freshness monitoring
-                    log_data = get_gensyn_log_status()
-                    if log_data and log_data.get("timestamp"):
-                        latest_ts = log_data["timestamp"]
+                    latest_ts = log_state["latest_ts"]
+                    if latest_ts:
                         if (datetime.utcnow() - latest_ts > timedelta(minutes=240)):
                             if not last_stale_sent_ts or last_stale_sent_ts != latest_ts:
                                 self.webhook_client.send_notification(
@@ -398,6 +371,8 @@ class WebhookBot:
                 except Exception as e:
                     self.logger.error(f"Monitor error: {str(e)}")
                     time.sleep(10)
+            
+            log_follower.unsubscribe(on_log_event)
         
         self.monitor_thread = threading.Thread(target=monitor, daemon=True)
         self.monitor_thread.start()
@@ -433,13 +408,8 @@ class WebhookBot:
                     # Resolve peer_id from name if not available
                     if not peer_id and peer_name:
                         try:
-                            from urllib.parse import quote_plus
-                            name_url = f"https://dashboard.gensyn.ai/api/v1/peer?name={quote_plus(peer_name)}"
-                            r_name = requests.get(name_url, timeout=10)
-                            if r_name.status_code == 200:
-                                record = r_name.json()
-                                raw_peer_id = record.get("peerId") or ""
-                                peer_id = raw_peer_id.split("|")[-1] if "|" in raw_peer_id else raw_peer_id or None
+                            record = get_peer_cache().get_by_name(peer_name)
+                            peer_id = split_peer_id(record.get("peerId"))
                         except Exception:
                             pass
                     
@@ -450,11 +420,8 @@ class WebhookBot:
                     
                     # Fetch metrics by peer id
                     try:
-                        from urllib.parse import quote_plus
-                        id_url = f"https://dashboard.gensyn.ai/api/v1/peer?id={quote_plus(peer_id)}"
-                        r = requests.get(id_url, timeout=10)
-                        if r.status_code == 200:
-                            data = r.json()
+                        data = get_peer_cache().get_by_id(peer_id, allow_stale=False)
+                        if data:
                             reward = data.get("reward", 0)
                             score = data.get("score", 0)
                             
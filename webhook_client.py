@@ -4,20 +4,54 @@ Webhook Client for Gensyn Bot
 Handles sending status updates, notifications, and logs to the n8n server
 """
 
-import json
 import time
+import atexit
 import logging
+import threading
 import requests
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+from requests.adapters import HTTPAdapter
 from webhook_config import WebhookConfig
+from webhook_outbox import WebhookOutbox, outbox_path, MAX_ENTRIES, MAX_BYTES, MAX_AGE
+from heartbeat_delta import HeartbeatEncoder
+from wire_codec import serialize, compress_body, decode_body, available_encodings, msgpack_available, JSON, MSGPACK, COMPRESS_MIN_BYTES
+
+# Undelivered payloads are kept here until n8n accepts them
+DEFAULT_OUTBOX = outbox_path("webhook")
+# Seconds to connect and to wait for n8n's response
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+# Seconds queued payloads get to go out when the process exits; the rest wait in the outbox
+EXIT_FLUSH_TIMEOUT = 5
+# Delay before retrying after a failed send, doubling per failure up to the maximum
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 300.0
+# Responses that will not succeed on retry; the payload is dropped instead of blocking the outbox
+REJECTED_STATUSES = (400, 413, 422)
+# Batching, enabled with the batch key of webhook_config.json: queued events go out
+# together as one batch message once BATCH_MAX_EVENTS are waiting or the oldest
+# has waited BATCH_MAX_DELAY_MS
+BATCH_MAX_EVENTS = 50
+BATCH_MAX_DELAY_MS = 500
+# A batch stops growing before this many bytes of queued payloads
+BATCH_MAX_BYTES = 256 * 1024
+# Fields shared by every event of a batch, sent once in its envelope
+ENVELOPE_FIELDS = ("vps_name", "vps_id", "auth_token")
+
+# _send_webhook outcomes
+DELIVERED = "delivered"
+RETRY = "retry"
+REJECTED = "rejected"
 
 class WebhookClient:
-    def __init__(self, config_file: Optional[str] = None):
+    def __init__(self, config_file: Optional[str] = None, outbox_file: Optional[str] = DEFAULT_OUTBOX):
         self.config_manager = WebhookConfig()
         self.config = self.config_manager.get_config()
         self.session = requests.Session()
-        self.session.timeout = 30
+        # One kept-alive connection to n8n, reused by the sender thread
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
         
         # Setup logging
         logging.basicConfig(
@@ -26,6 +60,54 @@ class WebhookClient:
             format='%(asctime)s - %(levelname)s - %(message)s'
         )
         self.logger = logging.getLogger(__name__)
+        
+        # Heartbeats between full snapshots only carry what changed
+        self.heartbeats = HeartbeatEncoder()
+        
+        # Retention can be changed with the outbox key of webhook_config.json
+        retention = self.config.get("outbox", {})
+        self.outbox = WebhookOutbox(
+            outbox_file,
+            max_entries=int(retention.get("max_entries", MAX_ENTRIES)),
+            max_bytes=int(retention.get("max_mb", MAX_BYTES / 1024 / 1024) * 1024 * 1024),
+            max_age=float(retention.get("max_age_hours", MAX_AGE / 3600)) * 3600,
+            on_drop=self._on_lost,
+        )
+        self.backoff_base = BACKOFF_BASE
+        self.backoff_max = BACKOFF_MAX
+        batch = self.config.get("batch", {})
+        if batch.get("enabled"):
+            self.batch_max_events = int(batch.get("max_events", BATCH_MAX_EVENTS))
+            self.batch_max_delay = float(batch.get("max_delay_ms", BATCH_MAX_DELAY_MS)) / 1000
+        else:
+            self.batch_max_events, self.batch_max_delay = 1, 0.0
+        # Request bodies are plain JSON unless the wire key of webhook_config.json asks
+        # for compression ("requests": "gzip") or msgpack ("content_type": "msgpack")
+        wire = self.config.get("wire", {})
+        self.request_encoding = wire.get("requests") or None
+        if self.request_encoding not in (None, *available_encodings()):
+            self.logger.warning(f"Request encoding {self.request_encoding} is not available, using gzip")
+            self.request_encoding = "gzip"
+        self.content_type = MSGPACK if wire.get("content_type") == "msgpack" else JSON
+        if self.content_type == MSGPACK and not msgpack_available():
+            self.logger.warning("msgpack is not installed, sending JSON")
+            self.content_type = JSON
+        self.compress_min_bytes = int(wire.get("min_bytes", COMPRESS_MIN_BYTES))
+        # Events of a rejected batch, up to this seq, are resent one by one
+        self._unbatch_through = 0
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._failures = 0
+        self._retry_at = 0.0
+        self._thread = None
+        self.stats = {
+            "queued": 0, "sent": 0, "batches": 0, "retries": 0, "rejected": 0,
+            "latency_ms_avg": 0.0, "latency_ms_max": 0.0, "last_error": None,
+            "body_bytes": 0, "wire_bytes": 0,
+        }
+        # Payloads left over from before a restart go out first
+        if len(self.outbox):
+            self.start()
     
     def is_enabled(self) -> bool:
         """Check if webhook client is enabled and configured"""
@@ -45,41 +127,206 @@ class WebhookClient:
         }
         return payload
     
-    def _send_webhook(self, payload: Dict[str, Any], retries: int = 3) -> bool:
-        """Send webhook with retry logic"""
+    def _enqueue(self, payload: Dict[str, Any]) -> bool:
+        """
+        Append a payload to the outbox for the sender thread and return at
+        once. Returns True once queued; the outbox's retention limits drop
+        the oldest payloads when n8n has been unreachable for long.
+        """
+        self.start()
+        self.outbox.append(payload)
+        with self._cond:
+            self.stats["queued"] += 1
+            self._cond.notify()
+        return True
+    
+    def start(self):
+        """Start the sender thread; safe to call more than once"""
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run_sender, name="webhook-sender", daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+    
+    def _next_batch(self) -> List[Dict[str, Any]]:
+        """
+        Wait for the oldest pending payloads whose retry time has come. With
+        batching on, the oldest waits up to batch_max_delay for more events
+        unless a full batch is already queued. fsyncs new appends meanwhile.
+        """
+        while True:
+            # One fsync per interval covers everything appended meanwhile
+            self.outbox.sync()
+            with self._cond:
+                entry = self.outbox.peek()
+                wait = self._retry_at - time.monotonic()
+                batching = entry is not None and self.batch_max_events > 1 and entry["seq"] > self._unbatch_through
+                if batching and wait <= 0 and len(self.outbox) < self.batch_max_events:
+                    wait = entry["at"] + self.batch_max_delay - time.time()
+                if entry is not None and wait <= 0:
+                    entries = self.outbox.head(self.batch_max_events if batching else 1, BATCH_MAX_BYTES)
+                    envelope = [entry["payload"].get(field) for field in ENVELOPE_FIELDS]
+                    for count, queued in enumerate(entries):
+                        if [queued["payload"].get(field) for field in ENVELOPE_FIELDS] != envelope:
+                            entries = entries[:count]
+                            break
+                    self._in_flight += 1
+                    return entries
+                self._cond.wait(self.outbox.fsync_interval if entry is None else min(wait, self.outbox.fsync_interval))
+    
+    def _on_lost(self, payload: Dict[str, Any]):
+        """A payload will never reach n8n; after a lost heartbeat the next one must be a full snapshot"""
+        if payload.get("message_type") == "heartbeat":
+            self.heartbeats.request_full()
+    
+    def _on_response(self, response: requests.Response):
+        """n8n answers {"resync": true} when a heartbeat delta did not follow the state it holds"""
+        try:
+            body = decode_body(response.content, response.headers.get("Content-Type"))
+        except Exception:
+            return
+        if isinstance(body, dict) and body.get("resync"):
+            self.logger.info("n8n asked for a full heartbeat snapshot")
+            self.heartbeats.request_full()
+    
+    @staticmethod
+    def _batch_payload(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """One batch message carrying the events of entries, which share one envelope"""
+        first = entries[0]["payload"]
+        return {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "message_type": "batch",
+            **{field: first.get(field) for field in ENVELOPE_FIELDS},
+            "data": {
+                "count": len(entries),
+                "events": [
+                    {
+                        "timestamp": entry["payload"].get("timestamp"),
+                        "message_type": entry["payload"].get("message_type"),
+                        "data": entry["payload"].get("data"),
+                    }
+                    for entry in entries
+                ],
+            },
+        }
+    
+    def _run_sender(self):
+        """Deliver the outbox in order; a failed payload is retried with backoff before anything after it"""
+        while True:
+            entries = self._next_batch()
+            payload = entries[0]["payload"] if len(entries) == 1 else self._batch_payload(entries)
+            try:
+                outcome = self._send_webhook(payload)
+            except Exception as e:
+                outcome = RETRY
+                self.logger.error(f"Webhook sender error: {str(e)}")
+            if outcome == REJECTED and len(entries) > 1:
+                # One bad event must not take the rest of the batch with it
+                self._unbatch_through = entries[-1]["seq"]
+                with self._cond:
+                    self._in_flight -= 1
+                    self._cond.notify_all()
+                continue
+            if outcome != RETRY:
+                for entry in entries:
+                    self.outbox.ack(entry["seq"])
+                    if outcome == REJECTED:
+                        self._on_lost(entry["payload"])
+            with self._cond:
+                self._in_flight -= 1
+                if outcome == RETRY:
+                    self._failures += 1
+                    self.stats["retries"] += 1
+                    delay = min(self.backoff_base * 2 ** (self._failures - 1), self.backoff_max)
+                    self._retry_at = time.monotonic() + delay
+                else:
+                    self._failures = 0
+                    self._retry_at = 0.0
+                    if outcome == REJECTED:
+                        self.stats["rejected"] += 1
+                    else:
+                        if len(entries) > 1:
+                            self.stats["batches"] += 1
+                        now = time.time()
+                        for entry in entries:
+                            # Measured from queueing, so time spent in the outbox across restarts counts
+                            latency_ms = (now - entry["at"]) * 1000
+                            self.stats["sent"] += 1
+                            self.stats["latency_ms_avg"] += (latency_ms - self.stats["latency_ms_avg"]) / self.stats["sent"]
+                            self.stats["latency_ms_max"] = max(self.stats["latency_ms_max"], latency_ms)
+                self._cond.notify_all()
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the outbox is empty; False on timeout, with the rest still in the outbox"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while len(self.outbox) or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining if remaining is None else min(remaining, 0.5))
+        return True
+    
+    def close(self):
+        """Give queued payloads EXIT_FLUSH_TIMEOUT to go out, then fsync the outbox"""
+        self.flush(EXIT_FLUSH_TIMEOUT)
+        self.outbox.close()
+    
+    def metrics(self) -> Dict[str, Any]:
+        """Outbox depth and disk use, delivery counters, backoff and queue-to-delivery latency"""
+        with self._cond:
+            stats = dict(self.stats, latency_ms_avg=round(self.stats["latency_ms_avg"], 1),
+                         latency_ms_max=round(self.stats["latency_ms_max"], 1))
+            retry_in = max(self._retry_at - time.monotonic(), 0)
+            return {
+                "queue_depth": len(self.outbox),
+                "in_flight": self._in_flight,
+                "retry_in": round(retry_in, 1),
+                **stats,
+                "outbox": self.outbox.metrics(),
+            }
+    
+    def _send_webhook(self, payload: Dict[str, Any]) -> str:
+        """Post one payload to n8n; returns DELIVERED, RETRY or REJECTED. Runs on the sender thread"""
         webhook_url = self.config.get("webhook_url")
         if not webhook_url:
             self.logger.error("Webhook URL not configured")
-            return False
-        
-        headers = {
-            "Content-Type": "application/json",
-            "User-Agent": f"gensyn-bot-webhook/{self.config.get('vps_id', 'unknown')}"
-        }
+            self.stats["last_error"] = "Webhook URL not configured"
+            return RETRY
         
-        for attempt in range(retries):
-            try:
-                response = self.session.post(
-                    webhook_url,
-                    json=payload,
-                    headers=headers,
-                    timeout=30
-                )
-                
-                if response.status_code == 200:
-                    self.logger.info(f"Webhook sent successfully: {payload['message_type']}")
-                    return True
-                else:
-                    self.logger.warning(f"Webhook failed with status {response.status_code}: {response.text}")
-                    
-            except Exception as e:
-                self.logger.error(f"Webhook send error (attempt {attempt + 1}): {str(e)}")
+        try:
+            body = serialize(payload, self.content_type)
+            data, headers = compress_body(body, self.content_type, self.request_encoding, self.compress_min_bytes)
+            headers.update({
+                "Accept": f"{MSGPACK}, {JSON};q=0.9" if self.content_type == MSGPACK else JSON,
+                "User-Agent": f"gensyn-bot-webhook/{self.config.get('vps_id', 'unknown')}"
+            })
+            self.stats["body_bytes"] += len(body)
+            self.stats["wire_bytes"] += len(data)
+            response = self.session.post(
+                webhook_url,
+                data=data,
+                headers=headers,
+                timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+            )
+            
+            if response.status_code == 200:
+                self._on_response(response)
+                self.logger.info(f"Webhook sent successfully: {payload['message_type']}"
+                                 + (f" of {payload['data']['count']} events" if payload['message_type'] == "batch" else ""))
+                return DELIVERED
+            self.stats["last_error"] = f"HTTP {response.status_code}"
+            if response.status_code in REJECTED_STATUSES:
+                self.logger.error(f"Webhook {payload['message_type']} rejected with status {response.status_code}, dropped: {response.text}")
+                return REJECTED
+            self.logger.warning(f"Webhook failed with status {response.status_code}: {response.text}")
                 
-            if attempt < retries - 1:
-                time.sleep(2 ** attempt)  # Exponential backoff
+        except Exception as e:
+            self.logger.error(f"Webhook send error: {str(e)}")
+            self.stats["last_error"] = str(e)
         
-        self.logger.error(f"Failed to send webhook after {retries} attempts")
-        return False
+        return RETRY
     
     def send_status_update(self, status_data: Dict[str, Any]) -> bool:
         """Send general status update"""
@@ -87,7 +334,7 @@ class WebhookClient:
             return False
             
         payload = self._prepare_payload("status_update", status_data)
-        return self._send_webhook(payload)
+        return self._enqueue(payload)
     
     def send_gensyn_status(self, gensyn_data: Dict[str, Any]) -> bool:
         """Send Gensyn-specific status"""
@@ -95,7 +342,7 @@ class WebhookClient:
             return False
             
         payload = self._prepare_payload("gensyn_status", gensyn_data)
-        return self._send_webhook(payload)
+        return self._enqueue(payload)
     
     def send_notification(self, notification_type: str, message: str, priority: str = "normal") -> bool:
         """Send notification message"""
@@ -108,7 +355,7 @@ class WebhookClient:
             "priority": priority
         }
         payload = self._prepare_payload("notification", data)
-        return self._send_webhook(payload)
+        return self._enqueue(payload)
     
     def send_reward_update(self, reward_data: Dict[str, Any]) -> bool:
         """Send reward/win update"""
@@ -116,7 +363,7 @@ class WebhookClient:
             return False
             
         payload = self._prepare_payload("reward_update", reward_data)
-        return self._send_webhook(payload)
+        return self._enqueue(payload)
     
     def send_error_alert(self, error_type: str, error_message: str, context: Dict[str, Any] = None) -> bool:
         """Send error alert"""
@@ -129,9 +376,10 @@ class WebhookClient:
             "context": context or {}
         }
         payload = self._prepare_payload("error_alert", data)
-        return self._send_webhook(payload)
+        return self._enqueue(payload)
     
-    def send_command_response(self, command: str, success: bool, result: str, execution_time: float = None) -> bool:
+    def send_command_response(self, command: str, success: bool, result: str, execution_time: float = None,
+                              job_id: Optional[str] = None) -> bool:
         """Send command execution response"""
         if not self.is_enabled():
             return False
@@ -142,8 +390,10 @@ class WebhookClient:
             "result": result,
             "execution_time": execution_time
         }
+        if job_id:
+            data["job_id"] = job_id
         payload = self._prepare_payload("command_response", data)
-        return self._send_webhook(payload)
+        return self._enqueue(payload)
     
     def send_log_update(self, log_type: str, log_data: str, level: str = "info") -> bool:
         """Send log update"""
@@ -156,19 +406,19 @@ class WebhookClient:
             "level": level
         }
         payload = self._prepare_payload("log_update", data)
-        return self._send_webhook(payload)
+        return self._enqueue(payload)
     
     def send_heartbeat(self) -> bool:
-        """Send heartbeat to indicate VPS is alive"""
+        """Send heartbeat to indicate VPS is alive; only changed fields between full snapshots"""
         if not self.is_enabled():
             return False
             
-        data = {
+        data = self.heartbeats.encode({
             "uptime": self._get_uptime(),
             "system_info": self._get_system_info()
-        }
+        })
         payload = self._prepare_payload("heartbeat", data)
-        return self._send_webhook(payload)
+        return self._enqueue(payload)
     
     def _get_uptime(self) -> str:
         """Get system uptime"""
@@ -219,6 +469,11 @@ def test_webhook_client():
     }
     success = client.send_status_update(status_data)
     print(f"Status Update: {'✅' if success else '❌'}")
+    
+    # The sends above were only queued; wait for delivery
+    delivered = client.flush(timeout=120)
+    metrics = client.metrics()
+    print(f"Delivered: {'✅' if delivered and not metrics['rejected'] else '❌'} {metrics}")
 
 if __name__ == "__main__":
     test_webhook_client()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Background jobs for the Gensyn Bot webhook server
+Long-running commands (install, updates, login) run as jobs: submitting
+returns a job id at once, and the caller polls the job for its status and
+progress or cancels it instead of holding an HTTP request open for minutes.
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, List, Optional
+
+JOBS_FILE = "/root/gensyn-bot/webhook_jobs.json"
+# Jobs running at once; up to JOB_QUEUE_LIMIT more wait, beyond that submit() is refused
+JOB_WORKERS = 2
+JOB_QUEUE_LIMIT = 8
+# Finished jobs kept for polling and history
+JOB_HISTORY = 100
+# Step lines kept per job; older lines are dropped but still counted
+JOB_STEP_LINES = 200
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+# Queued or running when the process stopped
+JOB_INTERRUPTED = "interrupted"
+FINISHED_STATES = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED, JOB_INTERRUPTED)
+
+logger = logging.getLogger(__name__)
+
+
+class JobFailed(Exception):
+    """Raised by a job handler to finish the job as failed with this message"""
+
+
+class JobQueueFull(Exception):
+    """Raised by submit() when JOB_QUEUE_LIMIT jobs are already waiting"""
+
+
+class JobContext:
+    """
+    Passed to job handlers. notify() appends a step line, progress()
+    replaces the latest command output, and cancel is set when the job is
+    cancelled; handlers pass it on to the commands they run.
+    """
+
+    def __init__(self, manager: "JobManager", job_id: str):
+        self.manager = manager
+        self.job_id = job_id
+        self.cancel = threading.Event()
+
+    def notify(self, text: str):
+        self.manager._add_step(self.job_id, text)
+
+    def progress(self, text: str):
+        self.manager._set_output(self.job_id, text)
+
+
+# A job handler gets the command parameters and its context and returns the result text
+JobHandler = Callable[[Dict[str, Any], JobContext], str]
+
+
+class JobManager:
+    """
+    Runs jobs on a small worker pool and keeps their state in memory:
+    status, step lines (read incrementally with a cursor), the latest
+    command output, result and timings. Job state is written to path on
+    every status change, so history survives restarts; jobs that were
+    queued or running when the process stopped are reported as
+    interrupted. on_finish(job) is called when a job finishes.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, history: int = JOB_HISTORY, path: Optional[str] = JOBS_FILE,
+                 on_finish: Optional[Callable[[Dict[str, Any]], None]] = None, queue_limit: int = JOB_QUEUE_LIMIT):
+        self.history = history
+        self.queue_limit = queue_limit
+        self.path = path
+        self.on_finish = on_finish
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="webhook-job")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._contexts: Dict[str, JobContext] = {}
+        self._load()
+
+    # Persistence
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                jobs = json.load(f).get("jobs", [])
+            for job in jobs:
+                if job["status"] not in FINISHED_STATES:
+                    job["status"] = JOB_INTERRUPTED
+                    job["finished_at"] = job.get("finished_at") or time.time()
+                self._jobs[job["id"]] = job
+        except Exception as e:
+            logger.error(f"Error loading webhook jobs: {str(e)}")
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"jobs": list(self._jobs.values())}, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Error saving webhook jobs: {str(e)}")
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job["status"] in FINISHED_STATES]
+        for job_id in finished[:max(len(finished) - self.history, 0)]:
+            del self._jobs[job_id]
+
+    # Submitting and cancelling
+    def submit(self, command: str, handler: JobHandler, parameters: Optional[Dict[str, Any]] = None,
+               request_id: Optional[str] = None) -> Dict[str, Any]:
+        """Queue a job and return its summary at once; raises JobQueueFull when the queue is full"""
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            "id": job_id,
+            "command": command,
+            "request_id": request_id,
+            "status": JOB_QUEUED,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "steps": [],
+            "steps_dropped": 0,
+            "output": "",
+            "result": None,
+            "cancel_requested": False,
+        }
+        context = JobContext(self, job_id)
+        with self._lock:
+            queued = sum(1 for entry in self._jobs.values() if entry["status"] == JOB_QUEUED)
+            if queued >= self.queue_limit:
+                raise JobQueueFull(f"{queued} jobs are already waiting, retry later")
+            self._jobs[job_id] = job
+            self._contexts[job_id] = context
+            self._save()
+        self._executor.submit(self._run, job_id, handler, dict(parameters or {}), context)
+        return self.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a queued or running job; returns the job, or None if unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job["status"] in (JOB_QUEUED, JOB_RUNNING):
+                job["cancel_requested"] = True
+                self._contexts[job_id].cancel.set()
+                if job["status"] == JOB_QUEUED:
+                    self._finish(job, JOB_CANCELLED, "Cancelled before it started")
+                self._save()
+        return self.get(job_id)
+
+    # Running
+    def _run(self, job_id: str, handler: JobHandler, parameters: Dict[str, Any], context: JobContext):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] != JOB_QUEUED:
+                self._contexts.pop(job_id, None)
+                return
+            job["status"] = JOB_RUNNING
+            job["started_at"] = time.time()
+            self._save()
+        try:
+            result = handler(parameters, context)
+            status = JOB_CANCELLED if context.cancel.is_set() else JOB_SUCCEEDED
+        except JobFailed as e:
+            status, result = JOB_FAILED, str(e)
+        except Exception as e:
+            logging.error(f"Job {job_id} ({job['command']}) error: {str(e)}")
+            status, result = JOB_FAILED, f"Error: {str(e)}"
+        with self._lock:
+            self._finish(job, status, result)
+            self._save()
+
+    def _finish(self, job: Dict[str, Any], status: str, result: Any):
+        job["status"] = status
+        job["result"] = result if result is None or isinstance(result, str) else str(result)
+        job["finished_at"] = time.time()
+        self._contexts.pop(job["id"], None)
+        self._prune()
+        if self.on_finish:
+            # Called from the job thread; on_finish must not block on the manager
+            threading.Thread(target=self._notify_finish, args=(self._summary(job),), daemon=True).start()
+
+    def _notify_finish(self, summary: Dict[str, Any]):
+        try:
+            self.on_finish(summary)
+        except Exception as e:
+            logger.error(f"Job finish callback error: {str(e)}")
+
+    def _add_step(self, job_id: str, text: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job["steps"].append({"at": time.time(), "text": text})
+            overflow = len(job["steps"]) - JOB_STEP_LINES
+            if overflow > 0:
+                del job["steps"][:overflow]
+                job["steps_dropped"] += overflow
+
+    def _set_output(self, job_id: str, text: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job["output"] = text
+
+    # Reading
+    @staticmethod
+    def _summary(job: Dict[str, Any]) -> Dict[str, Any]:
+        started = job["started_at"]
+        end = job["finished_at"] or time.time()
+        return {
+            "id": job["id"],
+            "command": job["command"],
+            "request_id": job["request_id"],
+            "status": job["status"],
+            "created_at": job["created_at"],
+            "started_at": started,
+            "finished_at": job["finished_at"],
+            "duration": round(end - started, 2) if started else None,
+            "result": job["result"],
+            "cancel_requested": job["cancel_requested"],
+        }
+
+    def get(self, job_id: str, since: int = 0) -> Optional[Dict[str, Any]]:
+        """
+        The job's summary with the step lines from cursor since onward and
+        next_cursor to pass next time, or None if the job is unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            dropped = job["steps_dropped"]
+            steps = job["steps"][max(since - dropped, 0):]
+            return {
+                **self._summary(job),
+                "steps": [dict(step) for step in steps],
+                "next_cursor": dropped + len(job["steps"]),
+                "output": job["output"],
+            }
+
+    def list(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Summaries of the newest jobs first"""
+        with self._lock:
+            jobs = list(self._jobs.values())[-limit:]
+            return [self._summary(job) for job in reversed(jobs)]
+
+    def metrics(self) -> Dict[str, int]:
+        """Number of known jobs in each status"""
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+            return counts
+
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Durable outbox for the Gensyn Bot webhook client
+Payloads for n8n are appended to a log file before they are sent and marked
+done once n8n acknowledges them, so reward updates and alerts queued while
+n8n is down are replayed in order after it comes back, even across restarts.
+"""
+
+import os
+import json
+import time
+import fcntl
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Callable, List, Optional
+
+OUTBOX_DIR = "/root/gensyn-bot"
+# Seconds between fsyncs; appends reach the file at once, fsync makes them survive power loss
+FSYNC_INTERVAL = 1.0
+# Retention: beyond any of these the oldest pending payloads are dropped
+MAX_ENTRIES = 5000
+MAX_BYTES = 20 * 1024 * 1024
+MAX_AGE = 7 * 24 * 3600
+# The file is rewritten with only pending payloads once it holds this many
+# finished records and they outnumber the pending ones
+COMPACT_AFTER = 1000
+
+logger = logging.getLogger(__name__)
+
+
+def outbox_path(name: str) -> str:
+    """One outbox file per sending process, e.g. webhook or reward"""
+    return os.path.join(OUTBOX_DIR, f"webhook_outbox-{name}.log")
+
+
+class WebhookOutbox:
+    """
+    An append-only log of JSON lines: {"seq", "at", "payload"} when a payload
+    is queued and {"ack": seq} once it is delivered or dropped. On open the
+    log is replayed to find pending payloads (a line torn by a crash is
+    skipped) and compacted. Appends are written straight away; sync() fsyncs
+    everything appended since the last call and is called by the sender, so
+    one fsync covers a burst. With path None the outbox is memory only; it
+    also falls back to memory when another process holds the file.
+    """
+
+    def __init__(self, path: Optional[str], fsync_interval: float = FSYNC_INTERVAL,
+                 max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES, max_age: float = MAX_AGE,
+                 on_drop: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.path = path
+        self.on_drop = on_drop
+        self.fsync_interval = fsync_interval
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._pending: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._pending_bytes = 0
+        self._finished_records = 0
+        self._file_bytes = 0
+        self._next_seq = 1
+        self._file = None
+        self._lock_file = None
+        self._dirty = False
+        self._last_sync = 0.0
+        self.stats = {"appended": 0, "acked": 0, "dropped": 0, "recovered": 0, "fsyncs": 0, "compactions": 0}
+        if self.path:
+            self._open()
+
+    # Opening and replay
+    def _open(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._lock_file = open(f"{self.path}.lock", "w")
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError as e:
+            logger.error(f"Webhook outbox {self.path} unavailable, keeping payloads in memory: {str(e)}")
+            if self._lock_file:
+                self._lock_file.close()
+                self._lock_file = None
+            self.path = None
+            return
+        self._load()
+        self._enforce_retention(time.time())
+        self._compact()
+        self.stats["recovered"] = len(self._pending)
+        if self._pending:
+            logger.info(f"Webhook outbox recovered {len(self._pending)} undelivered payloads")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn by a crash mid-append; it was never acknowledged to anyone
+                    continue
+                if "ack" in record:
+                    entry = self._pending.pop(record["ack"], None)
+                    if entry:
+                        self._pending_bytes -= entry["size"]
+                elif "seq" in record:
+                    record["size"] = len(line)
+                    self._pending[record["seq"]] = record
+                    self._pending_bytes += record["size"]
+                    self._next_seq = max(self._next_seq, record["seq"] + 1)
+
+    def _compact(self):
+        """Rewrite the file with only the pending payloads"""
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            for entry in self._pending.values():
+                f.write(self._encode({"seq": entry["seq"], "at": entry["at"], "payload": entry["payload"]}))
+            f.flush()
+            os.fsync(f.fileno())
+        if self._file:
+            self._file.close()
+        os.replace(tmp_path, self.path)
+        dir_fd = os.open(os.path.dirname(self.path) or ".", os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+        self._file = open(self.path, "ab")
+        self._file_bytes = self._pending_bytes
+        self._finished_records = 0
+        self._dirty = False
+        self.stats["compactions"] += 1
+
+    @staticmethod
+    def _encode(record: Dict[str, Any]) -> bytes:
+        return (json.dumps(record, separators=(",", ":")) + "\n").encode()
+
+    def _write(self, line: bytes, durable: bool = True):
+        if self._file:
+            self._file.write(line)
+            self._file.flush()
+            self._file_bytes += len(line)
+            self._dirty = self._dirty or durable
+
+    # Queueing and acknowledging
+    def append(self, payload: Dict[str, Any]) -> int:
+        """Add a payload at the end of the outbox and return its sequence number"""
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            entry = {"seq": seq, "at": time.time(), "payload": payload}
+            line = self._encode(entry)
+            entry["size"] = len(line)
+            try:
+                self._write(line)
+            except OSError as e:
+                logger.error(f"Webhook outbox write error, payload kept in memory only: {str(e)}")
+            self._pending[seq] = entry
+            self._pending_bytes += entry["size"]
+            self.stats["appended"] += 1
+            self._enforce_retention(entry["at"])
+            return seq
+
+    def peek(self) -> Optional[Dict[str, Any]]:
+        """The oldest pending entry, {"seq", "at", "payload"}, or None"""
+        with self._lock:
+            return next(iter(self._pending.values()), None)
+
+    def head(self, limit: int, max_bytes: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Up to limit oldest pending entries, stopping before max_bytes; always at least one if any"""
+        entries, size = [], 0
+        with self._lock:
+            for entry in self._pending.values():
+                if len(entries) >= limit or (entries and max_bytes is not None and size + entry["size"] > max_bytes):
+                    break
+                entries.append(entry)
+                size += entry["size"]
+        return entries
+
+    def ack(self, seq: int):
+        """Mark a payload done; it is no longer replayed"""
+        with self._lock:
+            if self._finish(seq):
+                self.stats["acked"] += 1
+                self._maybe_compact()
+
+    def _finish(self, seq: int) -> bool:
+        entry = self._pending.pop(seq, None)
+        if entry is None:
+            return False
+        self._pending_bytes -= entry["size"]
+        try:
+            # Not worth an fsync: losing it only means one duplicate send after a power loss
+            self._write(self._encode({"ack": seq}), durable=False)
+        except OSError as e:
+            # Without the record the payload is sent again after a restart
+            logger.error(f"Webhook outbox write error: {str(e)}")
+        self._finished_records += 2
+        return True
+
+    def _enforce_retention(self, now: float):
+        while self._pending:
+            oldest = next(iter(self._pending.values()))
+            if (len(self._pending) <= self.max_entries and self._pending_bytes <= self.max_bytes
+                    and now - oldest["at"] <= self.max_age):
+                break
+            self._finish(oldest["seq"])
+            self.stats["dropped"] += 1
+            if self.on_drop:
+                self.on_drop(oldest["payload"])
+            logger.warning(f"Webhook outbox full, dropped {oldest['payload'].get('message_type')} from {oldest['at']:.0f}")
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        if self._finished_records >= COMPACT_AFTER and self._finished_records > len(self._pending):
+            try:
+                self._compact()
+            except OSError as e:
+                logger.error(f"Webhook outbox compaction error: {str(e)}")
+
+    def sync(self, force: bool = False):
+        """fsync everything appended since the last sync, at most every fsync_interval unless forced"""
+        with self._lock:
+            if not self._dirty or not self._file:
+                return
+            if not force and time.monotonic() - self._last_sync < self.fsync_interval:
+                return
+            try:
+                os.fsync(self._file.fileno())
+                self._dirty = False
+                self._last_sync = time.monotonic()
+                self.stats["fsyncs"] += 1
+            except OSError as e:
+                logger.error(f"Webhook outbox fsync error: {str(e)}")
+
+    def close(self):
+        self.sync(force=True)
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+            if self._lock_file:
+                self._lock_file.close()
+                self._lock_file = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            oldest = next(iter(self._pending.values()), None)
+            return {
+                "path": self.path,
+                "pending": len(self._pending),
+                "pending_bytes": self._pending_bytes,
+                "file_bytes": self._file_bytes,
+                "oldest_age": round(time.time() - oldest["at"], 1) if oldest else None,
+                **self.stats,
+            }
+
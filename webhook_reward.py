@@ -4,25 +4,24 @@ Webhook-based Reward Monitor for Gensyn Bot
 Replaces direct Telegram messaging with webhook notifications
 """
 
-import os
 import time
-import json
-import html
-import requests
 import subprocess
-from web3 import Web3
-from datetime import datetime, date
+from datetime import datetime
 from typing import Dict, Any, Optional, List
 
 from webhook_client import WebhookClient
+from webhook_outbox import outbox_path
+from peer_cache import get_peer_cache, DASHBOARD_MATH_PEER_URL
+from eoa_store import get_eoa_store
+from chain_client import get_chain_client, get_contract
 
 # Hardcoded settings (can be moved to config later)
 PEER_NAMES = ["sly loud alpaca", "blue fast tiger"]  # Edit these if needed
 DELAY_SECONDS = 1800  # 30 minutes
 SCREEN_NAME = "gensyn"
 NODE_NO = "1"
+PEER_FETCH_DEADLINE = 30  # seconds to wait for all peers before reporting what arrived
 
-ALCHEMY_RPC = "https://gensyn-testnet.g.alchemy.com/v2/TD5tr7mo4VfXlSaolFlSr3tL70br2M9J"
 CONTRACT_ADDRESS = "0x69C6e1D608ec64885E7b185d39b04B491a71768C"
 ABI = [
     {
@@ -34,17 +33,10 @@ ABI = [
     }
 ]
 
-EOA_CACHE_FILE = "/root/gensyn-bot/eoa_cache.json"
-
 class WebhookRewardMonitor:
     def __init__(self):
-        self.webhook_client = WebhookClient()
-        self.w3 = Web3(Web3.HTTPProvider(ALCHEMY_RPC))
-        self.contract = self.w3.eth.contract(
-            address=Web3.to_checksum_address(CONTRACT_ADDRESS), 
-            abi=ABI
-        )
-        
+        # Runs as its own process, so it keeps its own outbox file
+        self.webhook_client = WebhookClient(outbox_file=outbox_path("reward"))
         # Setup logging
         import logging
         logging.basicConfig(
@@ -54,6 +46,11 @@ class WebhookRewardMonitor:
         )
         self.logger = logging.getLogger(__name__)
     
+    @property
+    def contract(self):
+        """Shared, lazily built getEoa contract"""
+        return get_contract(CONTRACT_ADDRESS, ABI)
+    
     def log_message(self, message: str):
         """Log message to file"""
         log_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -73,43 +70,30 @@ class WebhookRewardMonitor:
     
     def fetch_peer_data(self, peer_name: str) -> Optional[Dict[str, Any]]:
         """Fetch peer data from Gensyn API"""
-        url_name = peer_name.replace(" ", "%20")
-        url = f"https://dashboard-math.gensyn.ai/api/v1/peer?name={url_name}"
         try:
-            response = requests.get(url, timeout=10)
-            if response.ok:
-                return response.json()
+            return get_peer_cache(DASHBOARD_MATH_PEER_URL).get_by_name(peer_name, allow_stale=False)
         except Exception as e:
             self.logger.error(f"Error fetching peer data for {peer_name}: {str(e)}")
         return None
     
+    def fetch_all_peers(self) -> tuple:
+        """
+        Fetch every configured peer in parallel. Returns ([(name, data)] in
+        PEER_NAMES order, {name: error}) so one slow or failing peer does not
+        hold up or drop the others.
+        """
+        names = [name.strip() for name in PEER_NAMES]
+        # Reward increases are found by comparing polls, so a record from the previous poll will not do
+        records, errors = get_peer_cache(DASHBOARD_MATH_PEER_URL).get_many_by_name(
+            names, deadline=PEER_FETCH_DEADLINE, allow_stale=False
+        )
+        for name, error in errors.items():
+            self.logger.error(f"Error fetching peer data for {name}: {error}")
+        return [(name, records[name]) for name in names if records.get(name)], errors
+    
     def fetch_eoa_mapping(self, peer_ids: List[str]) -> Dict[str, str]:
-        """Fetch EOA mapping from blockchain"""
-        today = str(date.today())
-        
-        # Check cache first
-        if os.path.exists(EOA_CACHE_FILE):
-            try:
-                with open(EOA_CACHE_FILE) as f:
-                    data = json.load(f)
-                    if data.get("date") == today:
-                        return data.get("mapping", {})
-            except Exception:
-                pass
-        
-        # Fetch from blockchain
-        try:
-            addresses = self.contract.functions.getEoa(peer_ids).call()
-            mapping = {pid: eoa for pid, eoa in zip(peer_ids, addresses)}
-            
-            # Cache the result
-            with open(EOA_CACHE_FILE, "w") as f:
-                json.dump({"date": today, "mapping": mapping}, f, indent=4)
-            
-            return mapping
-        except Exception as e:
-            self.logger.error(f"Error fetching EOA mapping: {str(e)}")
-            return {pid: f"Error: {str(e)}" for pid in peer_ids}
+        """Fetch EOA mapping, asking the chain only for ids not in the shared store"""
+        return get_eoa_store().lookup(self.contract, peer_ids)
     
     def format_peer_report(self, name: str, info: Dict[str, Any], eoa: str) -> Dict[str, Any]:
         """Format peer information for webhook"""
@@ -143,21 +127,16 @@ Status: {status}
         """Send periodic report via webhook"""
         try:
             peer_reports = []
-            peer_infos = []
-            peer_ids = []
             
             # Collect peer data
-            for name in PEER_NAMES:
-                data = self.fetch_peer_data(name.strip())
-                if data:
-                    peer_infos.append((name, data))
-                    peer_ids.append(data["peerId"])
+            peer_infos, fetch_errors = self.fetch_all_peers()
+            peer_ids = [data["peerId"] for _name, data in peer_infos]
             
             if not peer_infos:
                 self.webhook_client.send_error_alert(
                     "peer_data_fetch_failed",
                     "Failed to fetch data for any configured peers",
-                    {"peer_names": PEER_NAMES}
+                    {"peer_names": PEER_NAMES, "errors": fetch_errors}
                 )
                 return
             
@@ -179,18 +158,19 @@ Status: {status}
                 "report_type": "periodic_status",
                 "node_number": NODE_NO,
                 "peer_reports": peer_reports,
+                "failed_peers": [{"peer_name": name, "error": error} for name, error in fetch_errors.items()],
                 "screen_logs": logs,
                 "timestamp": datetime.utcnow().isoformat() + "Z"
             }
             
-            # Send via webhook
-            success = self.webhook_client.send_status_update(report_data)
+            # Queue for the webhook sender; delivery failures are in its log and metrics
+            queued = self.webhook_client.send_status_update(report_data)
             
-            if success:
-                self.logger.info(f"Periodic report sent successfully at {datetime.now()}")
+            if queued:
+                self.logger.info(f"Periodic report queued at {datetime.now()}")
                 self.log_message(f"Periodic report sent: {len(peer_reports)} peers")
             else:
-                self.logger.error("Failed to send periodic report via webhook")
+                self.logger.error("Periodic report not sent: webhook not configured")
             
         except Exception as e:
             error_msg = f"Error in periodic report: {str(e)}"
@@ -209,11 +189,8 @@ Status: {status}
         while True:
             try:
                 # Collect current data
-                for name in PEER_NAMES:
-                    data = self.fetch_peer_data(name.strip())
-                    if not data:
-                        continue
-                    
+                peer_infos, _fetch_errors = self.fetch_all_peers()
+                for name, data in peer_infos:
                     peer_id = data["peerId"]
                     current_reward = data.get("reward", 0)
                     current_score = data.get("score", 0)
@@ -260,6 +237,12 @@ Status: {status}
         print(f"📊 Monitoring peers: {', '.join(PEER_NAMES)}")
         print(f"⏱️  Report interval: {DELAY_SECONDS/60:.1f} minutes")
         
+        try:
+            warmup = get_chain_client().warm_up()
+            print(f"⛓️  Chain client ready in {warmup['total_ms']:.0f} ms")
+        except Exception as e:
+            self.logger.error(f"Chain client warm-up failed: {str(e)}")
+        
         # Start reward monitoring in background
         import threading
         reward_thread = threading.Thread(target=self.monitor_rewards, daemon=True)
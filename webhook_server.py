@@ -6,16 +6,28 @@ Handles incoming command requests from the n8n server
 
 import asyncio
 import json
+import os
 import logging
 import time
 from datetime import datetime
 from typing import Dict, Any, Optional, Callable
 from fastapi import FastAPI, HTTPException, Request, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 import uvicorn
 from pydantic import BaseModel
 
 from webhook_config import WebhookConfig
+from webhook_jobs import JobManager, JobHandler, JobQueueFull, FINISHED_STATES
+from command_pools import CommandPools, PoolSaturated
+from log_tail import tail_lines
+from wire_codec import WireEncodingMiddleware, COMPRESS_MIN_BYTES
+
+# Seconds the system_status probes may take together
+STATUS_PROBE_DEADLINE = 5
+# Seconds between job updates on the /jobs/{id}/events stream
+JOB_EVENT_INTERVAL = 1.0
+# Most lines get_logs returns
+GET_LOGS_MAX_LINES = 5000
 
 class CommandRequest(BaseModel):
     """Pydantic model for incoming command requests"""
@@ -33,13 +45,25 @@ class CommandResponse(BaseModel):
     timestamp: str
     vps_id: str
     request_id: Optional[str] = None
+    job_id: Optional[str] = None
+    status_url: Optional[str] = None
 
 class WebhookServer:
     def __init__(self):
         self.config_manager = WebhookConfig()
         self.config = self.config_manager.get_config()
         self.app = FastAPI(title="Gensyn Bot Webhook Server")
+        # gzip or msgpack responses as the client's Accept headers ask, compressed and msgpack requests decoded
+        self.wire_stats: Dict[str, int] = {}
+        wire = self.config.get("wire", {})
+        self.app.add_middleware(WireEncodingMiddleware, min_size=wire.get("min_bytes", COMPRESS_MIN_BYTES), stats=self.wire_stats)
         self.command_handlers: Dict[str, Callable] = {}
+        self.job_handlers: Dict[str, JobHandler] = {}
+        self.jobs = JobManager()
+        # Sync handlers run on bounded pools by command class; the webhook config may resize them
+        self.pools = CommandPools(self.config.get("command_pools"), self.config.get("command_classes"))
+        # Extra sections of /metrics, e.g. the webhook client's send queue
+        self.metrics_sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
         
         # Setup logging
         logging.basicConfig(
@@ -76,11 +100,90 @@ class WebhookServer:
             }
         
         @self.app.get("/status")
-        async def get_status():
-            """Get current VPS status"""
-            if not self._authenticate_request(None):  # Quick status doesn't need auth
-                return await self._get_basic_status()
-            return await self._get_detailed_status()
+        async def get_status(request: Request):
+            """Get current VPS status; detailed when the auth token is sent as for /jobs"""
+            token = request.headers.get("X-Auth-Token") or request.query_params.get("auth_token")
+            if not self._authenticate_request(token):  # Quick status doesn't need auth
+                return self._json_response(await self._get_basic_status())
+            return self._json_response(await self._get_detailed_status())
+        
+        @self.app.get("/jobs")
+        async def list_jobs(request: Request, limit: int = 20):
+            """Recent jobs, newest first"""
+            self._authenticate_header_request(request)
+            return {"jobs": self.jobs.list(limit), "counts": self.jobs.metrics()}
+        
+        @self.app.get("/jobs/{job_id}")
+        async def get_job(job_id: str, request: Request, since: int = 0):
+            """Job status with the step lines after cursor since"""
+            self._authenticate_header_request(request)
+            return self._get_job_or_404(job_id, since)
+        
+        @self.app.post("/jobs/{job_id}/cancel")
+        async def cancel_job(job_id: str, request: Request):
+            """Cancel a queued or running job"""
+            self._authenticate_header_request(request)
+            job = self.jobs.cancel(job_id)
+            if job is None:
+                raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+            self.logger.info(f"Cancel requested for job {job_id} ({job['command']})")
+            return job
+        
+        @self.app.get("/jobs/{job_id}/events")
+        async def job_events(job_id: str, request: Request, since: int = 0):
+            """Server-sent events with new steps until the job finishes"""
+            self._authenticate_header_request(request)
+            self._get_job_or_404(job_id, since)
+            return StreamingResponse(self._stream_job(job_id, since), media_type="text/event-stream")
+        
+        @self.app.get("/metrics")
+        async def get_metrics(request: Request):
+            """Command pool queues and latency, job counts, response encoding and registered metrics sources"""
+            self._authenticate_header_request(request)
+            metrics = {"pools": self.pools.metrics(), "jobs": self.jobs.metrics(), "wire": dict(self.wire_stats)}
+            for name, source in self.metrics_sources.items():
+                try:
+                    metrics[name] = source()
+                except Exception as e:
+                    metrics[name] = {"error": str(e)}
+            return metrics
+    
+    @staticmethod
+    def _json_response(content: Dict[str, Any]) -> Response:
+        """
+        Serialise with json.dumps instead of FastAPI's jsonable_encoder,
+        which costs more than building the whole status; datetimes become
+        ISO strings as before
+        """
+        body = json.dumps(content, default=lambda value: value.isoformat() if hasattr(value, "isoformat") else str(value))
+        return Response(content=body, media_type="application/json")
+    
+    def _authenticate_header_request(self, request: Request):
+        """GET endpoints take the token in the X-Auth-Token header or the auth_token query parameter"""
+        token = request.headers.get("X-Auth-Token") or request.query_params.get("auth_token")
+        if not self._authenticate_request(token):
+            raise HTTPException(status_code=401, detail="Unauthorized")
+    
+    def _get_job_or_404(self, job_id: str, since: int = 0) -> Dict[str, Any]:
+        job = self.jobs.get(job_id, since)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+        return job
+    
+    async def _stream_job(self, job_id: str, since: int):
+        """Yield a job event whenever there are new steps or output, and a last one when it finishes"""
+        last_output = None
+        while True:
+            job = self.jobs.get(job_id, since)
+            if job is None:
+                return
+            if job["steps"] or job["output"] != last_output or job["status"] in FINISHED_STATES:
+                yield f"data: {json.dumps(job)}\n\n"
+            since = job["next_cursor"]
+            last_output = job["output"]
+            if job["status"] in FINISHED_STATES:
+                return
+            await asyncio.sleep(JOB_EVENT_INTERVAL)
     
     def _authenticate_request(self, auth_token: Optional[str]) -> bool:
         """Authenticate incoming request"""
@@ -104,6 +207,27 @@ class WebhookServer:
             self.logger.warning(f"Unauthorized command request: {request.command}")
             raise HTTPException(status_code=401, detail="Unauthorized")
         
+        # Long-running commands are queued as jobs and answered at once
+        if request.command in self.job_handlers:
+            try:
+                job = self.jobs.submit(request.command, self.job_handlers[request.command],
+                                       request.parameters, request.request_id)
+            except JobQueueFull as e:
+                self.logger.warning(f"Rejected job {request.command}: {str(e)}")
+                return self._rejected_response(request, start_time, str(e), 503, 30)
+            self.logger.info(f"Queued job {job['id']} for command: {request.command}")
+            response = CommandResponse(
+                success=True,
+                result=f"Job {job['id']} queued",
+                execution_time=time.time() - start_time,
+                timestamp=datetime.utcnow().isoformat() + "Z",
+                vps_id=vps_info["vps_id"],
+                request_id=request.request_id,
+                job_id=job["id"],
+                status_url=f"/jobs/{job['id']}"
+            )
+            return JSONResponse(content=response.dict(), status_code=202)
+        
         # Check if command handler exists
         if request.command not in self.command_handlers:
             self.logger.error(f"Unknown command: {request.command}")
@@ -115,7 +239,7 @@ class WebhookServer:
         try:
             # Execute command
             handler = self.command_handlers[request.command]
-            result = await self._execute_command_async(handler, request.parameters)
+            result = await self._execute_command_async(handler, request.parameters, request.command)
             
             execution_time = time.time() - start_time
             
@@ -131,6 +255,9 @@ class WebhookServer:
             self.logger.info(f"Command {request.command} executed successfully in {execution_time:.2f}s")
             return JSONResponse(content=response.dict())
             
+        except PoolSaturated as e:
+            self.logger.warning(f"Rejected command {request.command}: {str(e)}")
+            return self._rejected_response(request, start_time, str(e), 429, e.retry_after)
         except Exception as e:
             execution_time = time.time() - start_time
             error_msg = f"Command failed: {str(e)}"
@@ -147,28 +274,51 @@ class WebhookServer:
             self.logger.error(f"Command {request.command} failed: {str(e)}")
             return JSONResponse(content=response.dict(), status_code=500)
     
-    async def _execute_command_async(self, handler: Callable, parameters: Dict[str, Any]) -> str:
-        """Execute command handler asynchronously"""
-        loop = asyncio.get_event_loop()
-        
+    def _rejected_response(self, request: CommandRequest, start_time: float, message: str,
+                           status_code: int, retry_after: int) -> JSONResponse:
+        """A command turned away because its pool or the job queue is full"""
+        response = CommandResponse(
+            success=False,
+            result=message,
+            execution_time=time.time() - start_time,
+            timestamp=datetime.utcnow().isoformat() + "Z",
+            vps_id=self.config_manager.get_vps_info()["vps_id"],
+            request_id=request.request_id
+        )
+        return JSONResponse(content=response.dict(), status_code=status_code,
+                            headers={"Retry-After": str(retry_after)})
+    
+    async def _execute_command_async(self, handler: Callable, parameters: Dict[str, Any], command: str = "") -> str:
+        """Execute command handler asynchronously, sync handlers on their command's pool"""
         if asyncio.iscoroutinefunction(handler):
             return await handler(parameters)
         else:
-            return await loop.run_in_executor(None, handler, parameters)
+            return await self.pools.run(command, handler, parameters)
     
-    def register_command_handler(self, command: str, handler: Callable):
-        """Register a command handler"""
+    def register_command_handler(self, command: str, handler: Callable, pool: Optional[str] = None):
+        """Register a command handler; pool overrides the command's executor pool (fast, slow or exclusive)"""
         self.command_handlers[command] = handler
+        if pool:
+            self.pools.set_class(command, pool)
         self.logger.info(f"Registered command handler: {command}")
     
+    def register_metrics(self, name: str, source: Callable[[], Dict[str, Any]]):
+        """Add source() to /metrics under name"""
+        self.metrics_sources[name] = source
+    
+    def register_job_handler(self, command: str, handler: JobHandler):
+        """Register a long-running command; handler(params, job) runs as a background job"""
+        self.job_handlers[command] = handler
+        self.logger.info(f"Registered job handler: {command}")
+    
     def _register_default_handlers(self):
         """Register default command handlers"""
         
         def check_ip(params: Dict[str, Any]) -> str:
             """Check current public IP"""
-            import requests
+            import http_client
             try:
-                ip = requests.get('https://api.ipify.org', timeout=10).text.strip()
+                ip = http_client.get('https://api.ipify.org', timeout=10).text.strip()
                 return f"Current Public IP: {ip}"
             except Exception as e:
                 return f"Error checking IP: {str(e)}"
@@ -197,11 +347,8 @@ class WebhookServer:
         
         def gensyn_status(params: Dict[str, Any]) -> str:
             """Get Gensyn status"""
-            # Import the status function from the original bot
             try:
-                import sys
-                sys.path.append('/root/gensyn-bot')
-                from bot import format_gensyn_status
+                from gensyn_core import format_gensyn_status
                 return format_gensyn_status()
             except Exception as e:
                 return f"Error getting Gensyn status: {str(e)}"
@@ -209,49 +356,36 @@ class WebhookServer:
         def start_gensyn(params: Dict[str, Any]) -> str:
             """Start Gensyn"""
             try:
-                import sys
-                sys.path.append('/root/gensyn-bot')
-                from bot import start_gensyn_session, check_gensyn_screen_running
-                
-                if check_gensyn_screen_running():
-                    return "Gensyn already running"
+                import gensyn_core
                 
                 use_sync_backup = params.get("use_sync_backup", True)
                 fresh_start = params.get("fresh_start", False)
                 
-                # This would need to be adapted to not use chat_id
-                # For now, we'll use a simple version
-                import subprocess
-                import os
-                
-                if fresh_start:
-                    cmd = "cd /root/rl-swarm && screen -dmS gensyn bash -c 'python3 -m venv .venv && source .venv/bin/activate && ./run_rl_swarm.sh'"
-                    subprocess.run(cmd, shell=True, check=True)
-                    return "Fresh Gensyn node started"
-                else:
-                    if not os.path.exists("/root/rl-swarm/swarm.pem"):
-                        return "swarm.pem not found. Use fresh_start=true or upload swarm.pem first"
-                    
-                    cmd = "cd /root/rl-swarm && screen -dmS gensyn bash -c 'python3 -m venv .venv && source .venv/bin/activate && ./run_rl_swarm.sh'"
-                    subprocess.run(cmd, shell=True, check=True)
-                    return "Gensyn started successfully"
+                outcome, message = gensyn_core.start_gensyn_session(use_sync_backup, fresh_start)
+                if outcome == gensyn_core.START_ALREADY_RUNNING:
+                    return "Gensyn already running"
+                if outcome == gensyn_core.START_MISSING_PEM:
+                    return "swarm.pem not found. Use fresh_start=true or upload swarm.pem first"
+                if outcome == gensyn_core.START_ERROR:
+                    return message
+                return "Fresh Gensyn node started" if fresh_start else "Gensyn started successfully"
                     
             except Exception as e:
                 return f"Error starting Gensyn: {str(e)}"
         
         def kill_gensyn(params: Dict[str, Any]) -> str:
             """Kill Gensyn"""
-            try:
-                import subprocess
-                subprocess.run("screen -S gensyn -X quit", shell=True, check=True)
-                return "Gensyn screen killed successfully"
-            except subprocess.CalledProcessError as e:
-                return f"Failed to kill Gensyn screen: {str(e)}"
+            from gensyn_core import kill_gensyn_session
+            ok, message = kill_gensyn_session()
+            return "Gensyn screen killed successfully" if ok else message
         
         def get_logs(params: Dict[str, Any]) -> str:
             """Get system logs"""
             log_type = params.get("log_type", "gensyn")
-            lines = params.get("lines", 50)
+            try:
+                lines = min(max(int(params.get("lines", 50)), 1), GET_LOGS_MAX_LINES)
+            except (TypeError, ValueError):
+                return f"Invalid lines: {params.get('lines')}"
             
             try:
                 if log_type == "gensyn":
@@ -266,13 +400,24 @@ class WebhookServer:
                 if not os.path.exists(log_path):
                     return f"Log file not found: {log_path}"
                 
-                import subprocess
-                result = subprocess.run(f"tail -{lines} {log_path}", shell=True, capture_output=True, text=True)
-                return result.stdout
+                # Reads backwards from the end, so the cost depends on lines, not on the log size
+                return "\n".join(tail_lines(log_path, lines))
                 
             except Exception as e:
                 return f"Error reading logs: {str(e)}"
         
+        def round_history(params: Dict[str, Any]) -> str:
+            """Get round statistics from the round-history index"""
+            try:
+                from round_history import get_round_history
+                hours = float(params.get("hours", 24))
+                history = get_round_history()
+                summary = history.summary(hours)
+                summary["recent"] = history.recent_rounds(int(params.get("recent", 10)))
+                return json.dumps(summary, indent=2)
+            except Exception as e:
+                return f"Error getting round history: {str(e)}"
+        
         # Register all handlers
         self.register_command_handler("check_ip", check_ip)
         self.register_command_handler("vpn_on", vpn_on)
@@ -281,6 +426,17 @@ class WebhookServer:
         self.register_command_handler("start_gensyn", start_gensyn)
         self.register_command_handler("kill_gensyn", kill_gensyn)
         self.register_command_handler("get_logs", get_logs)
+        self.register_command_handler("round_history", round_history)
+    
+    def _get_gensyn_snapshot(self) -> Dict[str, Any]:
+        """Gensyn status sections with their ages, read from the background snapshot"""
+        try:
+            from gensyn_core import get_status_snapshot
+            snapshot = get_status_snapshot()
+            snapshot.start()
+            return snapshot.to_dict()
+        except Exception as e:
+            return {"error": f"Failed to read status snapshot: {str(e)}"}
     
     async def _get_basic_status(self) -> Dict[str, Any]:
         """Get basic VPS status without authentication"""
@@ -293,36 +449,17 @@ class WebhookServer:
         }
     
     async def _get_detailed_status(self) -> Dict[str, Any]:
-        """Get detailed VPS status"""
+        """
+        Get detailed VPS status. Everything is read from the background
+        system sampler and status snapshot, so no probe runs per request;
+        probes not yet run report "unknown".
+        """
         try:
-            import psutil
-            import subprocess
-            
-            # Check Gensyn status
-            gensyn_running = False
-            try:
-                result = subprocess.run("screen -ls", shell=True, capture_output=True, text=True)
-                gensyn_running = "gensyn" in result.stdout
-            except:
-                pass
-            
-            # Check VPN status
-            vpn_status = "unknown"
-            try:
-                result = subprocess.run("wg show", shell=True, capture_output=True, text=True)
-                vpn_status = "connected" if result.returncode == 0 and "wg0" in result.stdout else "disconnected"
-            except:
-                pass
-            
-            # Check API status
-            api_status = "unknown"
-            try:
-                import requests
-                response = requests.get("http://localhost:3000", timeout=3)
-                api_status = "running" if "Sign in to Gensyn" in response.text else "stopped"
-            except:
-                api_status = "stopped"
+            from gensyn_core import get_system_sampler
             
+            sampler = get_system_sampler()
+            sampler.start()
+            sampled = sampler.status()
             vps_info = self.config_manager.get_vps_info()
             
             return {
@@ -330,27 +467,50 @@ class WebhookServer:
                 "vps_name": vps_info["vps_name"],
                 "timestamp": datetime.utcnow().isoformat() + "Z",
                 "status": "online",
-                "gensyn_running": gensyn_running,
-                "vpn_status": vpn_status,
-                "api_status": api_status,
-                "system": {
-                    "cpu_percent": psutil.cpu_percent(),
-                    "memory_percent": psutil.virtual_memory().percent,
-                    "disk_percent": psutil.disk_usage('/').percent
-                }
+                "gensyn_running": sampler.probe("gensyn_running"),
+                "vpn_status": sampler.probe("vpn_status"),
+                "api_status": sampler.probe("api_status"),
+                "gensyn": self._get_gensyn_snapshot(),
+                "system": sampled["latest"],
+                "system_windows": sampled["windows"],
+                "sampled_at": sampled["sampled_at"]
             }
         except Exception as e:
             return {"error": f"Failed to get detailed status: {str(e)}"}
     
-    def run(self, host: str = "0.0.0.0", port: Optional[int] = None):
+    def enable_telegram_webhook(self, bot, secret: str):
+        """
+        Receive Telegram updates at /telegram/<secret> and hand them to the
+        handlers registered on bot. Telegram also sends the secret in the
+        X-Telegram-Bot-Api-Secret-Token header; requests without it are refused.
+        """
+        from telebot.types import Update
+        
+        @self.app.post(f"/telegram/{secret}")
+        async def telegram_update(request: Request):
+            """Telegram webhook endpoint"""
+            if request.headers.get("X-Telegram-Bot-Api-Secret-Token") != secret:
+                raise HTTPException(status_code=403, detail="Forbidden")
+            update = Update.de_json(await request.json())
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, bot.process_new_updates, [update])
+            return {"ok": True}
+        
+        self.logger.info("Telegram webhook endpoint enabled")
+    
+    def run(self, host: str = "0.0.0.0", port: Optional[int] = None, require_config: bool = True):
         """Run the webhook server"""
-        if not self.config_manager.is_configured():
+        if require_config and not self.config_manager.is_configured():
             self.logger.error("Webhook not configured. Run webhook_config.py first.")
             return
         
         server_port = port or self.config.get("webhook_port", 8080)
         self.logger.info(f"Starting webhook server on {host}:{server_port}")
         
+        # Sample before the first /status request instead of on it
+        from gensyn_core import get_system_sampler
+        get_system_sampler().start()
+        
         try:
             uvicorn.run(self.app, host=host, port=server_port, log_level="info")
         except Exception as e:
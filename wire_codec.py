@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Wire encoding for Gensyn Bot webhook traffic
+Content negotiation for webhook requests and responses: bodies above a size
+threshold are compressed with gzip, which n8n understands, or zstd when the
+zstandard package is installed, and msgpack replaces JSON for clients that
+ask for it and have the msgpack package, e.g. another bot.
+"""
+
+import gzip
+import json
+import time
+import random
+import argparse
+from typing import Any, Dict, List, Optional, Tuple
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+# Bodies smaller than this are sent as they are; compressing them costs more than it saves
+COMPRESS_MIN_BYTES = 1024
+# Level 6 is gzip's default; see --bench for what lower levels trade
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def _zstd():
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+
+def _msgpack():
+    try:
+        import msgpack
+        return msgpack
+    except ImportError:
+        return None
+
+
+def msgpack_available() -> bool:
+    return _msgpack() is not None
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """Content encodings this process can produce, preferred first"""
+    return ("zstd", "gzip") if _zstd() else ("gzip",)
+
+
+def _media_type(header: Optional[str]) -> str:
+    return (header or "").split(";")[0].strip().lower()
+
+
+def _accepted(header: Optional[str]) -> Dict[str, float]:
+    """Tokens of an Accept or Accept-Encoding header with their q values"""
+    accepted = {}
+    for part in (header or "").split(","):
+        token, *params = [piece.strip() for piece in part.split(";")]
+        if not token:
+            continue
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        accepted[token.lower()] = quality
+    return accepted
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """The content encoding to respond with, or None for an uncompressed body"""
+    accepted = _accepted(accept_encoding)
+    for encoding in available_encodings():
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+def choose_content_type(accept: Optional[str]) -> str:
+    """MSGPACK when the client asks for it at least as much as for JSON and msgpack is installed"""
+    accepted = _accepted(accept)
+    msgpack_quality = max(accepted.get(media_type, 0) for media_type in MSGPACK_TYPES)
+    if msgpack_quality > 0 and msgpack_quality >= accepted.get(JSON, 0) and msgpack_available():
+        return MSGPACK
+    return JSON
+
+
+def _default(value: Any) -> Any:
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def serialize(content: Any, content_type: str = JSON) -> bytes:
+    if _media_type(content_type) in MSGPACK_TYPES:
+        return _msgpack().packb(content, default=_default, use_bin_type=True)
+    return json.dumps(content, separators=(",", ":"), default=_default).encode()
+
+
+def deserialize(body: bytes, content_type: Optional[str] = JSON) -> Any:
+    if _media_type(content_type) in MSGPACK_TYPES:
+        return _msgpack().unpackb(body, raw=False)
+    return json.loads(body) if body else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        # mtime=0 keeps the output identical for identical input
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    if encoding == "zstd":
+        return _zstd().ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def decompress(body: bytes, encoding: Optional[str]) -> bytes:
+    encoding = (encoding or "identity").strip().lower()
+    if encoding == "identity":
+        return body
+    if encoding in ("gzip", "x-gzip"):
+        return gzip.decompress(body)
+    if encoding == "zstd" and _zstd():
+        return _zstd().ZstdDecompressor().decompressobj().decompress(body)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def encode_body(content: Any, content_type: str = JSON, encoding: Optional[str] = None,
+                min_size: int = COMPRESS_MIN_BYTES) -> Tuple[bytes, Dict[str, str]]:
+    """Serialize content, compressing it when encoding is given and it reaches min_size; returns (body, headers)"""
+    return compress_body(serialize(content, content_type), content_type, encoding, min_size)
+
+
+def compress_body(body: bytes, content_type: str = JSON, encoding: Optional[str] = None,
+                  min_size: int = COMPRESS_MIN_BYTES) -> Tuple[bytes, Dict[str, str]]:
+    """Compress an already serialized body when encoding is given and it reaches min_size; returns (body, headers)"""
+    headers = {"Content-Type": content_type}
+    if encoding and len(body) >= min_size:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return body, headers
+
+
+def decode_body(body: bytes, content_type: Optional[str] = JSON, content_encoding: Optional[str] = None) -> Any:
+    return deserialize(decompress(body, content_encoding), content_type)
+
+
+class WireEncodingMiddleware:
+    """
+    ASGI middleware for the webhook server. Request bodies sent compressed
+    or as msgpack are turned into plain JSON before FastAPI parses them.
+    Complete JSON responses are re-encoded as msgpack when the Accept
+    header asks for it and compressed per Accept-Encoding from min_size
+    bytes. Streamed responses, like the job event stream, pass unchanged.
+    """
+
+    def __init__(self, app, min_size: int = COMPRESS_MIN_BYTES, stats: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.min_size = min_size
+        # Pass a dict to read the counters from outside, e.g. for /metrics
+        self.stats = stats if stats is not None else {}
+        for key in ("responses", "encoded", "body_bytes", "wire_bytes", "decoded_requests"):
+            self.stats.setdefault(key, 0)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope["headers"]}
+        request_type = _media_type(headers.get("content-type"))
+        if headers.get("content-encoding", "identity").lower() != "identity" or request_type in MSGPACK_TYPES:
+            try:
+                content = decode_body(await self._read_body(receive), request_type or JSON, headers.get("content-encoding"))
+            except Exception as e:
+                await self._send_error(send, 400, f"Could not decode request body: {str(e)}")
+                return
+            scope, receive = self._as_json_request(scope, serialize(content))
+            self.stats["decoded_requests"] += 1
+
+        content_type = choose_content_type(headers.get("accept"))
+        encoding = choose_encoding(headers.get("accept-encoding"))
+        if content_type == JSON and encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        pending_start = {}
+
+        async def send_encoded(message):
+            if message["type"] == "http.response.start":
+                # Held until the body shows whether the response is complete
+                pending_start["message"] = message
+                return
+            start = pending_start.pop("message", None)
+            if start is None:
+                await send(message)
+                return
+            response_headers = [(key.lower(), value) for key, value in start["headers"]]
+            is_json = _media_type(dict(response_headers).get(b"content-type", b"").decode("latin-1")) == JSON
+            if message.get("more_body") or not is_json or b"content-encoding" in dict(response_headers):
+                await send(start)
+                await send(message)
+                return
+            body = message.get("body", b"")
+            recoded_type = content_type
+            if content_type == MSGPACK:
+                try:
+                    body = serialize(json.loads(body), MSGPACK)
+                except ValueError:
+                    recoded_type = JSON
+            wire_body, extra = compress_body(body, recoded_type, encoding, self.min_size)
+            self.stats["responses"] += 1
+            self.stats["body_bytes"] += len(message.get("body", b""))
+            self.stats["wire_bytes"] += len(wire_body)
+            if wire_body is not message.get("body"):
+                self.stats["encoded"] += 1
+            kept = [(key, value) for key, value in response_headers
+                    if key not in (b"content-type", b"content-length", b"content-encoding", b"vary")]
+            kept += [(key.lower().encode("latin-1"), value.encode("latin-1")) for key, value in extra.items()]
+            kept += [(b"content-length", str(len(wire_body)).encode()), (b"vary", b"Accept, Accept-Encoding")]
+            await send({**start, "headers": kept})
+            await send({"type": "http.response.body", "body": wire_body})
+
+        await self.app(scope, receive, send_encoded)
+
+    @staticmethod
+    async def _read_body(receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                return b"".join(chunks)
+
+    @staticmethod
+    def _as_json_request(scope, body: bytes):
+        headers = [(key, value) for key, value in scope["headers"]
+                   if key.lower() not in (b"content-type", b"content-encoding", b"content-length")]
+        headers += [(b"content-type", JSON.encode()), (b"content-length", str(len(body)).encode())]
+        sent = {"done": False}
+
+        async def receive_json():
+            if sent["done"]:
+                return {"type": "http.disconnect"}
+            sent["done"] = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        return {**scope, "headers": headers}, receive_json
+
+    @staticmethod
+    async def _send_error(send, status: int, detail: str):
+        body = serialize({"detail": detail})
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(b"content-type", JSON.encode()), (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+
+# Typical payloads for the benchmark
+def _log_lines(count: int, seed: int = 7) -> List[str]:
+    """Lines shaped like swarm_launcher.log: timestamps, levels, peer ids, rounds and rewards"""
+    rng = random.Random(seed)
+    templates = [
+        "{ts} - INFO - hivemind_exp.runner.gensyn.testnet_grpo_runner - Joining round: {round}",
+        "{ts} - INFO - hivemind_exp.trainer.hivemind_grpo_trainer - Starting stage {stage}",
+        "{ts} - INFO - hivemind_exp.dht_utils - Peer {peer} published rewards for round {round}: {reward:.4f}",
+        "{ts} - DEBUG - hivemind.averaging.averager - Averaged gradients with {peers} peers in {secs:.2f}s",
+        "{ts} - WARNING - hivemind.dht.protocol - Failed to call rpc_find from {peer}: TimeoutError",
+        "{ts} - INFO - root - Final rewards: {{'{peer}': {reward:.4f}}}",
+    ]
+    lines = []
+    for i in range(count):
+        lines.append(rng.choice(templates).format(
+            ts=f"2025-09-03 12:{i // 60 % 60:02d}:{i % 60:02d},{rng.randint(0, 999):03d}",
+            round=1200 + i // 40, stage=i // 15 % 3, reward=rng.random(), peers=rng.randint(2, 9),
+            secs=rng.random() * 3, peer="Qm" + "".join(rng.choice("abcdefghijkmnopqrstuvwxyzABCDEFGHJKLMNPQRSTUVWXYZ123456789") for _ in range(44)),
+        ))
+    return lines
+
+
+def _bench_payloads() -> Dict[str, Any]:
+    heartbeat = {"stream": "3f9c2a1b", "seq": 42, "full": False, "base_seq": 41,
+                 "changed": {"uptime": "52.1h", "system_info": {"cpu_percent": 9.0}}}
+    report = {
+        "report_type": "periodic_summary",
+        "peer_reports": [{"peer_name": f"peer-{i}", "peer_id": "Qm" + "x" * 44, "score": 1200 + i, "reward": 14 + i,
+                          "wins": 3 + i, "eoa": "0x" + "ab" * 20} for i in range(5)],
+        "failed_peers": [],
+        "screen_logs": "\n".join(_log_lines(100, seed=3)),
+    }
+    return {
+        "heartbeat delta": heartbeat,
+        "get_logs 50 lines": {"command": "get_logs", "success": True, "result": "\n".join(_log_lines(50)),
+                              "execution_time": 0.01, "request_id": "n8n-1"},
+        "get_logs 500 lines": {"command": "get_logs", "success": True, "result": "\n".join(_log_lines(500)),
+                               "execution_time": 0.03, "request_id": "n8n-2"},
+        "periodic report": report,
+    }
+
+
+def _per_call_us(function, *args, budget: float = 0.2) -> float:
+    calls, start = 0, time.perf_counter()
+    while time.perf_counter() - start < budget:
+        function(*args)
+        calls += 1
+    return (time.perf_counter() - start) * 1e6 / calls
+
+
+def bench():
+    """Bytes on the wire and CPU per encode/decode for typical webhook payloads"""
+    global GZIP_LEVEL
+    variants = [("json", JSON, None, None)]
+    for level in (1, 6, 9):
+        variants.append((f"json+gzip-{level}", JSON, "gzip", level))
+    if _zstd():
+        variants.append(("json+zstd", JSON, "zstd", None))
+    if _msgpack():
+        variants += [("msgpack", MSGPACK, None, None), ("msgpack+gzip-6", MSGPACK, "gzip", 6)]
+    pretty = lambda content: json.dumps(content, indent=2).encode()
+    default_level = GZIP_LEVEL
+    print(f"{'payload':<20} {'encoding':<16} {'bytes':>8} {'ratio':>6} {'encode µs':>10} {'decode µs':>10}")
+    try:
+        for name, content in _bench_payloads().items():
+            print(f"{name:<20} {'json (indented)':<16} {len(pretty(content)):>8,} {'':>6} {_per_call_us(pretty, content):>10.1f}")
+            raw_size = len(serialize(content))
+            for label, content_type, encoding, level in variants:
+                GZIP_LEVEL = level or default_level
+                body, headers = encode_body(content, content_type, encoding)
+                encode_us = _per_call_us(encode_body, content, content_type, encoding)
+                decode_us = _per_call_us(decode_body, body, content_type, headers.get("Content-Encoding"))
+                note = "" if "Content-Encoding" in headers or not encoding else " (below threshold)"
+                print(f"{'':<20} {label:<16} {len(body):>8,} {raw_size / len(body):>5.1f}x {encode_us:>10.1f} {decode_us:>10.1f}{note}")
+    finally:
+        GZIP_LEVEL = default_level
+    print(f"zstd: {'installed' if _zstd() else 'not installed (pip install zstandard)'}, "
+          f"msgpack: {'installed' if _msgpack() else 'not installed (pip install msgpack)'}")
+
+
+def main():
+    """Main function for the benchmark"""
+    parser = argparse.ArgumentParser(description="Webhook wire encoding")
+    parser.add_argument("--bench", action="store_true", help="Compare bytes on the wire and CPU cost for typical payloads")
+    args = parser.parse_args()
+
+    if args.bench:
+        bench()
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()